@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+from loguru import logger
+from app.core.config import CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_PATH, CACHE_TTL, GEMINI_MODEL, LLM_BACKEND
+
+# Cache hits whose LRU timestamps are held in memory before they are written
+TOUCH_BATCH = 256
+
+# Answers from the offline backends must never be served for real Gemini calls
+# (or the other way round) when the cache file is shared.
+MODEL_ID = GEMINI_MODEL if LLM_BACKEND in ("gemini", "record") else f"{LLM_BACKEND}:{GEMINI_MODEL}"
+
+
+def cache_key(payload: dict, model: Optional[str] = MODEL_ID) -> str:
+    """Content hash of a normalized request payload and the model that answers it.
+
+    Values are stringified and whitespace-collapsed so that ``34`` and ``"34 "``
+    land on the same entry.
+    """
+    canonical = {field: " ".join(str(value).split()) for field, value in payload.items()}
+    blob = json.dumps({"model": model, "payload": canonical}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """Per-process LRU cache with a fixed TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SQLiteCache:
+    """LRU cache with a fixed TTL in a local SQLite file.
+
+    All uvicorn workers on a host can point at the same file; WAL mode and a
+    memory-mapped read path keep lookups well under a millisecond. Every call
+    runs in a worker thread, so a slow disk or a write lock held by another
+    worker never blocks the event loop. Reads don't write: hits are remembered
+    in memory and their ``accessed_at`` is updated in one statement by the next
+    ``set()``, just before it evicts.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA mmap_size=67108864")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    async def get(self, key: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: dict) -> None:
+        await asyncio.to_thread(self._set, key, value)
+
+    def _get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            # Expired rows are left for the next set() to delete
+            if row is None or row[1] < now:
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH:
+                with self._transaction():
+                    self._flush_touched()
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: dict) -> None:
+        now = time.time()
+        blob = json.dumps(value)
+        with self._lock, self._transaction():
+            self._flush_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, blob, now + self.ttl, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def _flush_touched(self) -> None:
+        touched, self._touched = self._touched, {}
+        self._conn.executemany(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in touched.items()],
+        )
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+
+def build_cache(backend: str):
+    if backend == "memory":
+        return MemoryCache(CACHE_MAX_ENTRIES, CACHE_TTL)
+    if backend == "sqlite":
+        return SQLiteCache(CACHE_PATH, CACHE_MAX_ENTRIES, CACHE_TTL)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+
+response_cache = build_cache(CACHE_BACKEND)
+logger.info(f"Response cache backend: {CACHE_BACKEND}")
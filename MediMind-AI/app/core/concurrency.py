@@ -0,0 +1,84 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from loguru import logger
+from app.core.config import LLM_MAX_CONCURRENCY, LLM_QUEUE_TIMEOUT
+from app.core.metrics import Gauge, record_stage
+
+
+class LLMBusyError(Exception):
+    """Raised when no LLM slot frees up within the queue timeout."""
+
+
+class ConcurrencyLimiter:
+    """Caps the number of in-flight LLM calls on the running event loop.
+
+    Callers queue for a slot for at most ``queue_timeout`` seconds; after that
+    they get :class:`LLMBusyError` instead of piling up behind a slow upstream.
+    """
+
+    def __init__(self, limit: int, queue_timeout: float):
+        if limit < 1:
+            raise ValueError("Concurrency limit must be at least 1")
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def _acquire(self, count: int):
+        acquired = 0
+        try:
+            while acquired < count:
+                await self._semaphore.acquire()
+                acquired += 1
+        except BaseException:
+            # Timed out or cancelled part-way: hand back what we already hold.
+            for _ in range(acquired):
+                self._semaphore.release()
+            raise
+
+    @asynccontextmanager
+    async def slot(self, count: int = 1):
+        """Holds ``count`` slots (capped at the limit) for the duration of the block."""
+        count = max(1, min(count, self.limit))
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._acquire(count), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"No LLM slot free after {self.queue_timeout}s ({self.in_flight} in flight)")
+            raise LLMBusyError("Service busy, please retry shortly")
+        finally:
+            self.waiting -= 1
+            record_stage("queue", time.perf_counter() - started)
+
+        self.in_flight += count
+        try:
+            yield
+        finally:
+            self.in_flight -= count
+            for _ in range(count):
+                self._semaphore.release()
+
+    async def try_acquire(self) -> bool:
+        """Takes one slot only if one is free right now, without queueing.
+
+        For extra work (a hedged request) that is only worth doing with spare
+        capacity. Give the slot back with :meth:`release`.
+        """
+        if self._semaphore.locked():
+            return False
+        await self._semaphore.acquire()  # free, so this returns without waiting
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+
+llm_limiter = ConcurrencyLimiter(LLM_MAX_CONCURRENCY, LLM_QUEUE_TIMEOUT)
+
+Gauge("llm_in_flight", "LLM calls currently holding a slot.", lambda: llm_limiter.in_flight)
+Gauge("llm_queue_waiting", "Requests waiting for an LLM slot.", lambda: llm_limiter.waiting)
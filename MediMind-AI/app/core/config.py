@@ -6,5 +6,51 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL")
 
-if not GEMINI_API_KEY:
-    raise EnvironmentError("GEMINI_API_KEY not set in environment")
\ No newline at end of file
+# Which chat model backs the chain: "gemini", "fake" (offline stand-in),
+# "record" (Gemini, saving every answer to LLM_RECORDINGS_DIR) or "replay"
+# (the fake, answering from LLM_RECORDINGS_DIR where it can).
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_RECORDINGS_DIR = os.getenv("LLM_RECORDINGS_DIR", ".cache/llm_recordings")
+
+# Behaviour of the fake backend; see app/core/fake_llm.py.
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "800"))
+FAKE_LLM_LATENCY_SIGMA = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0"))
+FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED")) if os.getenv("FAKE_LLM_SEED") else None
+
+# Upper bound on concurrent upstream LLM calls per worker, and how long a
+# request may wait for a free slot before it is rejected with a 503.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+
+# Upstream call policy (app/core/resilience.py): overall deadline per call,
+# hedging after the given latency percentile (0 disables it), retries for
+# transient errors, and the circuit breaker that fails fast with 503.
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+CIRCUIT_WINDOW_SECONDS = float(os.getenv("CIRCUIT_WINDOW_SECONDS", "30"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+
+# /generate_prescriptions/batch: max payloads per request and how many of
+# them are sent to the LLM at the same time.
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Response cache in front of the chain: "memory" (per worker), "sqlite"
+# (shared by all workers on the host through CACHE_PATH) or "none".
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_PATH = os.getenv("CACHE_PATH", ".cache/prescription_cache.sqlite3")
+
+# Build the chain right after startup (in the background) rather than on the
+# first request, and optionally prime the upstream connection with a tiny prompt.
+LLM_EAGER_INIT = os.getenv("LLM_EAGER_INIT", "true").lower() == "true"
+LLM_WARMUP = os.getenv("LLM_WARMUP", "false").lower() == "true"
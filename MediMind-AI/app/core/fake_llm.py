@@ -0,0 +1,186 @@
+"""Offline stand-ins for the Gemini chat model.
+
+``FakePrescriptionLLM`` answers every prompt with a deterministic prescription
+document after a configurable, randomly distributed delay, so the service can
+be load-tested without an API key or quota. ``RecordingChatModel`` wraps the
+real model and stores each answer on disk; pointing the fake at the same
+directory replays those answers with fake timing.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_DIAGNOSES = [
+    ("Acute viral upper respiratory infection", "Paracetamol", "500 mg", "Every 6 hours after food"),
+    ("Tension-type headache", "Ibuprofen", "400 mg", "Every 8 hours after food, max 3 days"),
+    ("Acute gastroenteritis", "Oral rehydration salts", "1 sachet in 1 L water", "Sip throughout the day"),
+    ("Allergic rhinitis", "Cetirizine", "10 mg", "Once daily at bedtime"),
+    ("Mild persistent asthma exacerbation", "Salbutamol inhaler", "2 puffs", "Every 4-6 hours as needed"),
+]
+
+
+class FakeUpstreamError(Exception):
+    """Injected failure that looks like a transient upstream error."""
+
+    def __init__(self, message: str = "Fake upstream failure", status_code: int = 503):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def prompt_key(messages: List[BaseMessage]) -> str:
+    blob = json.dumps([[m.type, m.content] for m in messages], ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _usage(messages: List[BaseMessage], text: str) -> dict:
+    input_tokens = sum(_estimate_tokens(str(m.content)) for m in messages)
+    output_tokens = _estimate_tokens(text)
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+class FakePrescriptionLLM(BaseChatModel):
+    """Deterministic chat model with simulated latency, token rate and failures.
+
+    The time to first token is log-normally distributed around
+    ``latency_ms`` (``latency_sigma=0`` makes it fixed); the body then arrives
+    at ``tokens_per_second`` (0 means all at once). ``failure_rate`` is the
+    probability that a call raises :class:`FakeUpstreamError`.
+    """
+
+    latency_ms: float = 800.0
+    latency_sigma: float = 0.0
+    tokens_per_second: float = 0.0
+    failure_rate: float = 0.0
+    seed: Optional[int] = None
+    recordings_dir: Optional[str] = None
+    chunk_chars: int = 16
+
+    _rng: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-prescription"
+
+    def _random(self) -> random.Random:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+    def _first_token_delay(self) -> float:
+        delay = self.latency_ms / 1000
+        if self.latency_sigma > 0:
+            delay *= math.exp(self.latency_sigma * self._random().gauss(0, 1))
+        return delay
+
+    def _body_delay(self, text: str) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return _estimate_tokens(text) / self.tokens_per_second
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate > 0 and self._random().random() < self.failure_rate:
+            raise FakeUpstreamError()
+
+    def _response_text(self, messages: List[BaseMessage]) -> str:
+        key = prompt_key(messages)
+        if self.recordings_dir:
+            path = os.path.join(self.recordings_dir, f"{key}.json")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    return json.load(f)["content"]
+
+        diagnosis, medicine, dosage, instructions = _DIAGNOSES[int(key, 16) % len(_DIAGNOSES)]
+        return json.dumps({
+            "diagnosis": diagnosis,
+            "notes": "Stay hydrated, rest, and return if symptoms worsen or persist beyond 5 days.",
+            "prescription_items": [
+                {"medicine": medicine, "dosage": dosage, "instructions": instructions},
+                {"medicine": "Vitamin C", "dosage": "500 mg", "instructions": "Once daily for 7 days"},
+            ],
+        }, indent=2)
+
+    def _chunks(self, text: str) -> List[str]:
+        return [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = self._response_text(messages)
+        time.sleep(self._first_token_delay())
+        self._maybe_fail()
+        time.sleep(self._body_delay(text))
+        message = AIMessage(content=text, usage_metadata=_usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = self._response_text(messages)
+        await asyncio.sleep(self._first_token_delay())
+        self._maybe_fail()
+        await asyncio.sleep(self._body_delay(text))
+        message = AIMessage(content=text, usage_metadata=_usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        text = self._response_text(messages)
+        chunks = self._chunks(text)
+        time.sleep(self._first_token_delay())
+        self._maybe_fail()
+        for chunk in chunks:
+            time.sleep(self._body_delay(text) / len(chunks))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=_usage(messages, text)))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._response_text(messages)
+        chunks = self._chunks(text)
+        await asyncio.sleep(self._first_token_delay())
+        self._maybe_fail()
+        for chunk in chunks:
+            await asyncio.sleep(self._body_delay(text) / len(chunks))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=_usage(messages, text)))
+
+
+class RecordingChatModel(BaseChatModel):
+    """Passes calls through to ``inner`` and saves each answer under ``recordings_dir``."""
+
+    inner: BaseChatModel
+    recordings_dir: str
+
+    @property
+    def _llm_type(self) -> str:
+        return f"recording-{self.inner._llm_type}"
+
+    def _save(self, messages: List[BaseMessage], content: str) -> None:
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        path = os.path.join(self.recordings_dir, f"{prompt_key(messages)}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"content": content}, f, ensure_ascii=False)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self.inner.invoke(messages, stop=stop, **kwargs)
+        self._save(messages, message.text)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+        self._save(messages, message.text)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        content = ""
+        async for chunk in self.inner.astream(messages, stop=stop, **kwargs):
+            content += chunk.text
+            yield ChatGenerationChunk(message=chunk)
+        self._save(messages, content)
@@ -1,13 +1,25 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
-from app.models.prescription import Prescription
-from app.core.config import GEMINI_API_KEY, GEMINI_MODEL
-from loguru import logger
+"""Prompt, chat model and parser for the prescription chain.
 
-parser = JsonOutputParser(pydantic_object=Prescription)
+Nothing here is built at import time: LangChain and the Gemini client are
+imported on the first call to :func:`get_chain` (or :func:`aget_chain`), which
+the app's lifespan hook triggers in the background right after startup.
+"""
+import asyncio
+import threading
+from app.core.config import (
+    FAKE_LLM_FAILURE_RATE,
+    FAKE_LLM_LATENCY_MS,
+    FAKE_LLM_LATENCY_SIGMA,
+    FAKE_LLM_SEED,
+    FAKE_LLM_TOKENS_PER_SECOND,
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    LLM_BACKEND,
+    LLM_RECORDINGS_DIR,
+)
+from loguru import logger
 
-prompt = ChatPromptTemplate.from_template(
+PROMPT_TEMPLATE = (
     "You are a medical AI assistant. Given the following patient information, provide a diagnosis and a prescription.\n"
     "Patient Information:\n"
     "Name: {name}\n"
@@ -32,13 +44,120 @@ prompt = ChatPromptTemplate.from_template(
     "Do not include any disclaimers or statements indicating that the information is for educational purposes or requires physician confirmation."
 )
 
-logger.info("Initializing Gemini model")
+_components = None
+_init_lock = threading.Lock()
 
-llm = ChatGoogleGenerativeAI(
-    model=GEMINI_MODEL,
-    google_api_key=GEMINI_API_KEY
-)
 
-logger.info("Gemini Model initialized")
+def build_llm(backend: str = LLM_BACKEND):
+    if backend in ("fake", "replay"):
+        from app.core.fake_llm import FakePrescriptionLLM
+
+        logger.info(f"Using fake LLM backend ({backend})")
+        return FakePrescriptionLLM(
+            latency_ms=FAKE_LLM_LATENCY_MS,
+            latency_sigma=FAKE_LLM_LATENCY_SIGMA,
+            tokens_per_second=FAKE_LLM_TOKENS_PER_SECOND,
+            failure_rate=FAKE_LLM_FAILURE_RATE,
+            seed=FAKE_LLM_SEED,
+            recordings_dir=LLM_RECORDINGS_DIR if backend == "replay" else None,
+        )
+    if backend not in ("gemini", "record"):
+        raise ValueError(f"Unknown LLM_BACKEND: {backend}")
+    if not GEMINI_API_KEY:
+        raise EnvironmentError("GEMINI_API_KEY not set in environment")
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    logger.info("Initializing Gemini model")
+
+    gemini = ChatGoogleGenerativeAI(
+        model=GEMINI_MODEL,
+        google_api_key=GEMINI_API_KEY
+    )
+
+    logger.info("Gemini Model initialized")
+
+    if backend == "record":
+        from app.core.fake_llm import RecordingChatModel
+
+        logger.info(f"Recording LLM responses to {LLM_RECORDINGS_DIR}")
+        return RecordingChatModel(inner=gemini, recordings_dir=LLM_RECORDINGS_DIR)
+    return gemini
+
+
+def _build_components() -> dict:
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_core.messages.ai import add_usage
+    from langchain_core.runnables import RunnableGenerator, RunnableLambda
+    from app.core.metrics import record_token_usage
+    from app.core.resilience import upstream_policy
+    from app.models.prescription import Prescription
+
+    prompt = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
+    llm = build_llm()
+    parser = JsonOutputParser(pydantic_object=Prescription)
+
+    async def guarded_llm(messages):
+        message = await upstream_policy.call(lambda: llm.ainvoke(messages))
+        record_token_usage(message.usage_metadata)
+        return message
+
+    async def count_stream_tokens(chunks):
+        # Streamed chunks each carry their share of the usage (usually only the last one)
+        usage = None
+        try:
+            async for chunk in chunks:
+                if chunk.usage_metadata:
+                    usage = add_usage(usage, chunk.usage_metadata)
+                yield chunk
+        finally:
+            record_token_usage(usage)
+
+    # ``chain`` puts every model call behind the upstream policy (used by
+    # invoke/batch); ``stream_chain`` keeps token streaming and is guarded by
+    # upstream_policy.stream() in the service instead. Both count tokens.
+    guarded = RunnableLambda(llm.invoke, afunc=guarded_llm, name="guarded_llm")
+    counted = RunnableGenerator(count_stream_tokens, name="count_stream_tokens")
+    return {
+        "prompt": prompt,
+        "llm": llm,
+        "parser": parser,
+        "chain": prompt | guarded | parser,
+        "stream_chain": prompt | llm | counted | parser,
+    }
+
+
+def get_components() -> dict:
+    """Returns ``prompt``, ``llm``, ``parser``, ``chain`` and ``stream_chain``, building them once (thread-safe)."""
+    global _components
+    if _components is None:
+        with _init_lock:
+            if _components is None:
+                _components = _build_components()
+    return _components
+
+
+def get_chain():
+    return get_components()["chain"]
+
+
+async def aget_components() -> dict:
+    """Like :func:`get_components`, but builds off the event loop on first use."""
+    if _components is not None:
+        return _components
+    return await asyncio.to_thread(get_components)
+
+
+async def aget_chain():
+    return (await aget_components())["chain"]
+
+
+def is_initialized() -> bool:
+    return _components is not None
+
 
-chain = prompt | llm | parser
\ No newline at end of file
+async def warm_up() -> None:
+    """Sends a tiny prompt so the first real request finds an open HTTP/TLS connection."""
+    llm = (await aget_components())["llm"]
+    await llm.ainvoke("Reply with the single word OK.")
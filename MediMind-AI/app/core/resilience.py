@@ -0,0 +1,324 @@
+"""Deadlines, hedging, retries and a circuit breaker for upstream LLM calls.
+
+:class:`UpstreamPolicy.call` wraps a single model call:
+
+* the whole call, retries included, must finish within ``timeout`` seconds;
+* if an attempt has not answered by the configured percentile of recent
+  latencies, a second, hedged attempt is started and the first answer wins;
+* failures that look transient (timeouts, connection errors, 408/429/5xx) are
+  retried with full-jitter exponential backoff; everything else fails at once;
+* a :class:`CircuitBreaker` counts outcomes and, while the recent failure rate
+  is above the threshold, rejects calls immediately with
+  :class:`CircuitOpenError` instead of queueing them behind a failing upstream.
+
+Everything can be exercised offline with ``LLM_BACKEND=fake`` and
+``FAKE_LLM_FAILURE_RATE``/``FAKE_LLM_LATENCY_SIGMA``.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+from loguru import logger
+from app.core.config import (
+    CIRCUIT_FAILURE_RATE,
+    CIRCUIT_MIN_CALLS,
+    CIRCUIT_OPEN_SECONDS,
+    CIRCUIT_WINDOW_SECONDS,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_HEDGE_PERCENTILE,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY,
+    LLM_TIMEOUT,
+)
+from app.core.concurrency import ConcurrencyLimiter, llm_limiter
+from app.core.metrics import Counter, Gauge
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+retries_total = Counter("llm_retries_total", "Upstream LLM attempts that were retried.")
+hedges_total = Counter("llm_hedges_total", "Hedged second attempts started, by which attempt won.", labelnames=("winner",))
+rejections_total = Counter("llm_circuit_rejections_total", "Calls rejected while the circuit was open.")
+
+
+class UpstreamTimeoutError(Exception):
+    """The LLM call (including retries) did not finish before its deadline."""
+
+
+class CircuitOpenError(Exception):
+    """The upstream is failing; calls are rejected until ``retry_after`` passes."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Upstream temporarily unavailable, please retry later")
+        self.retry_after = retry_after
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether an exception (or one it was raised from) looks transient."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+            return True
+        status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+        if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+            return True
+        if type(exc).__module__.startswith(("httpx", "httpcore")) and type(exc).__name__.endswith(
+            ("TimeoutException", "ConnectError", "ReadError", "RemoteProtocolError", "ReadTimeout", "ConnectTimeout")
+        ):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies."""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self._samples) < 20:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Opens when the failure rate over the last ``window`` seconds exceeds ``failure_rate``.
+
+    After ``open_seconds`` it goes half-open and lets a single trial call
+    through; everyone else is still rejected. The trial's outcome closes it
+    (success) or re-opens it (failure). A trial that never reports back (e.g.
+    cancelled) is replaced by a new one after another ``open_seconds``.
+    """
+
+    def __init__(self, failure_rate: float, min_calls: int, window: float, open_seconds: float):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self._outcomes = deque()
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if self._probe_started is not None or self._remaining() <= 0 else "open"
+
+    def _remaining(self) -> float:
+        return self._opened_at + self.open_seconds - time.monotonic()
+
+    def check(self) -> None:
+        """Raises :class:`CircuitOpenError` if a call would be rejected right now.
+
+        Unlike :meth:`before_call` this never claims the half-open trial, so it
+        can be used to fail fast before queueing for a slot; the call itself
+        still goes through :meth:`before_call`.
+        """
+        if self._opened_at is None:
+            return
+        remaining = self._remaining()
+        if remaining > 0:
+            rejections_total.inc()
+            raise CircuitOpenError(remaining)
+        if self._probe_started is not None and time.monotonic() - self._probe_started < self.open_seconds:
+            # A trial call is already out; its outcome decides for everyone
+            rejections_total.inc()
+            raise CircuitOpenError(1.0)
+
+    def before_call(self) -> None:
+        self.check()
+        if self._opened_at is not None:
+            logger.info("Circuit breaker half-open, sending a trial call")
+            self._probe_started = time.monotonic()
+
+    def record(self, ok: bool) -> None:
+        now = time.monotonic()
+        if self._probe_started is not None:
+            if ok:
+                logger.info("Circuit breaker closed")
+                self._opened_at = None
+                self._outcomes.clear()
+            else:
+                logger.warning("Circuit breaker re-opened after failed probe")
+                self._opened_at = now
+            self._probe_started = None
+            return
+
+        self._outcomes.append((now, ok))
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+        failures = sum(1 for _, outcome in self._outcomes if not outcome)
+        if (
+            self._opened_at is None
+            and len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.failure_rate
+        ):
+            logger.warning(f"Circuit breaker opened: {failures}/{len(self._outcomes)} upstream calls failed")
+            self._opened_at = now
+
+
+class UpstreamPolicy:
+    def __init__(
+        self,
+        timeout: float,
+        max_retries: int,
+        retry_base_delay: float,
+        retry_max_delay: float,
+        hedge_percentile: float,
+        hedge_min_delay: float,
+        breaker: CircuitBreaker,
+        limiter: Optional[ConcurrencyLimiter] = None,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker
+        # Hedged attempts take a slot of their own, so hedging never exceeds the cap
+        self.limiter = limiter
+        self.latencies = LatencyTracker()
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is disabled."""
+        if self.hedge_percentile <= 0:
+            return None
+        observed = self.latencies.percentile(self.hedge_percentile)
+        return max(self.hedge_min_delay, observed) if observed is not None else self.hedge_min_delay
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs ``fn`` under the deadline, hedging, retry and circuit-breaker rules."""
+        self.breaker.before_call()
+        try:
+            return await asyncio.wait_for(self._with_retries(fn), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.breaker.record(False)
+            logger.warning(f"LLM call exceeded its {self.timeout}s deadline")
+            raise UpstreamTimeoutError(f"Upstream did not answer within {self.timeout:g}s")
+
+    async def _with_retries(self, fn):
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                result = await self._hedged(fn)
+            except Exception as e:
+                self.breaker.record(False)
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt)
+                attempt += 1
+                retries_total.inc()
+                logger.warning(f"Retryable LLM error ({e!r}); attempt {attempt + 1} in {delay:.2f}s")
+                self.breaker.before_call()
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record(True)
+            self.latencies.observe(time.monotonic() - started)
+            return result
+
+    async def _hedged(self, fn):
+        delay = self.hedge_delay()
+        first = asyncio.ensure_future(fn())
+        if delay is None:
+            return await first
+
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return first.result()
+
+            if self.limiter is not None and not await self.limiter.try_acquire():
+                logger.info(f"No LLM answer after {delay:.2f}s, but no free slot to hedge with")
+                return await first
+
+            logger.info(f"No LLM answer after {delay:.2f}s, sending hedged request")
+            second = asyncio.ensure_future(self._in_slot(fn) if self.limiter is not None else fn())
+            tasks.add(second)
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        hedges_total.inc(winner="hedge" if task is second else "primary")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _in_slot(self, fn):
+        try:
+            return await fn()
+        finally:
+            self.limiter.release()
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Streams under the deadline and breaker; retries only before the first chunk."""
+        self.breaker.before_call()
+        deadline = time.monotonic() + self.timeout
+        attempt = 0
+        while True:
+            iterator = open_stream().__aiter__()
+            started = False
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    started = True
+                    yield chunk
+            except asyncio.TimeoutError:
+                self.breaker.record(False)
+                raise UpstreamTimeoutError(f"Upstream did not answer within {self.timeout:g}s")
+            except Exception as e:
+                self.breaker.record(False)
+                if started or attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                attempt += 1
+                retries_total.inc()
+                self.breaker.before_call()
+                await asyncio.sleep(min(self.backoff(attempt - 1), max(0.0, deadline - time.monotonic())))
+                continue
+            finally:
+                aclose = getattr(iterator, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+            self.breaker.record(True)
+            return
+
+
+upstream_policy = UpstreamPolicy(
+    timeout=LLM_TIMEOUT,
+    max_retries=LLM_MAX_RETRIES,
+    retry_base_delay=LLM_RETRY_BASE_DELAY,
+    retry_max_delay=LLM_RETRY_MAX_DELAY,
+    hedge_percentile=LLM_HEDGE_PERCENTILE,
+    hedge_min_delay=LLM_HEDGE_MIN_DELAY,
+    breaker=CircuitBreaker(CIRCUIT_FAILURE_RATE, CIRCUIT_MIN_CALLS, CIRCUIT_WINDOW_SECONDS, CIRCUIT_OPEN_SECONDS),
+    limiter=llm_limiter,
+)
+
+Gauge(
+    "llm_circuit_open",
+    "1 while the upstream circuit breaker rejects calls, 0 otherwise.",
+    lambda: 1 if upstream_policy.breaker.state == "open" else 0,
+)
@@ -1,8 +1,42 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from app.core.config import LLM_EAGER_INIT, LLM_WARMUP
+from app.core.llm import aget_chain, warm_up
+from app.core.metrics import errors_total, request_seconds, server_timing_header, start_request_timings
+from app.routes.metrics import router as metrics_router
 from app.routes.prescription import router
+from app.services.prescription import validation_error_message
 from loguru import logger
-app = FastAPI(title="Prescription Generator AI")
+
+
+async def _initialize_llm():
+    try:
+        await aget_chain()
+        logger.info("LLM chain ready")
+        if LLM_WARMUP:
+            await warm_up()
+            logger.info("LLM warm-up request completed")
+    except Exception:
+        logger.exception("LLM initialization failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Initialization runs in the background so the server starts accepting
+    # connections (and answering liveness probes) immediately.
+    task = asyncio.create_task(_initialize_llm()) if LLM_EAGER_INIT or LLM_WARMUP else None
+    logger.info("AI Service started")
+    yield
+    if task is not None and not task.done():
+        task.cancel()
+
+
+app = FastAPI(title="Prescription Generator AI", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,6 +46,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(router)
 
-logger.info("AI Service started")
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    timings = start_request_timings()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else "unmatched"
+    request_seconds.observe(elapsed, endpoint=endpoint, status=response.status_code)
+    response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+
+@app.exception_handler(RequestValidationError)
+async def request_validation_error(request: Request, exc: RequestValidationError):
+    # Keep the service's historical 400 {"error": ...} contract instead of 422.
+    message = validation_error_message(exc.errors())
+    logger.warning(f"Invalid request: {message}")
+    errors_total.inc(type="InvalidJSON" if message == "Invalid JSON" else "ValidationError")
+    return ORJSONResponse(content={"error": message}, status_code=400)
+
+
+app.include_router(router)
+app.include_router(metrics_router)
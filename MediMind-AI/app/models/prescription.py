@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
 
 
 class PrescriptionItem(BaseModel):
@@ -14,3 +14,17 @@ class Prescription(BaseModel):
     prescription_items: List[PrescriptionItem] = Field(
         description="List of prescribed medicines"
     )
+
+
+class PrescriptionRequest(BaseModel):
+    """Patient intake sent to the generator; mirrors the backend ``Patient`` plus symptoms."""
+
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    name: str = Field(min_length=1, max_length=100, description="Patient name")
+    age: int = Field(ge=0, le=150, description="Age in years")
+    gender: str = Field(min_length=1, max_length=10, description="Male, Female or Other")
+    # The backend sends null for patients without allergies or history
+    allergies: Optional[str] = Field(default=None, max_length=2000, description="Known allergies, if any")
+    medical_history: Optional[str] = Field(default=None, max_length=4000, description="Relevant medical history, if any")
+    symptoms: str = Field(min_length=1, max_length=4000, description="Presenting symptoms")
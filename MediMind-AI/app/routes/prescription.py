@@ -1,32 +1,125 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
-from app.services.prescription import generate_prescription_service
+import math
+from typing import Any, List
+import orjson
+from fastapi import APIRouter, Body, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from app.core.concurrency import LLMBusyError, llm_limiter
+from app.core.llm import is_initialized
+from app.core.metrics import errors_total, timed_stage
+from app.core.resilience import CircuitOpenError, UpstreamTimeoutError
+from app.models.prescription import Prescription, PrescriptionRequest
+from app.services.prescription import (
+    generate_prescription_service,
+    generate_prescriptions_batch_service,
+    stream_prescription_service,
+)
 from loguru import logger
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+def _use_cache(request: Request) -> bool:
+    return (
+        request.query_params.get("no_cache", "").lower() not in ("1", "true", "yes")
+        and "no-cache" not in request.headers.get("cache-control", "").lower()
+    )
+
+def _busy_response(e: LLMBusyError) -> ORJSONResponse:
+    errors_total.inc(type="LLMBusyError")
+    return ORJSONResponse(
+        content={"error": str(e)},
+        status_code=503,
+        headers={"Retry-After": str(max(1, round(llm_limiter.queue_timeout)))},
+    )
+
+def _error_response(e: Exception) -> ORJSONResponse:
+    if isinstance(e, LLMBusyError):
+        return _busy_response(e)
+    if isinstance(e, CircuitOpenError):
+        errors_total.inc(type="CircuitOpenError")
+        return ORJSONResponse(
+            content={"error": str(e)},
+            status_code=503,
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    if isinstance(e, UpstreamTimeoutError):
+        errors_total.inc(type="UpstreamTimeoutError")
+        return ORJSONResponse(content={"error": str(e)}, status_code=504)
+    if isinstance(e, ValueError):
+        errors_total.inc(type="ValueError")
+        return ORJSONResponse(content={"error": str(e)}, status_code=400)
+    logger.opt(exception=e).error("Internal server error")
+    errors_total.inc(type=type(e).__name__)
+    return ORJSONResponse(content={"error": "Internal server error"}, status_code=500)
 
 @router.get("/health")
-def health():
+@router.get("/health/live")
+async def health():
     return {"status": "ok"}
 
-@router.post("/generate_prescription")
-async def generate_prescription(request: Request):
+@router.get("/health/ready")
+async def ready():
+    if not is_initialized():
+        return ORJSONResponse(content={"status": "starting"}, status_code=503)
+    return {"status": "ready", "in_flight": llm_limiter.in_flight, "waiting": llm_limiter.waiting}
+
+@router.post("/generate_prescription", response_model=Prescription)
+async def generate_prescription(payload: PrescriptionRequest, request: Request):
     logger.info("Received /generate_prescription request")
+    logger.debug(f"Payload: {payload}")
+
+    try:
+        result, cache_status = await generate_prescription_service(payload, use_cache=_use_cache(request))
+    except Exception as e:
+        return _error_response(e)
+
+    with timed_stage("serialize"):
+        return ORJSONResponse(content=result.model_dump(), headers={"X-Cache": cache_status})
 
+def _format_event(event: dict, sse: bool) -> bytes:
+    if sse:
+        return b"event: " + event["event"].encode() + b"\ndata: " + orjson.dumps(event) + b"\n\n"
+    return orjson.dumps(event) + b"\n"
+
+@router.post("/generate_prescription/stream")
+async def generate_prescription_stream(payload: PrescriptionRequest, request: Request):
+    logger.info("Received /generate_prescription/stream request")
+    logger.debug(f"Payload: {payload}")
+
+    sse = (
+        request.query_params.get("format") == "sse"
+        or "text/event-stream" in request.headers.get("accept", "")
+    )
+    events = stream_prescription_service(payload, use_cache=_use_cache(request))
+
+    # Pull the "start" event eagerly so that a full limiter still gets a
+    # proper status code instead of a broken stream.
     try:
-        data = await request.json()
-        logger.debug(f"Payload: {data}")
+        first = await events.__anext__()
     except Exception as e:
-        logger.warning(f"Invalid JSON: {e}")
-        return JSONResponse(content={"error": "Invalid JSON"}, status_code=400)
+        return _error_response(e)
+
+    async def body():
+        try:
+            yield _format_event(first, sse)
+            async for event in events:
+                yield _format_event(event, sse)
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"X-Cache": first["cache"], "Cache-Control": "no-store"},
+    )
+
+@router.post("/generate_prescriptions/batch")
+async def generate_prescriptions_batch(request: Request, items: List[Any] = Body(...)):
+    logger.info("Received /generate_prescriptions/batch request")
 
     try:
-        result = generate_prescription_service(data)
-        return JSONResponse(
-            content=result.dict() if hasattr(result, "dict") else result
-        )
-    except ValueError as e:
-        return JSONResponse(content={"error": str(e)}, status_code=400)
-    except Exception:
-        logger.exception("Internal server error")
-        return JSONResponse(content={"error": "Internal server error"}, status_code=500)
+        results = await generate_prescriptions_batch_service(items, use_cache=_use_cache(request))
+    except Exception as e:
+        return _error_response(e)
+
+    with timed_stage("serialize"):
+        return ORJSONResponse(content={"results": results})
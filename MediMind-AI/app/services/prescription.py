@@ -1,24 +1,248 @@
-from app.core.llm import chain
+import asyncio
+from app.core.llm import aget_chain, aget_components
+from app.core.metrics import cache_requests_total, errors_total, record_token_usage, timed_stage
+from app.core.config import BATCH_MAX_CONCURRENCY, BATCH_MAX_ITEMS
+from app.core.cache import cache_key, response_cache
+from app.core.concurrency import llm_limiter
+from app.core.resilience import CircuitOpenError, UpstreamTimeoutError, upstream_policy
+from app.core.singleflight import inflight
+from app.models.prescription import Prescription, PrescriptionRequest
 from loguru import logger
+from pydantic import ValidationError
 
 
-REQUIRED_FIELDS = [
-    "name",
-    "age",
-    "gender",
-    "allergies",
-    "medical_history",
-    "symptoms",
-]
+def validation_error_message(errors: list) -> str:
+    """Collapses pydantic errors into the service's short error strings."""
+    if any(error["type"] == "json_invalid" for error in errors):
+        return "Invalid JSON"
+    if any(error["type"] == "missing" for error in errors):
+        return "Missing required fields"
+    field = ".".join(str(part) for part in errors[0]["loc"] if part != "body")
+    return f"{field}: {errors[0]['msg']}" if field else errors[0]["msg"]
 
 
-def generate_prescription_service(data: dict):
-    if not all(field in data for field in REQUIRED_FIELDS):
-        logger.warning("Missing required fields")
-        raise ValueError("Missing required fields")
+def _to_prescription(output) -> Prescription:
+    with timed_stage("validate"):
+        return Prescription.model_validate(output)
 
-    logger.info("Invoking LLM chain")
-    result = chain.invoke(data)
-    logger.info("LLM invocation successful")
+
+async def _invoke_chain(data: dict, key: str) -> Prescription:
+    # Runs the chain's three steps one by one so each can be timed.
+    components = await aget_components()
+    async with llm_limiter.slot():
+        with timed_stage("prompt"):
+            messages = await components["prompt"].ainvoke(data)
+        logger.info("Invoking LLM chain")
+        with timed_stage("llm"):
+            message = await upstream_policy.call(lambda: components["llm"].ainvoke(messages))
+        logger.info("LLM invocation successful")
+    record_token_usage(getattr(message, "usage_metadata", None))
+    with timed_stage("parse"):
+        output = await components["parser"].ainvoke(message)
+    result = _to_prescription(output)
+
+    if response_cache is not None:
+        await response_cache.set(key, result.model_dump())
 
     return result
+
+
+async def generate_prescription_service(payload: PrescriptionRequest, use_cache: bool = True):
+    """Returns the validated prescription and the cache status (HIT, MISS or BYPASS)."""
+    data = payload.model_dump()
+    key = cache_key(data)
+    if response_cache is not None and use_cache:
+        cached = await response_cache.get(key)
+        if cached is not None:
+            logger.info("Serving prescription from cache")
+            cache_requests_total.inc(result="HIT")
+            return _to_prescription(cached), "HIT"
+
+    cache_requests_total.inc(result="MISS" if use_cache else "BYPASS")
+    if inflight.in_flight(key):
+        logger.info("Identical generation already in flight, waiting for its result")
+    result = await inflight.do(key, lambda: _invoke_chain(data, key))
+
+    return result, "MISS" if use_cache else "BYPASS"
+
+
+def _completed_events(partial: dict, emitted: dict, final: bool = False):
+    """Yields the events for parts of a partial prescription that can no longer change.
+
+    ``JsonOutputParser`` streams ever-growing snapshots of the document. A field
+    is complete once a later key has started, and an item once the next item
+    has started; at the end of the stream everything left is complete.
+    """
+    keys = list(partial)
+    for position, field in enumerate(keys):
+        if field == "prescription_items" or field in emitted["fields"]:
+            continue
+        if final or position + 1 < len(keys):
+            emitted["fields"].add(field)
+            yield {"event": field, "data": partial[field]}
+
+    items = partial.get("prescription_items") or []
+    ready = len(items) if final else len(items) - 1
+    while emitted["items"] < ready:
+        index = emitted["items"]
+        emitted["items"] += 1
+        yield {"event": "item", "index": index, "data": items[index]}
+
+
+async def _pump_stream(chain, data: dict, queue: asyncio.Queue) -> None:
+    """Reads the upstream stream into ``queue`` while holding an LLM slot.
+
+    The slot is given back as soon as the upstream stream ends rather than when
+    the client has read the last event. Puts ``("start", None)`` once the slot
+    is held, ``("chunk", partial)`` per parsed snapshot and ``("end", None)``
+    at the end; a failure is put as ``("error", exception)`` instead.
+    """
+    try:
+        async with llm_limiter.slot():
+            queue.put_nowait(("start", None))
+            logger.info("Streaming LLM chain")
+            with timed_stage("llm"):
+                async for chunk in upstream_policy.stream(lambda: chain.astream(data)):
+                    if isinstance(chunk, dict):
+                        queue.put_nowait(("chunk", chunk))
+        logger.info("LLM stream finished")
+        queue.put_nowait(("end", None))
+    except Exception as e:
+        queue.put_nowait(("error", e))
+
+
+async def stream_prescription_service(payload: PrescriptionRequest, use_cache: bool = True):
+    """Async generator of prescription events, in document order.
+
+    Emits ``start``, then ``diagnosis``/``notes`` and one ``item`` per
+    prescription item as soon as each is complete, then a final
+    ``prescription`` event with the whole document. Upstream failures after
+    ``start`` arrive as an ``error`` event.
+    """
+    data = payload.model_dump()
+    key = cache_key(data)
+    if response_cache is not None and use_cache:
+        cached = await response_cache.get(key)
+        if cached is not None:
+            logger.info("Serving prescription stream from cache")
+            cache_requests_total.inc(result="HIT")
+            yield {"event": "start", "cache": "HIT"}
+            for event in _completed_events(cached, {"fields": set(), "items": 0}, final=True):
+                yield event
+            yield {"event": "prescription", "data": cached}
+            return
+
+    cache_requests_total.inc(result="MISS" if use_cache else "BYPASS")
+    chain = (await aget_components())["stream_chain"]
+    # Fail fast while the circuit is open; upstream_policy.stream() claims a half-open trial itself
+    upstream_policy.breaker.check()
+    queue = asyncio.Queue()
+    producer = asyncio.ensure_future(_pump_stream(chain, data, queue))
+    try:
+        kind, value = await queue.get()
+        if kind == "error":
+            raise value  # no LLM slot, before anything was sent
+        yield {"event": "start", "cache": "MISS" if use_cache else "BYPASS"}
+
+        emitted = {"fields": set(), "items": 0}
+        partial = {}
+        while True:
+            kind, value = await queue.get()
+            if kind == "end":
+                break
+            if kind == "error":
+                e = value
+                if isinstance(e, (CircuitOpenError, UpstreamTimeoutError)):
+                    logger.warning(f"LLM stream failed: {e}")
+                    message = str(e)
+                else:
+                    logger.opt(exception=e).error("LLM stream failed")
+                    message = "Internal server error"
+                errors_total.inc(type=type(e).__name__)
+                yield {"event": "error", "data": {"error": message}}
+                return
+            partial = value
+            for event in _completed_events(partial, emitted):
+                yield event
+    finally:
+        # The client may go away mid-stream: stop reading upstream and free the slot.
+        producer.cancel()
+
+    for event in _completed_events(partial, emitted, final=True):
+        yield event
+    try:
+        result = _to_prescription(partial).model_dump()
+    except ValidationError:
+        logger.exception("LLM stream did not produce a valid prescription")
+        errors_total.inc(type="ValidationError")
+        yield {"event": "error", "data": {"error": "Internal server error"}}
+        return
+    if response_cache is not None:
+        await response_cache.set(key, result)
+    yield {"event": "prescription", "data": result}
+
+
+async def generate_prescriptions_batch_service(items: list, use_cache: bool = True):
+    """Generates a prescription per payload, preserving order.
+
+    Each entry of the returned list is either ``{"index", "cache", "prescription"}``
+    or ``{"index", "error"}``; a bad or failed item never fails the whole batch.
+    Duplicate payloads in one batch are sent upstream once.
+    """
+    if not items:
+        raise ValueError("Batch must contain at least one item")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f"Batch may contain at most {BATCH_MAX_ITEMS} items")
+
+    results = [None] * len(items)
+    pending = {}
+    for index, item in enumerate(items):
+        try:
+            data = PrescriptionRequest.model_validate(item).model_dump()
+        except ValidationError as e:
+            errors_total.inc(type="ValidationError")
+            results[index] = {"index": index, "error": validation_error_message(e.errors())}
+            continue
+
+        key = cache_key(data)
+        cached = await response_cache.get(key) if response_cache is not None and use_cache else None
+        if cached is not None:
+            cache_requests_total.inc(result="HIT")
+            results[index] = {"index": index, "cache": "HIT", "prescription": cached}
+            continue
+
+        pending.setdefault(key, (data, []))[1].append(index)
+
+    if pending:
+        keys = list(pending)
+        concurrency = min(BATCH_MAX_CONCURRENCY, len(keys))
+        chain = await aget_chain()
+        upstream_policy.breaker.check()
+        cache_requests_total.inc(len(keys), result="MISS" if use_cache else "BYPASS")
+        async with llm_limiter.slot(concurrency):
+            logger.info(f"Invoking LLM chain for batch of {len(keys)}")
+            with timed_stage("llm"):
+                outputs = await chain.abatch(
+                    [pending[key][0] for key in keys],
+                    config={"max_concurrency": concurrency},
+                    return_exceptions=True,
+                )
+
+        for key, output in zip(keys, outputs):
+            if not isinstance(output, Exception):
+                try:
+                    output = _to_prescription(output).model_dump()
+                except ValidationError as e:
+                    output = e
+            if isinstance(output, Exception):
+                logger.warning(f"Batch item failed: {output!r}")
+                errors_total.inc(type=type(output).__name__)
+                entry = {"error": "Generation failed"}
+            else:
+                if response_cache is not None:
+                    await response_cache.set(key, output)
+                entry = {"cache": "MISS" if use_cache else "BYPASS", "prescription": output}
+            for index in pending[key][1]:
+                results[index] = {"index": index, **entry}
+
+    return results
@@ -0,0 +1,66 @@
+"""Import-time budget check for the AI service.
+
+Fails (exit code 1) if ``import app.main`` takes longer than the budget, or if
+it drags in modules that are meant to load lazily on first use:
+
+    python -m benchmarks.import_time --budget-ms 800
+
+The time reported is the best of ``--runs`` fresh interpreters, minus the
+interpreter's own start-up, so it is stable enough to run in CI.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Top-level packages that must not be imported by app.main.
+LAZY_PACKAGES = ("langchain", "langchain_core", "langchain_google_genai", "google", "langsmith")
+
+_PROBE = (
+    "import json, sys; import app.main; "
+    "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules})))"
+)
+
+
+def _best_time(code, runs, env):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, env=env, capture_output=True)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    args.add_argument("--budget-ms", type=float, default=800, help="Maximum allowed import time")
+    args.add_argument("--runs", type=int, default=5)
+    opts = args.parse_args(argv)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root, "LLM_EAGER_INIT": "false"}
+
+    baseline = _best_time("pass", opts.runs, env)
+    total = _best_time("import app.main", opts.runs, env)
+    import_ms = (total - baseline) * 1000
+
+    probe = subprocess.run([sys.executable, "-c", _PROBE], check=True, env=env, capture_output=True, text=True)
+    loaded = set(json.loads(probe.stdout.strip().splitlines()[-1]))
+    eager = sorted(loaded.intersection(LAZY_PACKAGES))
+
+    print(f"import app.main: {import_ms:.0f} ms (budget {opts.budget_ms:.0f} ms)")
+    failed = False
+    if import_ms > opts.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    if eager:
+        print(f"FAIL: imported at startup instead of lazily: {', '.join(eager)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Load test and stage breakdown for the prescription API.
+
+Runs against the fake LLM backend by default, so it needs no Gemini key:
+
+    python -m benchmarks.load_test --concurrency 1,8,32,64 --requests 200
+
+Each concurrency level sends ``--requests`` POSTs to /generate_prescription
+with unique payloads (so neither the cache nor request coalescing kicks in)
+and reports p50/p95/p99 latency and throughput. A second pass times the chain
+stages - prompt rendering, LLM call and JSON parsing - in-process.
+
+Pass ``--url`` to drive a running server instead of the in-process app; the
+backend is then whatever that server was started with.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "800")
+os.environ.setdefault("FAKE_LLM_LATENCY_SIGMA", "0.4")
+os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", "400")
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+import httpx
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples):
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 1),
+        "p95_ms": round(percentile(samples, 95) * 1000, 1),
+        "p99_ms": round(percentile(samples, 99) * 1000, 1),
+    }
+
+
+def payload(i):
+    return {
+        "name": f"Load Test {i}",
+        "age": 20 + i % 60,
+        "gender": "Female" if i % 2 else "Male",
+        "allergies": "none",
+        "medical_history": "none",
+        "symptoms": f"fever and sore throat for {i % 7 + 1} days (case {i})",
+    }
+
+
+async def run_level(client, concurrency, total):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await client.post("/generate_prescription", json=payload(i + concurrency * total))
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 2),
+        **summarize(latencies),
+    }
+
+
+async def run_stages(samples):
+    from app.core.llm import get_components
+
+    components = get_components()
+    prompt, llm, parser = components["prompt"], components["llm"], components["parser"]
+
+    stages = {"prompt_render": [], "llm": [], "parse": []}
+    for i in range(samples):
+        started = time.perf_counter()
+        messages = await prompt.ainvoke(payload(i))
+        rendered = time.perf_counter()
+        message = await llm.ainvoke(messages)
+        answered = time.perf_counter()
+        await parser.ainvoke(message)
+        parsed = time.perf_counter()
+
+        stages["prompt_render"].append(rendered - started)
+        stages["llm"].append(answered - rendered)
+        stages["parse"].append(parsed - answered)
+
+    return {name: summarize(values) for name, values in stages.items()}
+
+
+async def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    args.add_argument("--url", help="Base URL of a running server (default: in-process app)")
+    args.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    args.add_argument("--requests", type=int, default=100, help="Requests per concurrency level")
+    args.add_argument("--stage-samples", type=int, default=20, help="Samples for the stage breakdown (0 to skip)")
+    args.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    opts = args.parse_args(argv)
+
+    if opts.url:
+        client = httpx.AsyncClient(base_url=opts.url, timeout=120)
+    else:
+        from app.main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+
+    report = {"backend": os.environ["LLM_BACKEND"] if not opts.url else "remote", "levels": []}
+    async with client:
+        for concurrency in (int(c) for c in opts.concurrency.split(",")):
+            level = await run_level(client, concurrency, opts.requests)
+            report["levels"].append(level)
+            print(
+                f"c={level['concurrency']:<4} n={level['requests']:<5} err={level['errors']:<3} "
+                f"{level['throughput_rps']:>8} req/s  p50={level['p50_ms']}ms  "
+                f"p95={level['p95_ms']}ms  p99={level['p99_ms']}ms"
+            )
+
+    if opts.stage_samples and not opts.url:
+        report["stages"] = await run_stages(opts.stage_samples)
+        for name, stats in report["stages"].items():
+            print(f"{name:<14} p50={stats['p50_ms']}ms  p95={stats['p95_ms']}ms  p99={stats['p99_ms']}ms")
+
+    if opts.json_path:
+        with open(opts.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return report
+
+
+if __name__ == "__main__":
+    from loguru import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""Microbenchmark of request validation and response serialization.
+
+Compares the old untyped path (``json.loads`` + key checks, ``JSONResponse``
+of a dict) with the typed one (``PrescriptionRequest``, a validated
+``Prescription`` rendered through ``ORJSONResponse``):
+
+    python -m benchmarks.serialization --iterations 20000
+"""
+import argparse
+import json
+import timeit
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.models.prescription import Prescription, PrescriptionRequest
+
+REQUEST = json.dumps({
+    "name": "Alex Doe",
+    "age": 34,
+    "gender": "Male",
+    "allergies": "penicillin",
+    "medical_history": "asthma",
+    "symptoms": "fever, sore throat and dry cough for three days",
+}).encode()
+
+RESPONSE = {
+    "diagnosis": "Acute viral pharyngitis",
+    "notes": "Rest, fluids, and review in 5 days if symptoms persist.",
+    "prescription_items": [
+        {"medicine": f"Medicine {i}", "dosage": "500 mg", "instructions": "Twice daily after food for 5 days"}
+        for i in range(5)
+    ],
+}
+
+REQUIRED_FIELDS = ["name", "age", "gender", "allergies", "medical_history", "symptoms"]
+
+
+def untyped_request():
+    data = json.loads(REQUEST)
+    return all(field in data for field in REQUIRED_FIELDS)
+
+
+def typed_request():
+    return PrescriptionRequest.model_validate_json(REQUEST)
+
+
+def untyped_response():
+    return JSONResponse(content=RESPONSE).body
+
+
+def typed_response():
+    return ORJSONResponse(content=Prescription.model_validate(RESPONSE).model_dump()).body
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    args.add_argument("--iterations", type=int, default=20000)
+    opts = args.parse_args(argv)
+
+    for name, fn in [
+        ("request: json.loads + key check", untyped_request),
+        ("request: PrescriptionRequest", typed_request),
+        ("response: JSONResponse(dict)", untyped_response),
+        ("response: Prescription + ORJSONResponse", typed_response),
+    ]:
+        best = min(timeit.repeat(fn, number=opts.iterations, repeat=3))
+        print(f"{name:<42} {best / opts.iterations * 1e6:8.2f} us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+
+# Tests never call Gemini: the offline fake answers instantly, and nothing is cached
+# between tests unless a test builds its own cache
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "0")
+os.environ.setdefault("CACHE_BACKEND", "none")
+os.environ.setdefault("LLM_EAGER_INIT", "false")
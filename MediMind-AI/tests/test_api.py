@@ -0,0 +1,38 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+PAYLOAD = {
+    "name": "Asha", "age": 34, "gender": "Female", "allergies": "Penicillin",
+    "medical_history": "Asthma", "symptoms": "Fever and sore throat",
+}
+
+
+class GeneratePrescriptionTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+
+    def test_generates_prescription(self):
+        response = self.client.post("/generate_prescription", json=PAYLOAD)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("diagnosis", response.json())
+
+    def test_accepts_null_allergies_and_history(self):
+        # What the backend sends for a patient without them
+        payload = {**PAYLOAD, "allergies": None, "medical_history": None}
+        response = self.client.post("/generate_prescription", json=payload)
+        self.assertEqual(response.status_code, 200, response.text)
+
+        payload = {key: value for key, value in PAYLOAD.items() if key not in ("allergies", "medical_history")}
+        self.assertEqual(self.client.post("/generate_prescription", json=payload).status_code, 200)
+
+    def test_rejects_invalid_payloads(self):
+        response = self.client.post("/generate_prescription", json={**PAYLOAD, "allergies": 5})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "allergies: Input should be a valid string"})
+
+        response = self.client.post("/generate_prescription", json={"name": "Asha"})
+        self.assertEqual(response.json(), {"error": "Missing required fields"})
@@ -0,0 +1,127 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+from langchain_core.runnables import RunnableLambda
+
+from app.core.concurrency import llm_limiter
+from app.main import app
+from app.services import prescription as service
+
+PAYLOAD = {
+    "name": "Asha", "age": 34, "gender": "Female", "allergies": "None",
+    "medical_history": "None", "symptoms": "Fever and sore throat",
+}
+
+
+def payload(name):
+    return {**PAYLOAD, "name": name}
+
+
+class RecordingChain:
+    """Chain stand-in that records each upstream call and how many overlap."""
+
+    def __init__(self, delay=0.0, fail_for=()):
+        self.delay = delay
+        self.fail_for = set(fail_for)
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+
+    async def invoke(self, data):
+        self.calls.append(data["name"])
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if data["name"] in self.fail_for:
+            raise RuntimeError("upstream failed")
+        return {"diagnosis": f"Diagnosis for {data['name']}", "notes": "Rest", "prescription_items": []}
+
+    def runnable(self):
+        return RunnableLambda(lambda data: data, afunc=self.invoke)
+
+
+class BatchServiceTests(unittest.IsolatedAsyncioTestCase):
+    def use_chain(self, chain):
+        patcher = mock.patch.object(service, "aget_chain", mock.AsyncMock(return_value=chain.runnable()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_results_keep_order_with_per_item_errors(self):
+        chain = RecordingChain(fail_for={"Broken"})
+        self.use_chain(chain)
+        items = [payload("Asha"), {"name": "Incomplete"}, payload("Broken"), payload("Ravi")]
+        results = await service.generate_prescriptions_batch_service(items, use_cache=False)
+
+        self.assertEqual([result["index"] for result in results], [0, 1, 2, 3])
+        self.assertEqual(results[0]["prescription"]["diagnosis"], "Diagnosis for Asha")
+        self.assertEqual(results[1], {"index": 1, "error": "Missing required fields"})
+        self.assertEqual(results[2], {"index": 2, "error": "Generation failed"})
+        self.assertEqual(results[3]["prescription"]["diagnosis"], "Diagnosis for Ravi")
+        self.assertEqual(results[3]["cache"], "BYPASS")
+
+    async def test_duplicate_payloads_are_sent_upstream_once(self):
+        chain = RecordingChain()
+        self.use_chain(chain)
+        items = [payload("Asha"), payload("Ravi"), payload("Asha"), payload("Asha")]
+        results = await service.generate_prescriptions_batch_service(items, use_cache=False)
+
+        self.assertEqual(sorted(chain.calls), ["Asha", "Ravi"])
+        self.assertEqual([result["index"] for result in results], [0, 1, 2, 3])
+        for index in (2, 3):
+            self.assertEqual(results[index]["prescription"], results[0]["prescription"])
+
+    async def test_max_concurrency_is_respected(self):
+        chain = RecordingChain(delay=0.02)
+        self.use_chain(chain)
+        in_flight = []
+
+        async def watch():
+            while True:
+                in_flight.append(llm_limiter.in_flight)
+                await asyncio.sleep(0.005)
+
+        watcher = asyncio.ensure_future(watch())
+        with mock.patch.object(service, "BATCH_MAX_CONCURRENCY", 2):
+            items = [payload(f"Patient {n}") for n in range(6)]
+            results = await service.generate_prescriptions_batch_service(items, use_cache=False)
+        watcher.cancel()
+
+        self.assertTrue(all("prescription" in result for result in results))
+        self.assertEqual(len(chain.calls), 6)
+        self.assertEqual(chain.peak, 2)
+        self.assertEqual(max(in_flight), 2)
+
+    async def test_empty_and_oversized_batches_are_rejected(self):
+        with self.assertRaises(ValueError):
+            await service.generate_prescriptions_batch_service([], use_cache=False)
+        with mock.patch.object(service, "BATCH_MAX_ITEMS", 2):
+            with self.assertRaises(ValueError):
+                await service.generate_prescriptions_batch_service([PAYLOAD] * 3, use_cache=False)
+
+
+class BatchRouteTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+
+    def test_returns_results(self):
+        response = self.client.post("/generate_prescriptions/batch", json=[PAYLOAD, {"name": "x"}])
+        self.assertEqual(response.status_code, 200, response.text)
+        results = response.json()["results"]
+        self.assertIn("prescription", results[0])
+        self.assertIn("error", results[1])
+
+    def test_rejects_more_than_max_items(self):
+        with mock.patch.object(service, "BATCH_MAX_ITEMS", 2):
+            response = self.client.post("/generate_prescriptions/batch", json=[PAYLOAD] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Batch may contain at most 2 items"})
+
+    def test_rejects_empty_and_non_array_bodies(self):
+        self.assertEqual(self.client.post("/generate_prescriptions/batch", json=[]).status_code, 400)
+        self.assertEqual(self.client.post("/generate_prescriptions/batch", json={"items": []}).status_code, 400)
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from app.core import cache
+from app.core.cache import MemoryCache, SQLiteCache
+
+
+class SQLiteCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cache.sqlite3")
+        self.cache = SQLiteCache(self.path, max_entries=2, ttl=60)
+
+    def accessed_at(self, key):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute("SELECT accessed_at FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+    async def test_round_trip_and_expiry(self):
+        await self.cache.set("a", {"diagnosis": "Flu"})
+        self.assertEqual(await self.cache.get("a"), {"diagnosis": "Flu"})
+        self.assertIsNone(await self.cache.get("missing"))
+
+        expired = SQLiteCache(self.path, max_entries=2, ttl=-1)
+        await expired.set("b", {"diagnosis": "Cold"})
+        self.assertIsNone(await expired.get("b"))
+
+    async def test_hits_do_not_write_until_the_next_set(self):
+        await self.cache.set("a", {"n": 1})
+        await self.cache.set("b", {"n": 2})
+        before = self.accessed_at("a")
+        await self.cache.get("a")
+        self.assertEqual(self.accessed_at("a"), before)
+
+        # The pending touch makes "a" more recent than "b", so "b" is evicted
+        await self.cache.set("c", {"n": 3})
+        self.assertEqual(await self.cache.get("a"), {"n": 1})
+        self.assertIsNone(await self.cache.get("b"))
+        self.assertEqual(await self.cache.get("c"), {"n": 3})
+
+    async def test_touches_are_flushed_in_batches(self):
+        await self.cache.set("a", {"n": 1})
+        before = self.accessed_at("a")
+        with mock.patch.object(cache, "TOUCH_BATCH", 2):
+            await self.cache.get("a")
+            await self.cache.set("b", {"n": 2})
+            await self.cache.get("a")
+            await self.cache.get("b")
+        self.assertGreater(self.accessed_at("a"), before)
+        self.assertEqual(self.cache._touched, {})
+
+
+class MemoryCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def test_lru_eviction(self):
+        memory = MemoryCache(max_entries=2, ttl=60)
+        await memory.set("a", {"n": 1})
+        await memory.set("b", {"n": 2})
+        await memory.get("a")
+        await memory.set("c", {"n": 3})
+        self.assertIsNone(await memory.get("b"))
+        self.assertEqual(await memory.get("a"), {"n": 1})
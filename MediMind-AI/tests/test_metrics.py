@@ -0,0 +1,59 @@
+import unittest
+from unittest import mock
+
+from app.core.metrics import errors_total, llm_tokens_total
+from app.services import prescription as service
+from app.models.prescription import PrescriptionRequest
+
+PAYLOAD = {
+    "name": "Asha", "age": 34, "gender": "Female", "allergies": "None",
+    "medical_history": "None", "symptoms": "Fever and sore throat",
+}
+
+
+def tokens():
+    return {kind: llm_tokens_total._values.get((kind,), 0) for kind in ("prompt", "completion")}
+
+
+def errors(error_type):
+    return errors_total._values.get((error_type,), 0)
+
+
+class TokenAndErrorMetricsTests(unittest.IsolatedAsyncioTestCase):
+    def assertTokensCounted(self, before):
+        after = tokens()
+        self.assertGreater(after["prompt"], before["prompt"])
+        self.assertGreater(after["completion"], before["completion"])
+
+    async def test_generate_counts_tokens(self):
+        before = tokens()
+        await service.generate_prescription_service(PrescriptionRequest(**PAYLOAD), use_cache=False)
+        self.assertTokensCounted(before)
+
+    async def test_stream_counts_tokens(self):
+        before = tokens()
+        events = [event async for event in service.stream_prescription_service(PrescriptionRequest(**PAYLOAD), False)]
+        self.assertEqual(events[-1]["event"], "prescription")
+        self.assertTokensCounted(before)
+
+    async def test_batch_counts_tokens_and_item_errors(self):
+        before, invalid_before = tokens(), errors("ValidationError")
+        results = await service.generate_prescriptions_batch_service([PAYLOAD, {"name": "x"}], use_cache=False)
+        self.assertIn("prescription", results[0])
+        self.assertIn("error", results[1])
+        self.assertTokensCounted(before)
+        self.assertEqual(errors("ValidationError"), invalid_before + 1)
+
+    async def test_stream_error_after_start_is_counted(self):
+        async def failing_stream(data):
+            yield {"diagnosis": "Flu"}
+            raise RuntimeError("connection reset")
+
+        chain = mock.Mock(astream=failing_stream)
+        components = {"stream_chain": chain}
+        before = errors("RuntimeError")
+        with mock.patch.object(service, "aget_components", mock.AsyncMock(return_value=components)):
+            events = [event async for event in service.stream_prescription_service(PrescriptionRequest(**PAYLOAD), False)]
+        self.assertEqual(events[0]["event"], "start")
+        self.assertEqual(events[-1]["event"], "error")
+        self.assertEqual(errors("RuntimeError"), before + 1)
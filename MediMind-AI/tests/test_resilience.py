@@ -0,0 +1,219 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from app.core.concurrency import ConcurrencyLimiter
+from app.core.resilience import CircuitBreaker, CircuitOpenError, UpstreamPolicy, UpstreamTimeoutError, upstream_policy
+from app.models.prescription import PrescriptionRequest
+from app.services import prescription as service
+
+
+class TransientError(Exception):
+    status_code = 503
+
+
+def make_policy(**overrides):
+    options = dict(
+        timeout=5, max_retries=2, retry_base_delay=0.01, retry_max_delay=0.05,
+        hedge_percentile=0, hedge_min_delay=0.05,
+        breaker=CircuitBreaker(failure_rate=0.5, min_calls=100, window=30, open_seconds=30),
+    )
+    options.update(overrides)
+    return UpstreamPolicy(**options)
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("app.core.resilience.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window=30, open_seconds=10)
+
+    def trip(self):
+        for ok in (True, False, False, False):
+            self.breaker.before_call()
+            self.breaker.record(ok)
+
+    def test_opens_on_failure_rate(self):
+        self.breaker.record(False)
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, "closed")  # under min_calls
+        self.breaker.record(True)
+        self.breaker.record(True)
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(CircuitOpenError) as raised:
+            self.breaker.before_call()
+        self.assertAlmostEqual(raised.exception.retry_after, 10)
+
+    def test_half_open_lets_one_trial_through(self):
+        self.trip()
+        self.now += 10
+        self.assertEqual(self.breaker.state, "half-open")
+        self.breaker.before_call()
+        for _ in range(3):
+            with self.assertRaises(CircuitOpenError):
+                self.breaker.before_call()
+
+    def test_successful_trial_closes(self):
+        self.trip()
+        self.now += 10
+        self.breaker.before_call()
+        self.breaker.record(True)
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.before_call()
+
+    def test_failed_trial_reopens(self):
+        self.trip()
+        self.now += 10
+        self.breaker.before_call()
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_check_does_not_claim_the_trial(self):
+        self.trip()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.check()
+        self.now += 10
+        self.breaker.check()
+        self.breaker.check()
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.check()
+
+    def test_lost_trial_is_replaced(self):
+        self.trip()
+        self.now += 10
+        self.breaker.before_call()  # never reports back
+        self.now += 10
+        self.breaker.before_call()
+
+
+class RetryTests(unittest.IsolatedAsyncioTestCase):
+    async def test_retries_transient_errors_with_backoff(self):
+        policy = make_policy()
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise TransientError()
+            return "ok"
+
+        with mock.patch("app.core.resilience.asyncio.sleep", wraps=asyncio.sleep) as sleep:
+            self.assertEqual(await policy.call(flaky), "ok")
+        self.assertEqual(len(calls), 3)
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        # Full jitter: somewhere between 0 and the capped exponential
+        self.assertTrue(0 <= delays[0] <= 0.01 and 0 <= delays[1] <= 0.02, delays)
+
+    async def test_gives_up_after_max_retries(self):
+        policy = make_policy(max_retries=1)
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            raise TransientError()
+
+        with self.assertRaises(TransientError):
+            await policy.call(failing)
+        self.assertEqual(len(attempts), 2)
+
+    async def test_does_not_retry_permanent_errors(self):
+        policy = make_policy()
+        attempts = []
+
+        async def invalid():
+            attempts.append(1)
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            await policy.call(invalid)
+        self.assertEqual(len(attempts), 1)
+
+    async def test_backoff_is_capped(self):
+        policy = make_policy(retry_base_delay=1, retry_max_delay=2)
+        self.assertTrue(all(policy.backoff(10) <= 2 for _ in range(100)))
+
+    async def test_deadline(self):
+        policy = make_policy(timeout=0.05)
+        with self.assertRaises(UpstreamTimeoutError):
+            await policy.call(lambda: asyncio.sleep(1))
+
+
+class HedgeTests(unittest.IsolatedAsyncioTestCase):
+    async def test_hedge_wins_and_slow_attempt_is_cancelled(self):
+        limiter = ConcurrencyLimiter(limit=2, queue_timeout=1)
+        policy = make_policy(hedge_percentile=95, limiter=limiter)
+        started, cancelled = [], []
+
+        async def attempt():
+            index = len(started)
+            started.append(index)
+            try:
+                await asyncio.sleep(10 if index == 0 else 0.01)
+            except asyncio.CancelledError:
+                cancelled.append(index)
+                raise
+            return index
+
+        async with limiter.slot():
+            self.assertEqual(await policy.call(attempt), 1)
+            self.assertEqual(limiter.in_flight, 1)  # the hedge's slot was given back
+        await asyncio.sleep(0)
+        self.assertEqual(cancelled, [0])
+
+    async def test_hedge_needs_a_free_slot(self):
+        limiter = ConcurrencyLimiter(limit=1, queue_timeout=1)
+        policy = make_policy(hedge_percentile=95, limiter=limiter)
+        started = []
+
+        async def attempt():
+            started.append(1)
+            await asyncio.sleep(0.1)
+            return "primary"
+
+        async with limiter.slot():
+            self.assertEqual(await policy.call(attempt), "primary")
+        self.assertEqual(len(started), 1)
+        self.assertEqual(limiter.in_flight, 0)
+
+
+class HalfOpenServiceTests(unittest.IsolatedAsyncioTestCase):
+    """Service entry points let the half-open trial through and report its outcome."""
+
+    payload = {
+        "name": "Asha", "age": 34, "gender": "Female", "allergies": "None",
+        "medical_history": "None", "symptoms": "Fever and sore throat",
+    }
+
+    async def asyncSetUp(self):
+        self.breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, window=30, open_seconds=0.05)
+        patcher = mock.patch.object(upstream_policy, "breaker", self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker.record(False)
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, "open")
+        await asyncio.sleep(0.06)
+        self.assertEqual(self.breaker.state, "half-open")
+
+    async def test_stream_closes_the_breaker(self):
+        request = PrescriptionRequest(**self.payload)
+        events = [event async for event in service.stream_prescription_service(request, use_cache=False)]
+        self.assertEqual(events[-1]["event"], "prescription")
+        self.assertEqual(self.breaker.state, "closed")
+
+    async def test_batch_closes_the_breaker(self):
+        results = await service.generate_prescriptions_batch_service([self.payload], use_cache=False)
+        self.assertIn("prescription", results[0])
+        self.assertEqual(self.breaker.state, "closed")
+
+    async def test_generate_closes_the_breaker(self):
+        request = PrescriptionRequest(**self.payload)
+        await service.generate_prescription_service(request, use_cache=False)
+        self.assertEqual(self.breaker.state, "closed")
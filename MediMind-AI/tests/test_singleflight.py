@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+
+from app.core.singleflight import SingleFlight
+
+
+class SingleFlightTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def upstream(self):
+        self.calls += 1
+        await self.release.wait()
+        return "result"
+
+    async def test_concurrent_calls_share_one_upstream_call(self):
+        first = asyncio.create_task(self.flight.do("key", self.upstream))
+        second = asyncio.create_task(self.flight.do("key", self.upstream))
+        await asyncio.sleep(0)
+        self.assertTrue(self.flight.in_flight("key"))
+        self.release.set()
+        self.assertEqual(await asyncio.gather(first, second), ["result", "result"])
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(self.flight.in_flight("key"))
+
+    async def test_different_keys_are_not_shared(self):
+        self.release.set()
+        await asyncio.gather(self.flight.do("a", self.upstream), self.flight.do("b", self.upstream))
+        self.assertEqual(self.calls, 2)
+
+    async def test_cancelled_waiter_leaves_the_others_running(self):
+        first = asyncio.create_task(self.flight.do("key", self.upstream))
+        second = asyncio.create_task(self.flight.do("key", self.upstream))
+        await asyncio.sleep(0)
+        first.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.assertTrue(self.flight.in_flight("key"))
+        self.release.set()
+        self.assertEqual(await second, "result")
+        self.assertEqual(self.calls, 1)
+
+    async def test_last_cancelled_waiter_cancels_the_shared_call(self):
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def upstream():
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        first = asyncio.create_task(self.flight.do("key", upstream))
+        second = asyncio.create_task(self.flight.do("key", upstream))
+        await started.wait()
+        first.cancel()
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        self.assertFalse(self.flight.in_flight("key"))
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+        # The key is free again, so the next caller starts a fresh call
+        self.release.set()
+        self.assertEqual(await self.flight.do("key", self.upstream), "result")
+        self.assertEqual(self.calls, 1)
+
+    async def test_exception_reaches_every_waiter(self):
+        async def upstream():
+            self.calls += 1
+            await self.release.wait()
+            raise ValueError("upstream failed")
+
+        waiters = [asyncio.create_task(self.flight.do("key", upstream)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        self.assertEqual(self.calls, 1)
+        for result in results:
+            self.assertIsInstance(result, ValueError)
+        self.assertFalse(self.flight.in_flight("key"))
+
@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from app.core.concurrency import llm_limiter
+from app.models.prescription import PrescriptionRequest
+from app.services import prescription as service
+
+PAYLOAD = {
+    "name": "Asha", "age": 34, "gender": "Female", "allergies": "None",
+    "medical_history": "None", "symptoms": "Fever and sore throat",
+}
+
+
+async def slots_released():
+    while llm_limiter.in_flight:
+        await asyncio.sleep(0.01)
+
+
+def completed(snapshots):
+    """Events emitted after each snapshot in turn, then at the end of the stream."""
+    emitted = {"fields": set(), "items": 0}
+    steps = [list(service._completed_events(snapshot, emitted)) for snapshot in snapshots]
+    steps.append(list(service._completed_events(snapshots[-1], emitted, final=True)))
+    return [[(event["event"], event.get("index")) for event in step] for step in steps]
+
+
+class CompletedEventsTests(unittest.TestCase):
+    def test_parts_are_emitted_once_the_next_part_has_started(self):
+        first = {"medicine": "Paracetamol", "dosage": "500 mg", "instructions": "Every 6 hours"}
+        snapshots = [
+            {"diagnosis": "Flu"},
+            {"diagnosis": "Flu", "notes": "Rest"},
+            {"diagnosis": "Flu", "notes": "Rest", "prescription_items": []},
+            {"diagnosis": "Flu", "notes": "Rest", "prescription_items": [{"medicine": "Para"}]},
+            {"diagnosis": "Flu", "notes": "Rest", "prescription_items": [first]},
+            {"diagnosis": "Flu", "notes": "Rest", "prescription_items": [first, {"medicine": "Vit"}]},
+            {"diagnosis": "Flu", "notes": "Rest", "prescription_items": [first, {"medicine": "Vitamin C"}]},
+        ]
+        self.assertEqual(completed(snapshots), [
+            [],
+            [("diagnosis", None)],
+            [("notes", None)],
+            [],
+            [],
+            [("item", 0)],
+            [],
+            [("item", 1)],
+        ])
+
+
+class StreamServiceTests(unittest.IsolatedAsyncioTestCase):
+    async def test_events_arrive_in_document_order(self):
+        request = PrescriptionRequest(**PAYLOAD)
+        events = [event async for event in service.stream_prescription_service(request, use_cache=False)]
+        names = [event["event"] for event in events]
+        self.assertEqual(names, ["start", "diagnosis", "notes", "item", "item", "prescription"])
+        self.assertEqual([event["index"] for event in events if event["event"] == "item"], [0, 1])
+        final = events[-1]["data"]
+        self.assertEqual([event["data"] for event in events[3:5]], final["prescription_items"])
+        self.assertEqual(events[1]["data"], final["diagnosis"])
+
+    async def test_slot_is_released_when_upstream_ends(self):
+        events = service.stream_prescription_service(PrescriptionRequest(**PAYLOAD), use_cache=False)
+        self.assertEqual((await events.__anext__())["event"], "start")
+        self.assertEqual(llm_limiter.in_flight, 1)
+        # The client has not read past "start", but the upstream stream is over
+        await asyncio.wait_for(slots_released(), timeout=1)
+        remaining = [event async for event in events]
+        self.assertEqual(remaining[-1]["event"], "prescription")
+
+    async def test_client_going_away_stops_upstream_and_frees_the_slot(self):
+        waiting, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def endless_stream(data):
+            yield {"diagnosis": "Flu"}
+            waiting.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            yield {}
+
+        components = {"stream_chain": mock.Mock(astream=endless_stream)}
+        with mock.patch.object(service, "aget_components", mock.AsyncMock(return_value=components)):
+            events = service.stream_prescription_service(PrescriptionRequest(**PAYLOAD), use_cache=False)
+            await events.__anext__()
+            await asyncio.wait_for(waiting.wait(), timeout=1)
+            await events.aclose()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await asyncio.wait_for(slots_released(), timeout=1)
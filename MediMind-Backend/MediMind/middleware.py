@@ -0,0 +1,185 @@
+import json
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from .profiling import profile_request
+from .routers import pin_to_primary, route_request
+
+logger = logging.getLogger(__name__)
+
+
+def add_server_timing(response, *entries):
+    """Append `Server-Timing` entries, keeping any set by other middleware."""
+    existing = response.get('Server-Timing')
+    response['Server-Timing'] = ', '.join(filter(None, [existing, *entries]))
+
+
+class ConnectionTimer:
+    """
+    Times the first use of `connection` inside the block, i.e. the health check and
+    connect that the request's first cursor or transaction would do anyway.
+
+    Both steps are wrapped on the connection object until one of them is called, so a
+    request that never touches the database never opens or probes a connection.
+    """
+    hooked = ('close_if_health_check_failed', 'ensure_connection')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.elapsed_ms = None
+        self.reused = None
+
+    def __enter__(self):
+        for name in self.hooked:
+            setattr(self.connection, name, self.first_use)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unhook()
+
+    def unhook(self):
+        for name in self.hooked:
+            self.connection.__dict__.pop(name, None)
+
+    def first_use(self):
+        self.unhook()
+        previous = self.connection.connection
+        started = time.perf_counter()
+        # Same steps as the first cursor of the request, including the CONN_HEALTH_CHECKS
+        # probe that replaces a dead persistent connection
+        self.connection.close_if_health_check_failed()
+        self.connection.ensure_connection()
+        self.elapsed_ms = (time.perf_counter() - started) * 1000
+        self.reused = previous is not None and self.connection.connection is previous
+
+
+class DatabaseConnectionTimingMiddleware:
+    """
+    Reports how each request got its database connection in `Server-Timing`:
+
+        db-conn;dur=<ms>;desc="warm" | "cold" | "pool"
+
+    "warm" means a persistent connection (CONN_MAX_AGE) was already open, "cold" means
+    a new connection and handshake were paid for, and "pool" means one was checked out
+    from the psycopg pool. The cost is measured when the request first uses the
+    database; requests that run no query get no entry.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pooled = bool(connection.settings_dict.get('OPTIONS', {}).get('pool'))
+
+    def __call__(self, request):
+        with ConnectionTimer(connections[DEFAULT_DB_ALIAS]) as timer:
+            response = self.get_response(request)
+        if timer.elapsed_ms is None:
+            return response
+
+        if timer.reused:
+            status = 'warm'
+        else:
+            status = 'pool' if self.pooled else 'cold'
+        request.db_connection_status = status
+        add_server_timing(response, f'db-conn;dur={timer.elapsed_ms:.2f};desc="{status}"')
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe-method (GET, HEAD, OPTIONS) requests read from one of the replicas in
+    `DATABASE_REPLICAS` (see `MediMind.routers.ReplicaRouter`). Other requests, and
+    reads that follow a write in the same request, use the primary. A request that
+    wrote pins its user to the primary for `DATABASE_REPLICA_PIN_SECONDS`, so their
+    next pages are not read (and cached) from a replica that lacks the write. Without
+    replicas the middleware is removed.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with route_request(read_only=request.method in ('GET', 'HEAD', 'OPTIONS'), request=request) as routing:
+            response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if routing.wrote and user is not None and user.is_authenticated:
+            pin_to_primary(user)
+        return response
+
+
+class SQLProfilerMiddleware:
+    """
+    Opt-in (`SQL_PROFILER=True`) per-request profile of database and serialization cost.
+
+    Every response gets `Server-Timing` entries:
+
+        db;dur=<ms>;desc="<n> queries", serialize;dur=<ms>, render;dur=<ms>,
+        sql;dur=<ms>;desc="<statement>" (the slowest N), app;dur=<ms>
+
+    `serialize` is time in serializers and list row building, `render` is JSON
+    encoding, both without the queries they trigger. A request that crosses one of the
+    `SQL_PROFILER_*` thresholds is also logged as one JSON object with its slowest
+    statements. Statements are recorded without their parameters.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SQL_PROFILER:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.top_n = settings.SQL_PROFILER_TOP_N
+        self.slow_request_ms = settings.SQL_PROFILER_SLOW_REQUEST_MS
+        self.slow_query_ms = settings.SQL_PROFILER_SLOW_QUERY_MS
+        self.max_queries = settings.SQL_PROFILER_MAX_QUERIES
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with profile_request(self.top_n) as profile:
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        slowest = profile.slowest_queries
+
+        add_server_timing(
+            response,
+            f'db;dur={profile.db_ms:.2f};desc="{profile.query_count} queries"',
+            f'serialize;dur={profile.stages["serialize"]:.2f}',
+            f'render;dur={profile.stages["render"]:.2f}',
+            *(f'sql;dur={duration_ms:.2f};desc="{self.describe(sql)}"' for duration_ms, sql in slowest),
+            f'app;dur={total_ms:.2f}',
+        )
+
+        reasons = []
+        if total_ms >= self.slow_request_ms:
+            reasons.append('slow_request')
+        if profile.query_count > self.max_queries:
+            reasons.append('query_count')
+        if slowest and slowest[0][0] >= self.slow_query_ms:
+            reasons.append('slow_query')
+        if reasons:
+            logger.warning(json.dumps({
+                'event': 'request_profile',
+                'reasons': reasons,
+                'method': request.method,
+                'path': request.path,
+                'view': getattr(request.resolver_match, 'view_name', None),
+                'status': response.status_code,
+                'duration_ms': round(total_ms, 2),
+                'queries': profile.query_count,
+                'db_ms': round(profile.db_ms, 2),
+                'serialize_ms': round(profile.stages['serialize'], 2),
+                'render_ms': round(profile.stages['render'], 2),
+                'slowest_queries': [{'duration_ms': round(duration_ms, 2), 'sql': sql} for duration_ms, sql in slowest],
+            }))
+        return response
+
+    @staticmethod
+    def describe(sql, length=80):
+        """A header-safe, shortened statement for `Server-Timing`'s quoted `desc`."""
+        text = re.sub(r'\s+', ' ', sql).replace('\\', '').replace('"', '')
+        text = text.encode('latin-1', 'replace').decode('latin-1')
+        return text if len(text) <= length else text[:length - 3] + '...'
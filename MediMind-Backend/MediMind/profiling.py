@@ -0,0 +1,86 @@
+import heapq
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Queries and stage timings collected while one request is handled."""
+
+    def __init__(self, top_n=5):
+        self.top_n = top_n
+        self.query_count = 0
+        self.db_ms = 0.0
+        self.stages = defaultdict(float)
+        self._slowest = []  # min-heap of (duration_ms, order, sql)
+        self._open_stages = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook; parameters are never kept, so no patient data is
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record_query(sql, (time.perf_counter() - started) * 1000)
+
+    def record_query(self, sql, duration_ms):
+        self.query_count += 1
+        self.db_ms += duration_ms
+        entry = (duration_ms, self.query_count, sql)
+        if len(self._slowest) < self.top_n:
+            heapq.heappush(self._slowest, entry)
+        elif self.top_n and duration_ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest_queries(self):
+        return [(duration_ms, sql) for duration_ms, _, sql in sorted(self._slowest, reverse=True)]
+
+
+@contextmanager
+def profile_request(top_n=5):
+    """Collect a `RequestProfile` for the queries run on any database inside the block."""
+    profile = RequestProfile(top_n)
+    token = _current.set(profile)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed_stage(name):
+    """
+    Add the block's time to stage `name` of the current request's profile, if any.
+
+    Queries run inside the block count as database time, not stage time, and nested
+    blocks of the same stage (e.g. a nested serializer) are only counted once.
+    """
+    profile = _current.get()
+    if profile is None or name in profile._open_stages:
+        yield
+        return
+    profile._open_stages.add(name)
+    started, db_before = time.perf_counter(), profile.db_ms
+    try:
+        yield
+    finally:
+        profile._open_stages.discard(name)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        profile.stages[name] += elapsed_ms - (profile.db_ms - db_before)
+
+
+class ProfiledSerializerMixin:
+    """Counts a serializer's `to_representation()` toward the request's "serialize" stage."""
+
+    def to_representation(self, instance):
+        with timed_stage('serialize'):
+            return super().to_representation(instance)
@@ -0,0 +1,39 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from .profiling import timed_stage
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    `JSONRenderer` that encodes with orjson, producing the same bytes as DRF's.
+
+    Both write compact UTF-8 without escaping non-ASCII text. Dates and times are passed
+    back to DRF's encoder so they keep its formats (e.g. `Z` for UTC), as is anything
+    else orjson does not know (lazy strings, decimals, ...). Indented output (the
+    browsable API, `; indent=` in `Accept`) and non-default `UNICODE_JSON` /
+    `COMPACT_JSON` settings use the stock renderer.
+    """
+    encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed_stage('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if data is None:
+            return b''
+        if (
+            self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder.default, option=ORJSON_OPTIONS)
+        # Keep DRF's escaping of the two line terminators that are not valid in JavaScript strings
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
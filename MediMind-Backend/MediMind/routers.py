@@ -0,0 +1,119 @@
+import random
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+_current = ContextVar('replica_routing', default=None)
+
+# Models whose reads may be served by a replica
+REPLICATED_MODELS = {
+    'patients.patient',
+    'prescriptions.prescription',
+    'prescriptions.prescriptionitem',
+    'users.userprofile',
+}
+
+WRITE_RE = re.compile(r'\s*(INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+PIN_PREFIX = 'primary-pin:'
+
+
+def pin_to_primary(user):
+    """Send `user`'s reads to the primary for DATABASE_REPLICA_PIN_SECONDS, e.g. after a write."""
+    cache.set(f'{PIN_PREFIX}{user.pk}', True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(user):
+    return bool(cache.get(f'{PIN_PREFIX}{user.pk}'))
+
+
+class RequestRouting:
+    """Where one request's queries may go."""
+
+    def __init__(self, read_only, request=None):
+        self.read_only = read_only
+        self.request = request
+        self.wrote = False
+        self._pinned = None
+        self._replica = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook on the primary. Statements are watched rather
+        # than db_for_write() calls, which Django also makes when merely building objects.
+        if WRITE_RE.match(sql):
+            self.wrote = True
+        return execute(sql, params, many, context)
+
+    @property
+    def pinned(self):
+        """Whether the request's user wrote recently, so a replica may not have their write yet."""
+        if self._pinned is None:
+            user = getattr(self.request, 'user', None)
+            if user is None or not user.is_authenticated:
+                # Not authenticated (yet); ask again on the next read
+                return False
+            self._pinned = is_pinned_to_primary(user)
+        return self._pinned
+
+    @property
+    def use_replica(self):
+        # Once the request has written, later reads see the write on the primary
+        return self.read_only and not self.wrote and not self.pinned
+
+    @property
+    def replica(self):
+        # One replica for the whole request, so its reads agree with each other
+        if self._replica is None:
+            self._replica = random.choice(settings.DATABASE_REPLICAS)
+        return self._replica
+
+
+@contextmanager
+def route_request(read_only, request=None):
+    """
+    Let the block's reads go to a replica if `read_only`, until something is written,
+    and unless `request`'s user is pinned to the primary.
+    """
+    routing = RequestRouting(read_only, request)
+    token = _current.set(routing)
+    try:
+        with connections['default'].execute_wrapper(routing):
+            yield routing
+    finally:
+        _current.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads of `REPLICATED_MODELS` to one of `settings.DATABASE_REPLICAS`, the same
+    one for every read of a request.
+
+    Only reads inside `route_request(read_only=True)` (safe-method requests, see
+    `MediMind.middleware.ReplicaRoutingMiddleware`) use a replica. Everything else
+    (writes, unsafe-method requests, reads after a write in the same request, requests
+    of a user who wrote in the last DATABASE_REPLICA_PIN_SECONDS, management commands
+    and shells) uses the primary, `default`.
+    """
+
+    def db_for_read(self, model, **hints):
+        # The model is checked first: deciding use_replica may load the session user,
+        # whose queries come back through here
+        if model._meta.label_lower not in REPLICATED_MODELS or not settings.DATABASE_REPLICAS:
+            return None
+        routing = _current.get()
+        if routing is None or not routing.use_replica:
+            return None
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows, so objects read from any of them may be related
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from datetime import timedelta
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -30,6 +31,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'MediMind.middleware.SQLProfilerMiddleware',
+    'MediMind.middleware.DatabaseConnectionTimingMiddleware',
+    'MediMind.middleware.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -70,12 +74,109 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'MediMind.wsgi.application'
 
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+# Native psycopg connection pool (Django 5.1+), mostly useful under ASGI where
+# persistent per-thread connections do not work. Pooling replaces CONN_MAX_AGE.
+DB_POOL = os.environ.get("DB_POOL", "False") == "True"
+
+def connection_options(url):
+    return {
+        # Keep connections open between requests instead of a new TLS handshake per request
+        'conn_max_age': 0 if DB_POOL else int(os.environ.get("DB_CONN_MAX_AGE", "600")),
+        'conn_health_checks': os.environ.get("DB_CONN_HEALTH_CHECKS", "True") == "True",
+        # SQLite (local runs, tests) has no notion of SSL
+        'ssl_require': not url.startswith("sqlite"),
+    }
+
+
 DATABASES = {
-    'default': dj_database_url.config(
-        default=os.getenv("DATABASE_URL"),
-        conn_max_age=0,
-        ssl_require=True
+    'default': dj_database_url.config(default=DATABASE_URL, **connection_options(DATABASE_URL)),
+}
+
+# Read replicas (MediMind/routers.py): comma-separated database URLs, used as aliases
+# replica1..N. Safe-method requests read patients, prescriptions and profiles from a
+# random replica; writes, and reads after a write in the same request, use `default`.
+# A user who wrote keeps reading from `default` for DATABASE_REPLICA_PIN_SECONDS, which
+# should exceed the replicas' replication lag.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+for index, url in enumerate(DATABASE_REPLICA_URLS, 1):
+    DATABASES[f'replica{index}'] = {
+        **dj_database_url.parse(url, **connection_options(url)),
+        # Tests run against the primary's test database instead of an empty copy per replica
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_REPLICA_PIN_SECONDS = float(os.environ.get("DATABASE_REPLICA_PIN_SECONDS", "10"))
+
+DATABASE_ROUTERS = ['MediMind.routers.ReplicaRouter']
+
+for database in DATABASES.values():
+    if DB_POOL and database.get('ENGINE') == 'django.db.backends.postgresql':
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            'max_size': int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+            # Seconds a request waits for a free connection before failing
+            'timeout': float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+            # Recycle connections after this many seconds, and close idle ones above min_size
+            'max_lifetime': float(os.environ.get("DB_POOL_MAX_LIFETIME", "1800")),
+            'max_idle': float(os.environ.get("DB_POOL_MAX_IDLE", "300")),
+        }
+
+# Response cache for read endpoints (MediMind/cache.py). "file" is shared by all
+# workers on a host, so an invalidation in one worker reaches the others. "locmem" is
+# per process and only safe with a single worker: with several, each would keep
+# serving its own stale copies after another worker's write.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "file")
+if CACHE_BACKEND == 'locmem' and int(os.environ.get("WEB_CONCURRENCY", "1")) > 1:
+    raise ImproperlyConfigured(
+        'CACHE_BACKEND=locmem cannot be shared by WEB_CONCURRENCY workers; use CACHE_BACKEND=file'
     )
+
+CACHES = {
+    'default': {
+        'BACKEND': {
+            'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+            'file': 'django.core.cache.backends.filebased.FileBasedCache',
+        }[CACHE_BACKEND],
+        'LOCATION': os.environ.get(
+            "CACHE_LOCATION", str(BASE_DIR / '.cache') if CACHE_BACKEND == 'file' else 'medimind'
+        ),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))},
+    }
+}
+
+# `manage.py test` swaps in a private in-memory cache so tests never clear the shared one
+TEST_RUNNER = 'MediMind.testing.runner.TestRunner'
+
+# AI service used by POST /prescriptions/generate/ (prescriptions/ai.py). Its HTTP
+# client keeps connections alive between requests; the timeout covers the LLM call.
+AI_SERVICE_URL = os.environ.get("AI_SERVICE_URL", "http://127.0.0.1:8001")
+AI_SERVICE_TIMEOUT = float(os.environ.get("AI_SERVICE_TIMEOUT", "90"))
+AI_SERVICE_CONNECT_TIMEOUT = float(os.environ.get("AI_SERVICE_CONNECT_TIMEOUT", "5"))
+AI_SERVICE_MAX_CONNECTIONS = int(os.environ.get("AI_SERVICE_MAX_CONNECTIONS", "20"))
+AI_SERVICE_MAX_KEEPALIVE = int(os.environ.get("AI_SERVICE_MAX_KEEPALIVE", "10"))
+
+# Per-request query/serialization profile in Server-Timing, and a JSON log line for
+# requests over the thresholds (MediMind.middleware.SQLProfilerMiddleware). Off by
+# default: it adds per-query overhead and exposes SQL in response headers.
+SQL_PROFILER = os.environ.get("SQL_PROFILER", "False") == "True"
+SQL_PROFILER_TOP_N = int(os.environ.get("SQL_PROFILER_TOP_N", "3"))
+SQL_PROFILER_SLOW_REQUEST_MS = float(os.environ.get("SQL_PROFILER_SLOW_REQUEST_MS", "500"))
+SQL_PROFILER_SLOW_QUERY_MS = float(os.environ.get("SQL_PROFILER_SLOW_QUERY_MS", "100"))
+SQL_PROFILER_MAX_QUERIES = int(os.environ.get("SQL_PROFILER_MAX_QUERIES", "20"))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'MediMind.middleware': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
 # DATABASES = {
@@ -102,18 +203,25 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'MediMind.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
     'ROTATE_REFRESH_TOKENS': True,
+    # Login/refresh tokens carry the doctor's profile (see users.authentication)
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.ProfileTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.ProfileTokenRefreshSerializer',
 }
 
 LANGUAGE_CODE = 'en-us'
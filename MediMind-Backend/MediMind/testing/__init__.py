@@ -0,0 +1,114 @@
+import os
+import tempfile
+from contextlib import ExitStack, contextmanager
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryPlanAssertionsMixin:
+    """
+    TestCase helpers that check the database plans an endpoint's SQL with an index.
+
+    SQLite plans are checked as-is. On PostgreSQL sequential scans are disabled while
+    explaining, because on a small test dataset the planner legitimately prefers them;
+    the assertion is then that a suitable index exists and serves the ordering.
+    """
+
+    def capture_queries(self, method, url, **kwargs):
+        # Measure the real queries, not a response cached by an earlier request
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, response.content)
+        return [query['sql'] for query in captured.captured_queries]
+
+    def queryset_sql(self, queryset):
+        with CaptureQueriesContext(connection) as captured:
+            list(queryset)
+        return captured.captured_queries[-1]['sql']
+
+    def query_for_table(self, queries, table):
+        matching = [sql for sql in queries if sql.lstrip().upper().startswith('SELECT') and f'FROM "{table}"' in sql]
+        self.assertTrue(matching, f'no SELECT from {table} in {queries}')
+        return matching[0]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+                return '\n'.join(row[0] for row in cursor.fetchall())
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return '\n'.join(row[-1] for row in cursor.fetchall())
+        self.skipTest(f'no query plan assertions for {connection.vendor}')
+
+    def assertIndexScan(self, sql, *index_names, ordered=True):
+        plan = self.explain(sql)
+        self.assertTrue(any(name in plan for name in index_names), f'expected one of {index_names}:\n{plan}')
+        if ordered:
+            # The index must also deliver the ORDER BY, not just the filter
+            self.assertNotIn('TEMP B-TREE', plan)
+            self.assertNotRegex(plan, r'(?m)^\s*(->\s*)?Sort\b')
+
+
+class QueryCountAssertionsMixin:
+    """TestCase helpers for asserting how many queries a page or endpoint runs."""
+
+    def assertQueryBudget(self, method, url, budget, **kwargs):
+        """
+        `method url` must succeed with at most `budget` queries on any database, counting
+        savepoints and a streamed body's queries. The response cache is cleared first.
+        """
+        cache.clear()
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(conn)) for conn in connections.all()]
+            response = getattr(self.client, method)(url, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, getattr(response, 'content', b''))
+        queries = [query['sql'] for context in captured for query in context.captured_queries]
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{method.upper()} {url} ran {len(queries)} queries, over its budget of {budget}:\n' + '\n'.join(queries)
+        )
+        return response
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(captured.captured_queries)
+
+    def assertQueryCountIndependentOfRows(self, url, add_rows):
+        """`url` must run the same number of queries before and after `add_rows()` adds rows to it."""
+        before = self.count_queries(url)
+        add_rows()
+        after = self.count_queries(url)
+        self.assertEqual(before, after, f'{url} ran {before} queries, then {after} after adding rows')
+
+
+@contextmanager
+def sqlite_database(alias):
+    """
+    A migrated, empty SQLite database file registered as `alias` for the block, e.g.
+    a replica next to the test database. The test runner would try to create a test
+    database for an alias in a TestCase's `databases`, so enter this in setUpClass()
+    and add the alias to `cls.databases` there, before calling super().
+    """
+    handle, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(handle)
+    connections.settings[alias] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+    connections.configure_settings(connections.settings)
+    try:
+        call_command('migrate', database=alias, verbosity=0)
+        yield alias
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+        os.remove(path)
@@ -0,0 +1,28 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'medimind-tests',
+    }
+}
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests against a per-process in-memory cache.
+
+    The configured cache is usually the shared file cache under BASE_DIR/.cache, and the
+    tests clear it between requests; without this a test run would wipe the response
+    cache of a development server running from the same checkout.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_override = override_settings(CACHES=TEST_CACHES)
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        super().teardown_test_environment(**kwargs)
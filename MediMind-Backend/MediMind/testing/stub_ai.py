@@ -0,0 +1,118 @@
+"""
+A stand-in for the AI service's `POST /generate_prescription`, for tests and local runs.
+
+    python -m MediMind.testing.stub_ai --port 8001
+
+It answers every request with a fixed prescription built from the symptoms, after an
+optional delay, and records what it was sent. Connections are kept alive (HTTP/1.1), so
+tests can check that the backend reuses them.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def default_prescription(payload):
+    return {
+        'diagnosis': f"Suspected viral infection ({payload.get('symptoms', '')})",
+        'notes': 'Rest and drink plenty of fluids.',
+        'prescription_items': [
+            {'medicine': 'Paracetamol 500mg', 'dosage': '1 tablet every 6 hours', 'instructions': 'After food'},
+            {'medicine': 'Cetirizine 10mg', 'dosage': '1 tablet at night', 'instructions': 'For 5 days'},
+        ],
+    }
+
+
+class StubAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            payload = None
+        self.server.requests.append({'path': self.path, 'payload': payload, 'client': self.client_address})
+
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.path != '/generate_prescription':
+            status, data = 404, {'detail': 'Not Found'}
+        elif self.server.body is not None:
+            status, data = self.server.status, self.server.body
+        else:
+            status, data = self.server.status, default_prescription(payload or {})
+
+        encoded = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        for name, value in self.server.headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubAIServer(ThreadingHTTPServer):
+    """
+    Serves in a background thread between `start()` and `stop()` (or as a context
+    manager). Set `status`, `body` and `headers` to change the answer; `body=None`
+    means the default prescription. `requests` lists what was received.
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, status=200, body=None, headers=None, delay=0):
+        super().__init__((host, port), StubAIHandler)
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.delay = delay
+        self.requests = []
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a stub AI service.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--delay', type=float, default=0, help='Seconds to wait before answering')
+    args = parser.parse_args()
+
+    server = StubAIServer(args.host, args.port, delay=args.delay)
+    print(f'Stub AI service on {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from patients.models import Patient
+from patients.tests import create_doctor, seed_patients
+from prescriptions.tests import seed_prescriptions
+from users.models import UserProfile
+from users.serializers import ProfileTokenObtainPairSerializer
+from .routers import PIN_PREFIX, ReplicaRouter, is_pinned_to_primary, route_request
+from .testing import sqlite_database
+
+
+class SQLProfilerMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.doctor = create_doctor('profiled')
+        seed_patients(cls.doctor, 5)
+        seed_prescriptions(cls.doctor, 2)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        token = ProfileTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_off_by_default(self):
+        timing = self.client.get('/prescriptions/')['Server-Timing']
+        self.assertNotRegex(timing, r'(^|, )db;')
+        self.assertIn('db-conn;', timing)
+
+    @override_settings(SQL_PROFILER=True)
+    def test_server_timing(self):
+        timing = self.client.get('/prescriptions/')['Server-Timing']
+        self.assertRegex(timing, r'(^|, )db;dur=[\d.]+;desc="2 queries"')
+        for entry in ('serialize', 'render', 'app'):
+            self.assertRegex(timing, rf'(^|, ){entry};dur=[\d.]+')
+        self.assertEqual(len([part for part in timing.split(', ') if part.startswith('sql;')]), 2)
+
+    @override_settings(SQL_PROFILER=True, SQL_PROFILER_MAX_QUERIES=0, SQL_PROFILER_TOP_N=1)
+    def test_logs_requests_over_a_threshold(self):
+        with self.assertLogs('MediMind.middleware', 'WARNING') as logs:
+            self.client.get('/patients/?search=secretname')
+        record = json.loads(logs.records[0].getMessage())
+
+        self.assertEqual(record['reasons'], ['query_count'])
+        self.assertEqual(record['path'], '/patients/')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 1)
+        self.assertEqual(len(record['slowest_queries']), 1)
+        self.assertIn('patients_patient', record['slowest_queries'][0]['sql'])
+        # Statements are logged without their parameters
+        self.assertNotIn('secretname', logs.output[0])
+
+    @override_settings(SQL_PROFILER=True)
+    def test_no_log_under_thresholds(self):
+        with self.assertNoLogs('MediMind.middleware', 'WARNING'):
+            self.client.get('/users/me/')
+
+
+class DatabaseConnectionTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.doctor = create_doctor('timed')
+        seed_patients(cls.doctor, 2)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        token = ProfileTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.connection = connections[DEFAULT_DB_ALIAS]
+
+    def spy(self, name):
+        method = getattr(type(self.connection), name)
+        return mock.patch.object(type(self.connection), name, autospec=True, side_effect=method)
+
+    def test_reports_connection_of_first_query(self):
+        timing = self.client.get('/patients/')['Server-Timing']
+        # The test case holds the connection open, so it is reused
+        self.assertRegex(timing, r'(^|, )db-conn;dur=[\d.]+;desc="warm"')
+
+    def test_request_without_queries_opens_no_connection(self):
+        # The first request loads the profile; the repeat is served from the response cache
+        self.client.get('/users/me/')
+        # assertNumQueries() itself ensures a connection, so it goes outside the spies
+        with self.assertNumQueries(0):
+            with self.spy('ensure_connection') as ensure, self.spy('close_if_health_check_failed') as health_check:
+                response = self.client.get('/users/me/')
+        self.assertEqual(response.status_code, 200)
+        ensure.assert_not_called()
+        health_check.assert_not_called()
+        self.assertNotIn('db-conn', response.get('Server-Timing', ''))
+
+    def test_connection_is_unhooked_after_request(self):
+        self.client.get('/users/me/')
+        self.client.get('/patients/')
+        self.assertNotIn('ensure_connection', vars(self.connection))
+        self.assertNotIn('close_if_health_check_failed', vars(self.connection))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    """Routing between the test database and a second SQLite file acting as its replica."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.enterClassContext(sqlite_database('replica'))
+        cls.databases = {*cls.databases, 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.doctor = create_doctor('replicated')
+        seed_patients(cls.doctor, 1)
+        cls.patient = Patient.objects.get(doctor=cls.doctor)
+        # The replica has the same rows, except for a name that tells the two apart
+        for obj in (cls.user, cls.doctor, cls.patient):
+            obj.save(using='replica', force_insert=True)
+        Patient.objects.using('replica').filter(pk=cls.patient.pk).update(name='Replica copy')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        token = ProfileTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.url = f'/patients/{self.patient.pk}/'
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.client.get(self.url).json()['name'], 'Replica copy')
+        self.assertEqual(self.client.get('/patients/').json()['results'][0]['name'], 'Replica copy')
+
+    def test_writes_use_primary(self):
+        response = self.client.patch(self.url, {'age': 50}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # Read and written on the primary, so the response has the primary's name
+        self.assertEqual(response.json()['patient']['name'], self.patient.name)
+        self.assertEqual(Patient.objects.using('default').get(pk=self.patient.pk).age, 50)
+        self.assertNotEqual(Patient.objects.using('replica').get(pk=self.patient.pk).age, 50)
+
+    def test_reads_after_a_write_use_primary(self):
+        with route_request(read_only=True) as routing:
+            self.assertEqual(Patient.objects.get(pk=self.patient.pk).name, 'Replica copy')
+            # Building objects is not a write
+            UserProfile(user=self.user)
+            self.assertFalse(routing.wrote)
+            Patient.objects.filter(pk=self.patient.pk).update(age=51)
+            self.assertTrue(routing.wrote)
+            self.assertEqual(Patient.objects.get(pk=self.patient.pk).age, 51)
+
+    def test_only_requests_and_listed_models_use_replicas(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Patient))
+        with route_request(read_only=True):
+            self.assertEqual(router.db_for_read(UserProfile), 'replica')
+            self.assertIsNone(router.db_for_read(User))
+        with route_request(read_only=False):
+            self.assertIsNone(router.db_for_read(Patient))
+
+    def test_write_then_read_in_the_next_request_uses_primary(self):
+        # A page cached from the replica before the write
+        self.assertEqual(self.client.get(self.url).json()['name'], 'Replica copy')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, {'age': 52}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        # The replica has not caught up; the writer's next requests read the primary
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['name'], self.patient.name)
+        self.assertEqual(response.json()['age'], 52)
+        self.assertEqual(self.client.get('/patients/').json()['results'][0]['name'], self.patient.name)
+        # ...so what the response cache keeps, and 304s confirm, is the primary's page
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Other users are not pinned
+        other, _ = create_doctor('bystander')
+        with route_request(read_only=True, request=SimpleNamespace(user=other)) as routing:
+            self.assertTrue(routing.use_replica)
+
+    def test_pin_expires(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {'age': 53}, format='json')
+        cache.delete(f'{PIN_PREFIX}{self.user.pk}')
+        with self.captureOnCommitCallbacks(execute=True):
+            Patient.objects.filter(pk=self.patient.pk).first().save()  # new generation, no cached page
+        self.assertEqual(self.client.get(self.url).json()['name'], 'Replica copy')
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.patch(self.url, {'age': -1}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(is_pinned_to_primary(self.user))
+
+    @override_settings(DATABASE_REPLICAS=['replica', 'replica2'])
+    def test_one_replica_per_request(self):
+        router = ReplicaRouter()
+        for _ in range(5):
+            with route_request(read_only=True):
+                chosen = {router.db_for_read(model) for model in (Patient, UserProfile, Patient, UserProfile) * 5}
+            self.assertEqual(len(chosen), 1)
+            self.assertLessEqual(chosen, {'replica', 'replica2'})
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.client.get(self.url).json()['name'], self.patient.name)
+
+
+class TestCacheIsolationTests(TestCase):
+    def test_tests_use_a_private_in_memory_cache(self):
+        # The helpers and tests clear the cache; that must not reach the shared file cache
+        self.assertIsInstance(caches['default'], LocMemCache)
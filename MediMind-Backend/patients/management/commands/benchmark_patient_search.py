@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from patients.models import Patient
+from patients.sample_data import FIRST_NAMES, GENDERS, LAST_NAMES, random_name
+from patients.search import normalize_name, search_patients, uses_trigram_search
+from users.models import UserProfile
+
+BENCH_USERNAME = 'benchmark-search'
+
+
+def typo(rng, word):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark doctor-scoped patient search latency at several table sizes. '
+        'Seeds patients under a scratch doctor account and removes it afterwards unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--queries', type=int, default=200, help='Search queries timed per size')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded patients')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'email': 'bench@example.com'})
+        doctor, _ = UserProfile.objects.get_or_create(user=user, defaults={'license_number': BENCH_USERNAME})
+
+        strategy = 'pg_trgm similarity' if uses_trigram_search() else 'normalized-name prefix'
+        self.stdout.write(f'Backend: {connection.vendor} ({strategy})')
+        self.stdout.write(f'{"patients":>10} {"query":<9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"avg rows":>9}')
+
+        try:
+            for size in sorted(options['sizes']):
+                self.seed(doctor, size, options['batch_size'], rng)
+                for label, run in (('search', self.run_search), ('icontains', self.run_icontains)):
+                    timings, rows = self.measure(doctor, run, options['queries'], options['page_size'], rng)
+                    self.stdout.write(
+                        f'{size:>10} {label:<9} {percentile(timings, 50):>8.2f} {percentile(timings, 95):>8.2f} '
+                        f'{percentile(timings, 99):>8.2f} {statistics.mean(rows):>9.1f}'
+                    )
+        finally:
+            if not options['keep']:
+                user.delete()
+
+    def seed(self, doctor, size, batch_size, rng):
+        missing = size - Patient.objects.filter(doctor=doctor).count()
+        while missing > 0:
+            batch = []
+            for _ in range(min(batch_size, missing)):
+                name = random_name(rng)
+                batch.append(Patient(
+                    name=name,
+                    normalized_name=normalize_name(name),
+                    age=rng.randint(0, 100),
+                    gender=rng.choice(GENDERS),
+                    doctor=doctor,
+                ))
+            Patient.objects.bulk_create(batch, batch_size=batch_size)
+            missing -= len(batch)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE patients_patient')
+
+    def measure(self, doctor, run, queries, page_size, rng):
+        timings, rows = [], []
+        for _ in range(queries):
+            term = self.random_term(rng)
+            started = time.perf_counter()
+            rows.append(run(doctor, term, page_size))
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings, rows
+
+    @staticmethod
+    def random_term(rng):
+        word = rng.choice(rng.choice([FIRST_NAMES, LAST_NAMES]))
+        kind = rng.random()
+        if kind < 0.4:
+            return word[:rng.randint(3, len(word))]
+        if kind < 0.7:
+            return typo(rng, word)
+        return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+    @staticmethod
+    def run_search(doctor, term, page_size):
+        queryset = search_patients(Patient.objects.filter(doctor=doctor), term)
+        ordering = ('-rank', 'id') if 'rank' in queryset.query.annotations else ('name', 'id')
+        return len(list(queryset.order_by(*ordering)[:page_size + 1]))
+
+    @staticmethod
+    def run_icontains(doctor, term, page_size):
+        # The previous implementation, for comparison
+        queryset = Patient.objects.filter(doctor=doctor, name__icontains=term)
+        return len(list(queryset.order_by('name', 'id')[:page_size + 1]))
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:05
+
+import unicodedata
+
+from django.db import migrations, models
+
+TRIGRAM_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS patient_norm_name_trgm_idx '
+    'ON patients_patient USING gin (normalized_name gin_trgm_ops)'
+)
+
+
+def normalize_name(value):
+    # Frozen copy of patients.search.normalize_name as of this migration
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', value)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+def populate_normalized_name(apps, schema_editor):
+    Patient = apps.get_model('patients', 'Patient')
+    batch = []
+    for patient in Patient.objects.only('id', 'name').iterator(chunk_size=2000):
+        patient.normalized_name = normalize_name(patient.name)
+        batch.append(patient)
+        if len(batch) >= 2000:
+            Patient.objects.bulk_update(batch, ['normalized_name'])
+            batch = []
+    if batch:
+        Patient.objects.bulk_update(batch, ['normalized_name'])
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm is PostgreSQL only; other backends search by normalized-name prefix instead
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(TRIGRAM_INDEX_SQL)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS patient_norm_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0003_alter_patient_doctor'),
+        ('users', '0002_alter_userprofile_specialization'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='normalized_name',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(populate_normalized_name, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['doctor', 'normalized_name'], name='patient_doctor_norm_name_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0004_patient_normalized_name'),
+        ('users', '0002_alter_userprofile_specialization'),
+    ]
+
+    operations = [
+        # Build the composite indexes before dropping the single-column FK indexes they replace
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['doctor', 'name', 'id'], name='patient_doctor_name_idx'),
+        ),
+        migrations.AlterField(
+            model_name='patient',
+            name='doctor',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='patients', to='users.userprofile', verbose_name='doctor'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .search import normalize_name
+
 
 class Patient(models.Model):
     name = models.CharField(max_length=100)
@@ -7,7 +9,23 @@ class Patient(models.Model):
     gender = models.CharField(max_length=10, choices=[('Male', 'Male'), ('Female', 'Female'), ('Other', 'Other')])
     allergies = models.TextField(blank=True, null=True)
     medical_history = models.TextField(blank=True, null=True)
-    doctor = models.ForeignKey('users.UserProfile', on_delete=models.CASCADE, related_name='patients', verbose_name='doctor')
+    # Indexed through the composite indexes below, which all lead with doctor
+    doctor = models.ForeignKey('users.UserProfile', on_delete=models.CASCADE, related_name='patients', verbose_name='doctor', db_index=False)
+    # Unbounded: NFKD and case folding can make it longer than `name` (ﬃ -> ffi, ß -> ss)
+    normalized_name = models.TextField(editable=False, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['doctor', 'name', 'id'], name='patient_doctor_name_idx'),
+            models.Index(fields=['doctor', 'normalized_name'], name='patient_doctor_norm_name_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_name(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'normalized_name'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
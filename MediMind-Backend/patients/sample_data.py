@@ -0,0 +1,17 @@
+"""Synthetic patient names and genders for the seeding and benchmark commands."""
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Amelia', 'Ananya', 'Arjun', 'Benjamin', 'Chloé', 'Daniel', 'Diya', 'Elena',
+    'Ethan', 'Fatima', 'Gabriel', 'Hannah', 'Ishaan', 'Jose', 'Kavya', 'Liam', 'Maria', 'Mohammed',
+    'Noah', 'Olivia', 'Priya', 'Rahul', 'Renée', 'Rohan', 'Sakura', 'Sofia', 'Vihaan', 'Zoë',
+]
+LAST_NAMES = [
+    'Agarwal', 'Banerjee', 'Brown', 'Chatterjee', 'Das', 'Fernandes', 'García', 'Gupta', 'Iyer', 'Johnson',
+    'Kapoor', 'Khan', 'Kumar', 'Menon', 'Mishra', 'Müller', 'Nair', 'Patel', 'Reddy', 'Rossi',
+    'Sah', 'Sharma', 'Singh', 'Smith', 'Tanaka', 'Thomas', 'Verma', 'Williams', 'Yadav', 'Zhang',
+]
+GENDERS = ['Male', 'Female', 'Other']
+
+
+def random_name(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
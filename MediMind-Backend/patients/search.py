@@ -0,0 +1,57 @@
+import unicodedata
+
+from django.db import connection
+from django.db.models import F, Q, Value
+
+# pg_trgm cannot use its index for patterns shorter than one trigram
+MIN_TRIGRAM_LENGTH = 3
+# Default `pg_trgm.word_similarity_threshold`; used to keep ranks comparable across queries
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+GENDERS = {'male': 'Male', 'female': 'Female', 'other': 'Other'}
+
+
+def normalize_name(value):
+    """Case-folded, accent-stripped, whitespace-collapsed form of a name used for search."""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', value)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+def uses_trigram_search():
+    return connection.vendor == 'postgresql'
+
+
+def prefix_filter(term):
+    """Index-friendly `normalized_name LIKE 'term%'` written as a range so a B-tree can serve it."""
+    return Q(normalized_name__gte=term, normalized_name__lt=term + '\uffff')
+
+
+def search_patients(queryset, search):
+    """
+    Filter `queryset` by a free-text search.
+
+    A gender keyword ("male", "female", "other") filters on gender. Anything else matches
+    on `normalized_name`: on PostgreSQL by trigram word similarity or substring, both
+    served by the pg_trgm GIN index and ranked by similarity as `rank`; elsewhere by
+    normalized-name prefix over the (doctor, normalized_name) index.
+    """
+    term = normalize_name(search)
+    if not term:
+        return queryset
+    if term in GENDERS:
+        return queryset.filter(gender=GENDERS[term])
+
+    if not uses_trigram_search() or len(term) < MIN_TRIGRAM_LENGTH:
+        return queryset.filter(prefix_filter(term))
+
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    return (
+        queryset
+        .filter(TrigramWordSimilar(F('normalized_name'), Value(term)) | Q(normalized_name__contains=term))
+        .annotate(rank=TrigramWordSimilarity(Value(term), 'normalized_name'))
+    )
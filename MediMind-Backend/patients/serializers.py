@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from MediMind.profiling import ProfiledSerializerMixin
 from .models import Patient
 
 
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Patient
         fields = ['id', 'name', 'age', 'gender', 'allergies', 'medical_history', 'doctor']
@@ -19,7 +20,7 @@ class PatientSerializer(serializers.ModelSerializer):
         return value.strip().title()
 
 
-class PatientListSerializer(serializers.ModelSerializer):
+class PatientListSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Patient
         fields = ['id', 'name', 'age', 'gender', 'doctor']
\ No newline at end of file
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from MediMind.cache import invalidate_on_commit
+from .models import Patient
+
+
+@receiver([post_save, post_delete], sender=Patient)
+def invalidate_patient_responses(sender, instance, **kwargs):
+    invalidate_on_commit(f'doctor:{instance.doctor_id}', f'patient:{instance.pk}')
@@ -1,3 +1,436 @@
+import csv
+import io
+import json
+from importlib import import_module
+from unittest import skipIf, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from MediMind.testing import QueryCountAssertionsMixin, QueryPlanAssertionsMixin
+from users.models import UserProfile
+from users.serializers import ProfileTokenObtainPairSerializer
+from .models import Patient
+from .search import normalize_name
+from .serializers import PatientListSerializer
+from .transfer import EXPORT_FIELDS
+
+
+def create_doctor(username):
+    user = User.objects.create(username=username, email=f'{username}@example.com')
+    profile = UserProfile.objects.create(user=user, license_number=f'LIC-{username}')
+    return user, profile
+
+
+def seed_patients(doctor, count):
+    Patient.objects.bulk_create(
+        Patient(name=f'Patient {i:05d}', normalized_name=normalize_name(f'Patient {i:05d}'),
+                age=i % 90, gender='Other', doctor=doctor)
+        for i in range(count)
+    )
+
+
+class PatientListQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.doctor = create_doctor('planner')
+        _, other = create_doctor('other')
+        seed_patients(cls.doctor, 500)
+        seed_patients(other, 500)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_patient_list_uses_doctor_name_index(self):
+        queries = self.capture_queries('get', '/patients/?page_size=20')
+        self.assertIndexScan(self.query_for_table(queries, 'patients_patient'), 'patient_doctor_name_idx')
+
+    def test_deep_page_by_doctor_uses_doctor_name_index(self):
+        next_url = self.client.get(f'/patients/doc{self.doctor.id}/?page_size=200').json()['next']
+        queries = self.capture_queries('get', next_url)
+        self.assertIndexScan(self.query_for_table(queries, 'patients_patient'), 'patient_doctor_name_idx')
+
+    def test_name_search_uses_normalized_name_index(self):
+        queries = self.capture_queries('get', '/patients/?search=patient 004')
+        self.assertIndexScan(
+            self.query_for_table(queries, 'patients_patient'),
+            'patient_doctor_norm_name_idx', 'patient_norm_name_trgm_idx',
+            # Matches are sorted by name or rank; only the match set is sorted, not the table
+            ordered=False,
+        )
+
+
+class PatientAdminQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='admin', is_staff=True, is_superuser=True))
+        _, self.doctor = create_doctor('doctor')
+
+    def test_changelist_query_count_is_constant(self):
+        from prescriptions.tests import seed_prescriptions
+
+        def add_rows():
+            seed_patients(self.doctor, 40)
+            seed_prescriptions(self.doctor, 2)
+
+        seed_patients(self.doctor, 3)
+        self.assertQueryCountIndependentOfRows(reverse('admin:patients_patient_changelist'), add_rows)
+
+
+class PatientResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.doctor = create_doctor('cached')
+        seed_patients(self.doctor, 3)
+        self.patient = Patient.objects.order_by('id').first()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_conditional_get_returns_304_without_queries(self):
+        url = f'/patients/{self.patient.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_update_invalidates_detail_and_list(self):
+        list_url = f'/patients/doc{self.doctor.id}/'
+        detail_url = f'/patients/{self.patient.id}/'
+        list_etag = self.client.get(list_url)['ETag']
+        detail_etag = self.client.get(detail_url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail_url, {'name': 'Renamed Patient'}, format='json')
+
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Renamed Patient')
+        response = self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Renamed Patient', [row['name'] for row in response.json()['results']])
+
+    def test_invalidation_waits_for_commit(self):
+        url = f'/patients/{self.patient.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                Patient.objects.filter(pk=self.patient.pk).first().save()
+                # Not committed yet: the cached response still stands
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_rolled_back_write_does_not_invalidate(self):
+        url = f'/patients/{self.patient.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.patient.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_import_invalidates_list(self):
+        etag = self.client.get('/patients/')['ETag']
+        self.client.post('/patients/import/', b'name,age,gender\nNew Person,30,Male\n', content_type='text/csv')
+        response = self.client.get('/patients/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 4)
+
+
+class PatientTransferTests(TestCase):
+    url = '/patients/import/'
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.doctor = create_doctor('transfer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def imported(self):
+        return list(Patient.objects.filter(doctor=self.doctor).order_by('id').values_list('name', 'age', 'gender'))
+
+    def test_csv_import(self):
+        body = '\ufeffname,age,gender,allergies,unknown\nZoë Müller,30,Female,Pollen,x\nSam Roy,41,Male,,y\n'
+        response = self.client.post(self.url, body.encode('utf-8'), content_type='text/csv')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data, {'created': 2, 'failed': 0, 'errors': [], 'errors_truncated': False})
+        self.assertEqual(self.imported(), [('Zoë Müller', 30, 'Female'), ('Sam Roy', 41, 'Male')])
+        self.assertEqual(Patient.objects.get(name='Zoë Müller').normalized_name, 'zoe muller')
+
+    def test_ndjson_upload(self):
+        body = b'{"name": "Ana Lima", "age": 25, "gender": "Female"}\n\n{"name": "Raj Iyer", "age": 60, "gender": "Male"}\n'
+        response = self.client.post(self.url, {'file': SimpleUploadedFile('patients.jsonl', body)}, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.imported(), [('Ana Lima', 25, 'Female'), ('Raj Iyer', 60, 'Male')])
+
+    def test_row_errors_are_reported_and_valid_rows_kept(self):
+        body = b'{"name": "Ana Lima", "age": 25, "gender": "Female"}\nnot json\n{"name": "", "age": -1, "gender": "Male"}\n'
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+        self.assertIn('Invalid JSON', str(response.data['errors'][0]['errors']))
+        self.assertIn('name', response.data['errors'][1]['errors'])
+
+        response = self.client.post(self.url, b'name,age,gender\n,abc,Male\n', content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+
+    def test_unsupported_format(self):
+        response = self.client.post(self.url, b'[]', content_type='application/json')
+        self.assertEqual(response.status_code, 415)
+        response = self.client.post(self.url, {'file': SimpleUploadedFile('patients.xlsx', b'x')}, format='multipart')
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(self.client.post(self.url, {}, format='multipart').status_code, 400)
+
+    def test_non_utf8_body(self):
+        response = self.client.post(self.url, 'name,age,gender\nJosé,30,Male\n'.encode('latin-1'), content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.data['error'])
+        self.assertEqual(response.data['created'], 0)
+        self.assertFalse(Patient.objects.exists())
+
+    def test_non_utf8_midway_reports_saved_rows(self):
+        body = b'name,age,gender\nAna Lima,25,Female\nbad,x,Male\nRaj Iyer,60,Male\nJos\xe9,30,Male\nLast One,20,Male\n'
+        response = self.client.post(self.url, body, content_type='text/csv')
+        self.assertEqual(response.status_code, 207, response.data)
+        self.assertIn('UTF-8', response.data['error'])
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 1))
+        self.assertEqual([name for name, _, _ in self.imported()], ['Ana Lima', 'Raj Iyer'])
+
+    def test_export_streams_csv_and_ndjson(self):
+        seed_patients(self.doctor, 3)
+        Patient.objects.create(name='Zoë, "Z" Müller', age=30, gender='Female', allergies=None, doctor=self.doctor)
+        _, stranger = create_doctor('stranger')
+        seed_patients(stranger, 2)
+        expected = list(Patient.objects.filter(doctor=self.doctor).order_by('id').values_list(*EXPORT_FIELDS))
+
+        response = self.client.get('/patients/export/')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="patients.csv"')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual(rows[0], EXPORT_FIELDS)
+        self.assertEqual(rows[1:], [['' if value is None else str(value) for value in row] for row in expected])
+
+        response = self.client.get('/patients/export/?format=ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [dict(zip(EXPORT_FIELDS, row)) for row in expected])
+
+    def test_export_round_trips_through_import(self):
+        seed_patients(self.doctor, 3)
+        body = b''.join(self.client.get('/patients/export/').streaming_content)
+        _, other = create_doctor('other')
+        self.client.force_authenticate(other.user)
+        response = self.client.post(self.url, body, content_type='text/csv')
+        self.assertEqual(response.data['created'], 3)
+
+
+class PatientListOutputTests(TestCase):
+    """The `.values()` list path and orjson renderer give the serializer's exact bytes."""
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.doctor = create_doctor('lister')
+        seed_patients(self.doctor, 25)
+        for name in ('Zoë Müller', 'Ánh Nguyễn', 'Line\u2028Break'):
+            Patient.objects.create(name=name, age=40, gender='Female', allergies=None, doctor=self.doctor)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertMatchesSerializer(self, url, queryset, pages=2):
+        for _ in range(pages):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            size = len(response.data['results'])
+            expected = JSONRenderer().render({
+                'next': response.data['next'],
+                'results': PatientListSerializer(queryset[:size], many=True).data,
+            })
+            self.assertEqual(response.content, expected)
+            url, queryset = response.data['next'], queryset[size:]
+
+    def test_patient_list(self):
+        self.assertMatchesSerializer(
+            '/patients/?page_size=10', Patient.objects.filter(doctor=self.doctor).order_by('name', 'id'), pages=3
+        )
+
+    def test_patient_list_by_doctor(self):
+        self.assertMatchesSerializer(
+            f'/patients/doc{self.doctor.id}/?page_size=20', Patient.objects.filter(doctor=self.doctor).order_by('name', 'id')
+        )
+
+    def test_search(self):
+        self.assertMatchesSerializer(
+            '/patients/?search=zoe', Patient.objects.filter(name='Zoë Müller'), pages=1
+        )
+
+
+class PatientListPaginationTests(TestCase):
+    """Cursor pagination of the patient lists on (name, id)."""
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.doctor = create_doctor('pager')
+        seed_patients(self.doctor, 7)
+        # Equal names are ordered by id, so the cursor must not skip or repeat them
+        for _ in range(4):
+            Patient.objects.create(name='Same Name', age=30, gender='Male', doctor=self.doctor)
+        _, stranger = create_doctor('stranger')
+        seed_patients(stranger, 5)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        return seen
+
+    def test_pages_cover_the_list_once_in_order(self):
+        expected = list(Patient.objects.filter(doctor=self.doctor).order_by('name', 'id').values_list('id', flat=True))
+        self.assertEqual(self.walk('/patients/?page_size=3'), expected)
+        self.assertEqual(self.walk(f'/patients/doc{self.doctor.id}/?page_size=2'), expected)
+
+    def test_count_and_page_size(self):
+        response = self.client.get('/patients/?page_size=4&count=true')
+        self.assertEqual(response.data['count'], 11)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertNotIn('count', self.client.get('/patients/').data)
+
+    def test_search_results_page_by_rank(self):
+        self.assertEqual(
+            sorted(self.walk('/patients/?search=same&page_size=1')),
+            sorted(Patient.objects.filter(name='Same Name').values_list('id', flat=True)),
+        )
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/patients/?cursor=garbage').status_code, 404)
+        self.assertEqual(self.client.get(f'/patients/doc{self.doctor.id}/?cursor=WzFd').status_code, 404)
+
+
+class PatientSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.doctor = create_doctor('searcher')
+        names = ('Zoë Müller', 'Ánh  Nguyễn', 'Jonathan Smith', 'Jon Smyth', 'Maria Garcia')
+        self.patients = {
+            name: Patient.objects.create(name=name, age=40, gender='Female', doctor=self.doctor) for name in names
+        }
+        Patient.objects.create(name='Male Patient', age=50, gender='Male', doctor=self.doctor)
+        _, stranger = create_doctor('stranger')
+        Patient.objects.create(name='Zoe Muller', age=40, gender='Female', doctor=stranger)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, term):
+        response = self.client.get('/patients/', {'search': term})
+        self.assertEqual(response.status_code, 200, response.content)
+        return {row['name'] for row in response.data['results']}
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name('  Ánh \t Nguyễn '), 'anh nguyen')
+        self.assertEqual(normalize_name('ZOË'), 'zoe')
+        self.assertEqual(normalize_name(None), '')
+
+    def test_migration_normalizer_matches_search(self):
+        migration = import_module('patients.migrations.0004_patient_normalized_name')
+        for name in ('Zoë Müller', '  Ánh \t Nguyễn ', 'ﬁona', 'STRASSE', ''):
+            self.assertEqual(migration.normalize_name(name), normalize_name(name))
+
+    def test_normalized_name_may_outgrow_name(self):
+        # Case folding and compatibility decomposition lengthen a full-length name
+        name = 'Straß' + 'ß' * 90 + 'ﬃ' * 5
+        self.assertEqual(len(name), Patient._meta.get_field('name').max_length)
+        patient = Patient.objects.create(name=name, age=40, gender='Female', doctor=self.doctor)
+        patient.refresh_from_db()
+        self.assertEqual(len(patient.normalized_name), 201)
+        # SQLite does not enforce column lengths, so check the field would hold it elsewhere
+        max_length = Patient._meta.get_field('normalized_name').max_length
+        self.assertLessEqual(len(patient.normalized_name), max_length or len(patient.normalized_name))
+        self.assertEqual(patient.normalized_name, normalize_name(name))
+        self.assertIn(name, self.search('strasssss'))
+
+    def test_accents_and_case_are_ignored(self):
+        self.assertEqual(self.search('zoe muller'), {'Zoë Müller'})
+        self.assertEqual(self.search('ANH'), {'Ánh  Nguyễn'})
+
+    def test_whitespace_is_collapsed(self):
+        self.assertEqual(self.search('  anh   nguyen '), {'Ánh  Nguyễn'})
+
+    def test_gender_keyword(self):
+        self.assertEqual(self.search('male'), {'Male Patient'})
+
+    def test_blank_search_lists_everything(self):
+        self.assertEqual(len(self.search('   ')), 6)
+
+    @skipIf(connection.vendor == 'postgresql', 'PostgreSQL searches by trigram similarity')
+    def test_prefix_fallback(self):
+        self.assertEqual(self.search('jon'), {'Jonathan Smith', 'Jon Smyth'})
+        self.assertEqual(self.search('jonathan'), {'Jonathan Smith'})
+        # Only the start of the name matches without trigrams
+        self.assertEqual(self.search('smith'), set())
+
+    @skipUnless(connection.vendor == 'postgresql', 'typo tolerance needs pg_trgm')
+    def test_typos_and_inner_words_match(self):
+        self.assertIn('Jonathan Smith', self.search('jonathon smith'))
+        self.assertIn('Maria Garcia', self.search('garcia'))
+        self.assertIn('Maria Garcia', self.search('maria garsia'))
+
+    @skipUnless(connection.vendor == 'postgresql', 'ranking needs pg_trgm')
+    def test_closest_match_ranks_first(self):
+        response = self.client.get('/patients/', {'search': 'jon smyth'})
+        self.assertEqual(response.data['results'][0]['name'], 'Jon Smyth')
+
+
+class PatientQueryBudgetTests(QueryCountAssertionsMixin, TestCase):
+    """Query budgets per endpoint, for a client authenticated with a login token."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.doctor = create_doctor('budget')
+        seed_patients(cls.doctor, 30)
+        cls.patient = Patient.objects.filter(doctor=cls.doctor).first()
+
+    def setUp(self):
+        self.client = APIClient()
+        token = ProfileTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_read_budgets(self):
+        budgets = [
+            ('/patients/', 1),
+            ('/patients/?search=patient 01', 1),
+            (f'/patients/doc{self.doctor.id}/', 1),
+            (f'/patients/{self.patient.id}/', 1),
+            ('/patients/export/', 1),
+        ]
+        for url, budget in budgets:
+            with self.subTest(url=url):
+                self.assertQueryBudget('get', url, budget)
 
-# Create your tests here.
+    def test_write_budgets(self):
+        self.assertQueryBudget('post', '/patients/', 1, data={'name': 'New Patient', 'age': 30, 'gender': 'Male'}, format='json')
+        self.assertQueryBudget('patch', f'/patients/{self.patient.id}/', 2, data={'age': 31}, format='json')
+        # savepoint, insert, release
+        self.assertQueryBudget(
+            'post', '/patients/import/', 3, data=b'name,age,gender\nAnother Patient,30,Male\n', content_type='text/csv'
+        )
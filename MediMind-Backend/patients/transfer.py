@@ -0,0 +1,135 @@
+import codecs
+import csv
+import json
+
+from rest_framework import renderers
+from rest_framework.exceptions import ValidationError
+
+from .models import Patient
+from .search import normalize_name
+from .serializers import PatientSerializer
+
+EXPORT_FIELDS = ['id', 'name', 'age', 'gender', 'allergies', 'medical_history']
+IMPORT_FIELDS = ['name', 'age', 'gender', 'allergies', 'medical_history']
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+def read_csv(lines):
+    """Yield one dict per CSV data row from an iterable of text lines."""
+    for row in csv.DictReader(lines):
+        yield {field: row.get(field) for field in IMPORT_FIELDS if row.get(field) is not None}
+
+
+def read_ndjson(lines):
+    """Yield one object per non-blank NDJSON line; unparseable lines yield a ValueError."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield exc
+
+
+def decode_lines(source):
+    # utf-8-sig drops the BOM spreadsheet tools put in front of CSV exports
+    return codecs.iterdecode(iter(source), 'utf-8-sig')
+
+
+class ImportInterrupted(Exception):
+    """The upload could not be read to the end; the rows before that point were saved."""
+
+    def __init__(self, message, created, failed, errors):
+        super().__init__(message)
+        self.created = created
+        self.failed = failed
+        self.errors = errors
+
+
+def import_patients(doctor, rows, chunk_size=CHUNK_SIZE):
+    """
+    Validate rows with `PatientSerializer` rules and insert them for `doctor`.
+
+    Rows are consumed lazily and written with one `bulk_create` per chunk, so memory
+    stays bounded whatever the upload size. Returns `(created, failed, errors)`, where
+    `errors` holds the first MAX_REPORTED_ERRORS failures as `{"row": n, "errors": ...}`
+    with 1-based data row numbers.
+
+    Chunks are committed as they fill up, so if the file turns out not to be UTF-8
+    part-way through, the valid rows read so far are saved and `ImportInterrupted`
+    reports them.
+    """
+    serializer = PatientSerializer(context={})
+    created = failed = 0
+    errors = []
+    batch = []
+
+    try:
+        for number, row in enumerate(rows, start=1):
+            try:
+                if isinstance(row, ValueError):
+                    raise ValidationError({'non_field_errors': [f'Invalid JSON: {row}']})
+                data = serializer.run_validation(row)
+            except ValidationError as exc:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'row': number, 'errors': exc.detail})
+                continue
+
+            batch.append(Patient(doctor=doctor, normalized_name=normalize_name(data['name']), **data))
+            if len(batch) >= chunk_size:
+                Patient.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+    except UnicodeDecodeError:
+        interrupted = True
+    else:
+        interrupted = False
+
+    if batch:
+        Patient.objects.bulk_create(batch)
+        created += len(batch)
+    if interrupted:
+        raise ImportInterrupted(
+            f'The file must be UTF-8 encoded; reading stopped after {created + failed} rows', created, failed, errors
+        )
+    return created, failed, errors
+
+
+class _Echo:
+    """File-like object whose write() hands the value back, for csv.writer in a generator."""
+
+    def write(self, value):
+        return value
+
+
+class PatientCSVRenderer(renderers.BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def stream(self, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            yield writer.writerow(row)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only used for non-streamed responses, i.e. error details
+        writer = csv.writer(_Echo())
+        return writer.writerow(list(data)) + writer.writerow([str(value) for value in data.values()])
+
+
+class PatientNDJSONRenderer(renderers.BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def stream(self, rows):
+        for row in rows:
+            yield json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only used for non-streamed responses, i.e. error details
+        return json.dumps(data) + '\n'
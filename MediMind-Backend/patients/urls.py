@@ -1,10 +1,14 @@
 from django.urls import path
-from .views import PatientListCreateView, PatientDetailView, PatientListByDoctorView
+from .views import (
+    PatientListCreateView, PatientDetailView, PatientListByDoctorView, PatientImportView, PatientExportView,
+)
 
 app_name = 'patients'
 
 urlpatterns = [
     path('', PatientListCreateView.as_view(), name='patient-list-create'),
+    path('import/', PatientImportView.as_view(), name='patient-import'),
+    path('export/', PatientExportView.as_view(), name='patient-export'),
     path('doc<int:doctor>/', PatientListByDoctorView.as_view(), name='patient-list-by-doctor'),
     path('<int:id>/', PatientDetailView.as_view(), name='patient-detail'),
 ]
\ No newline at end of file
@@ -1,34 +1,59 @@
+from django.http import StreamingHttpResponse
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from django.db.models import Q
+from rest_framework.views import APIView
+from MediMind.cache import CachedResponseMixin, invalidate
+from MediMind.listing import ValuesListMixin
+from MediMind.pagination import KeysetPagination
 from .models import Patient
+from .search import search_patients
+from .transfer import (
+    EXPORT_FIELDS, ImportInterrupted, PatientCSVRenderer, PatientNDJSONRenderer, decode_lines, import_patients,
+    read_csv, read_ndjson,
+)
 from .serializers import PatientSerializer, PatientListSerializer
 
 
-class PatientListCreateView(generics.ListCreateAPIView):
+class PatientPagination(KeysetPagination):
+    ordering = ('name', 'id')
+
+
+class RankedPatientPagination(KeysetPagination):
+    ordering = ('-rank', 'id')
+
+
+class PatientListCreateView(CachedResponseMixin, ValuesListMixin, generics.ListCreateAPIView):
     """
-    GET: List all patients
+    GET: List the logged-in doctor's patients (cursor paginated by name, or by rank when searching)
     POST: Create a new patient
     """
     queryset = Patient.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PatientPagination
+    list_fields = PatientListSerializer.Meta.fields
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return PatientListSerializer
         return PatientSerializer
 
+    def get_cache_scopes(self, request):
+        return [f'doctor:{request.user.profile.id}']
+
     def get_queryset(self):
-        queryset = Patient.objects.all()
+        queryset = Patient.objects.filter(doctor=self.request.user.profile)
         search = self.request.query_params.get('search', None)
 
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(gender__icontains=search)
-            )
+            queryset = search_patients(queryset, search)
+
+        return queryset
 
-        return queryset.order_by('name')
+    def paginate_queryset(self, queryset):
+        # Similarity-ranked search results page on (rank, id) instead of (name, id)
+        if 'rank' in queryset.query.annotations:
+            self._paginator = RankedPatientPagination()
+        return super().paginate_queryset(queryset)
 
     def perform_create(self, serializer):
         serializer.save(doctor=self.request.user.profile)
@@ -53,7 +78,7 @@ class PatientListCreateView(generics.ListCreateAPIView):
     #     )
 
 
-class PatientDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PatientDetailView(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET: Retrieve a specific patient
     PUT/PATCH: Update a patient
@@ -64,6 +89,9 @@ class PatientDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'id'
 
+    def get_cache_scopes(self, request):
+        return [f'patient:{self.kwargs["id"]}']
+
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
@@ -96,10 +124,103 @@ class PatientDetailView(generics.RetrieveUpdateDestroyAPIView):
             status=status.HTTP_200_OK
         )
 
-class PatientListByDoctorView(generics.ListAPIView):
+class PatientListByDoctorView(CachedResponseMixin, ValuesListMixin, generics.ListAPIView):
     serializer_class = PatientListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PatientPagination
+    list_fields = PatientListSerializer.Meta.fields
+
+    def get_cache_scopes(self, request):
+        return [f'doctor:{self.kwargs["doctor"]}']
 
     def get_queryset(self):
         doctor_id = self.kwargs['doctor']
         return Patient.objects.filter(doctor=doctor_id)
+
+
+class PatientImportView(APIView):
+    """
+    POST: Import patients for the logged-in doctor from CSV or NDJSON.
+
+    Send the file either as the raw body (`Content-Type: text/csv` or
+    `application/x-ndjson`) or as a multipart upload in the `file` field, in which case
+    the format comes from the file name (`.csv`, `.ndjson`/`.jsonl`). The upload is read
+    row by row and inserted in chunks, so its size is not limited by memory.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        content_type = request.content_type.split(';')[0].strip().lower()
+
+        if content_type == 'multipart/form-data':
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'error': 'No file uploaded in the "file" field'}, status=status.HTTP_400_BAD_REQUEST)
+            source, name = upload, upload.name.lower()
+            is_ndjson = name.endswith(('.ndjson', '.jsonl'))
+            is_csv = name.endswith('.csv')
+        else:
+            source = request.stream
+            is_ndjson = content_type in ('application/x-ndjson', 'application/jsonl')
+            is_csv = content_type == 'text/csv'
+
+        if not (is_csv or is_ndjson) or source is None:
+            return Response(
+                {'error': 'Upload a CSV or NDJSON file'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        lines = decode_lines(source)
+        rows = read_ndjson(lines) if is_ndjson else read_csv(lines)
+        try:
+            created, failed, errors = import_patients(request.user.profile, rows)
+        except ImportInterrupted as exc:
+            # The chunks before the undecodable line are already committed; say so
+            return Response(
+                {
+                    'error': str(exc),
+                    'created': exc.created,
+                    'failed': exc.failed,
+                    'errors': exc.errors,
+                    'errors_truncated': len(exc.errors) < exc.failed,
+                },
+                status=status.HTTP_207_MULTI_STATUS if exc.created else status.HTTP_400_BAD_REQUEST
+            )
+        finally:
+            # bulk_create sends no post_save signals
+            invalidate(f'doctor:{request.user.profile.id}')
+
+        return Response(
+            {
+                'created': created,
+                'failed': failed,
+                'errors': errors,
+                'errors_truncated': len(errors) < failed,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+
+
+class PatientExportView(APIView):
+    """
+    GET: Stream all of the logged-in doctor's patients as CSV (default) or NDJSON
+    (`?format=ndjson` or `Accept: application/x-ndjson`).
+
+    Rows come from a server-side cursor and are written as they are read, so memory
+    use does not depend on the number of patients.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [PatientCSVRenderer, PatientNDJSONRenderer]
+
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        rows = (
+            Patient.objects
+            .filter(doctor=request.user.profile)
+            .order_by('id')
+            .values_list(*EXPORT_FIELDS)
+            .iterator(chunk_size=2000)
+        )
+        response = StreamingHttpResponse(renderer.stream(rows), content_type=f'{renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="patients.{renderer.format}"'
+        return response
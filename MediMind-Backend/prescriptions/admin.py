@@ -2,6 +2,15 @@ from django.contrib import admin
 from .models import Prescription, PrescriptionItem
 
 
+class DoctorListFilter(admin.RelatedFieldListFilter):
+    """Doctor filter whose choices are labelled without a `user` query per doctor."""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        doctors = field.related_model._default_manager.select_related('user').order_by(*ordering)
+        return [(doctor.pk, str(doctor)) for doctor in doctors]
+
+
 class PrescriptionItemInline(admin.TabularInline):
     model = PrescriptionItem
     extra = 1  # Number of empty forms to display
@@ -12,15 +21,17 @@ class PrescriptionItemInline(admin.TabularInline):
 
 @admin.register(Prescription)
 class PrescriptionAdmin(admin.ModelAdmin):
-    list_display = ('id', 'patient', 'doctor', 'prescription_date', 'diagnosis_short')
-    list_filter = ('prescription_date', 'doctor')
+    list_display = ('id', 'patient', 'doctor', 'prescription_date', 'diagnosis_short', 'is_draft')
+    list_filter = ('prescription_date', 'is_draft', ('doctor', DoctorListFilter))
+    # Both are rendered through __str__, and Prescription/UserProfile.__str__ follow doctor.user
+    list_select_related = ('patient', 'doctor__user')
     search_fields = ('patient__name', 'doctor__user__username', 'diagnosis')
     date_hierarchy = 'prescription_date'
     inlines = [PrescriptionItemInline]
 
     fieldsets = (
         ('Prescription Information', {
-            'fields': ('doctor', 'patient')
+            'fields': ('doctor', 'patient', 'is_draft')
         }),
         ('Clinical Information', {
             'fields': ('symptoms', 'diagnosis', 'notes'),
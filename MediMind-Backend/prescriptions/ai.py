@@ -0,0 +1,106 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+import httpx
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+# Upstream statuses that mean the same thing to our clients; anything else is a 502
+PASSTHROUGH_STATUSES = {400, 422, 503, 504}
+
+# One client (and so one connection pool) per event loop, which under ASGI is one per
+# process. WSGI requests use a client of their own instead, see client_for().
+_clients = weakref.WeakKeyDictionary()
+
+
+class AIServiceError(Exception):
+    def __init__(self, status, detail, retry_after=None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def new_client():
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.AI_SERVICE_TIMEOUT, connect=settings.AI_SERVICE_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=settings.AI_SERVICE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_SERVICE_MAX_KEEPALIVE,
+        ),
+    )
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = new_client()
+        _clients[loop] = client
+    return client
+
+
+@asynccontextmanager
+async def client_for(request):
+    """
+    The client to call the AI service with while handling `request`.
+
+    Under ASGI that is the loop's shared client, so connections are kept alive across
+    requests. Under WSGI every async request runs in a short-lived loop of its own, and
+    a client left on it would never be closed, so the request gets a client that is
+    closed when the block ends.
+    """
+    if isinstance(request, ASGIRequest):
+        yield get_client()
+        return
+    async with new_client() as client:
+        yield client
+
+
+async def close_client():
+    """Close the running loop's client, e.g. on shutdown or at the end of a test."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def generate_prescription(patient, symptoms, client=None):
+    """
+    Ask the AI service for a prescription for `patient`.
+
+    Returns the decoded JSON body (`diagnosis`, `notes`, `prescription_items`). Raises
+    `AIServiceError` with the status to answer with when the service is unreachable,
+    times out or returns an error. `client` defaults to the running loop's shared one.
+    """
+    payload = {
+        'name': patient.name,
+        'age': patient.age,
+        'gender': patient.gender,
+        'allergies': patient.allergies or '',
+        'medical_history': patient.medical_history or '',
+        'symptoms': symptoms,
+    }
+    url = f"{settings.AI_SERVICE_URL.rstrip('/')}/generate_prescription"
+    try:
+        response = await (client or get_client()).post(url, json=payload)
+    except httpx.TimeoutException:
+        raise AIServiceError(504, 'AI service timed out')
+    except httpx.TransportError:
+        raise AIServiceError(502, 'AI service unavailable')
+
+    if response.status_code != 200:
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        detail = body.get('error') or body.get('detail') if isinstance(body, dict) else None
+        raise AIServiceError(
+            response.status_code if response.status_code in PASSTHROUGH_STATUSES else 502,
+            detail or f'AI service returned {response.status_code}',
+            response.headers.get('Retry-After'),
+        )
+    try:
+        return response.json()
+    except ValueError:
+        raise AIServiceError(502, 'AI service returned invalid JSON')
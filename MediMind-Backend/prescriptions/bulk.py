@@ -0,0 +1,64 @@
+from datetime import date
+
+from django.db import transaction
+from MediMind.cache import invalidate
+from rest_framework.exceptions import ValidationError
+
+from patients.models import Patient
+from .models import Prescription, PrescriptionItem
+from .serializers import PrescriptionImportSerializer
+
+CHUNK_SIZE = 500
+
+
+def import_prescriptions(doctor, records, chunk_size=CHUNK_SIZE):
+    """
+    Validate and insert many prescriptions with their items for `doctor`.
+
+    Invalid records are skipped and reported as `{"index": i, "errors": {...}}`. Valid
+    ones are written in chunks, each chunk in one transaction with one `bulk_create`
+    for prescriptions and one for items. Returns `(created_ids, errors)`.
+    """
+    patient_ids = set(Patient.objects.filter(doctor=doctor).values_list('id', flat=True))
+    # One serializer validates every record, as ListSerializer does with its child;
+    # building a fresh serializer (and its fields) per record costs more than the inserts
+    serializer = PrescriptionImportSerializer(context={'patient_ids': patient_ids})
+
+    valid, errors = [], []
+    for index, record in enumerate(records):
+        try:
+            valid.append(serializer.run_validation(record))
+        except ValidationError as exc:
+            errors.append({'index': index, 'errors': exc.detail})
+
+    created_ids = []
+    try:
+        for start in range(0, len(valid), chunk_size):
+            created_ids.extend(_insert_chunk(doctor, valid[start:start + chunk_size]))
+    finally:
+        # bulk_create sends no post_save signals
+        if created_ids:
+            invalidate(f'prescriptions:{doctor.id}')
+    return created_ids, errors
+
+
+def _insert_chunk(doctor, chunk):
+    prescriptions = [
+        Prescription(
+            doctor=doctor,
+            patient_id=data['patient'],
+            symptoms=data['symptoms'],
+            diagnosis=data['diagnosis'],
+            notes=data.get('notes'),
+            prescription_date=data.get('prescription_date') or date.today(),
+        )
+        for data in chunk
+    ]
+    with transaction.atomic():
+        Prescription.objects.bulk_create(prescriptions)
+        PrescriptionItem.objects.bulk_create(
+            PrescriptionItem(prescription=prescription, **item)
+            for prescription, data in zip(prescriptions, chunk)
+            for item in data['prescription_items']
+        )
+    return [prescription.id for prescription in prescriptions]
@@ -0,0 +1,261 @@
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from patients.models import Patient
+from prescriptions.models import Prescription, PrescriptionItem
+from .seed_clinic_data import DEFAULT_PASSWORD, DEFAULT_PREFIX, INSTRUCTIONS, MEDICINES
+
+QUERIES_RE = re.compile(r'(?:^|,\s*)db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class DjangoClientSession:
+    """Requests through Django's handler in this process."""
+
+    def __init__(self):
+        self.client = Client()
+
+    def send(self, method, path, data=None, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        body = json.dumps(data) if data is not None else ''
+        response = self.client.generic(method, path, body, content_type='application/json', headers=headers)
+        return response.status_code, response.headers.get('Server-Timing', ''), response.content
+
+    def close(self):
+        pass
+
+
+class HTTPSession:
+    """Requests to a running server, over one kept-alive connection."""
+
+    def __init__(self, url):
+        import httpx
+
+        self.client = httpx.Client(base_url=url, timeout=60)
+
+    def send(self, method, path, data=None, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = self.client.request(method, path, json=data, headers=headers)
+        return response.status_code, response.headers.get('Server-Timing', ''), response.content
+
+    def close(self):
+        self.client.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the frontend\'s request mix (login, /users/me/, patient list, patient detail, prescription '
+        'list, prescription create) as the doctors seeded by seed_clinic_data, at one or more concurrency '
+        'levels, and report per-endpoint p50/p99 latency, throughput and queries per request. Runs '
+        'in-process against the configured database by default, or against a running server with --url.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server (start it with SQL_PROFILER=True for query counts)')
+        parser.add_argument('--concurrency', default='1,8', help='Comma-separated numbers of concurrent sessions')
+        parser.add_argument('--sessions', type=int, default=50, help='Doctor sessions per concurrency level')
+        parser.add_argument('--patients-per-session', type=int, default=3, help='Patients opened per session')
+        parser.add_argument('--create-ratio', type=float, default=0.3, help='Share of opened patients given a new prescription')
+        parser.add_argument('--list-pages', type=int, default=1, help='Patient list pages followed per session')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='Username prefix of the seeded doctors')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD)
+        parser.add_argument('--doctors', type=int, help='Only use the first N seeded doctors (default: all)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        self.options = options
+        levels = [int(level) for level in options['concurrency'].split(',')]
+
+        if options['url']:
+            if not options['doctors']:
+                raise CommandError('--doctors is required with --url')
+            usernames = [f'{options["prefix"]}{i}' for i in range(options['doctors'])]
+            report = {'target': options['url'], 'database': None, 'dataset': None}
+        else:
+            usernames = list(
+                User.objects.filter(username__startswith=options['prefix']).order_by('id')
+                .values_list('username', flat=True)[:options['doctors']]
+            )
+            report = {
+                'target': 'in-process',
+                'database': connection.vendor,
+                'dataset': {
+                    'doctors': len(usernames),
+                    'patients': Patient.objects.count(),
+                    'prescriptions': Prescription.objects.count(),
+                    'items': PrescriptionItem.objects.count(),
+                },
+            }
+        if not usernames:
+            raise CommandError(f'No doctors named {options["prefix"]}*; run seed_clinic_data first')
+
+        report['config'] = {
+            key: options[key] for key in
+            ('sessions', 'patients_per_session', 'create_ratio', 'list_pages', 'seed')
+        }
+        report['levels'] = []
+        # In-process runs profile queries through the same middleware a server would use; its
+        # slow-request log is silenced, as the report covers latency (and every login is "slow")
+        with override_settings(SQL_PROFILER=True, DEBUG=False, SQL_PROFILER_SLOW_REQUEST_MS=float('inf'),
+                               SQL_PROFILER_SLOW_QUERY_MS=float('inf'), SQL_PROFILER_MAX_QUERIES=float('inf')):
+            for concurrency in levels:
+                level = self.run_level(concurrency, usernames)
+                report['levels'].append(level)
+                self.print_level(level)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write('\n')
+
+    def new_session(self):
+        if self.options['url']:
+            return HTTPSession(self.options['url'])
+        return DjangoClientSession()
+
+    def run_level(self, concurrency, usernames):
+        samples = defaultdict(list)  # endpoint -> [(seconds, status, queries)]
+        lock = threading.Lock()
+        sessions = iter(range(self.options['sessions']))
+
+        def record(endpoint, seconds, status, queries):
+            with lock:
+                samples[endpoint].append((seconds, status, queries))
+
+        def worker():
+            client = self.new_session()
+            try:
+                for index in sessions:
+                    rng = random.Random(f'{self.options["seed"]}-{concurrency}-{index}')
+                    self.run_session(client, rng, rng.choice(usernames), record)
+            finally:
+                client.close()
+                if threading.current_thread() is not threading.main_thread():
+                    # Each thread's in-process requests opened its own database connections
+                    connections.close_all()
+
+        started = time.perf_counter()
+        if concurrency == 1:
+            worker()
+        else:
+            threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - started
+
+        endpoints = {}
+        for endpoint, rows in sorted(samples.items()):
+            latencies = [seconds * 1000 for seconds, _, _ in rows]
+            queries = [count for _, _, count in rows if count is not None]
+            endpoints[endpoint] = {
+                'requests': len(rows),
+                'errors': sum(1 for _, status, _ in rows if status is None or status >= 400),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_ms': round(statistics.mean(latencies), 2),
+                'throughput_rps': round(len(rows) / elapsed, 2),
+                'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+            }
+        total = sum(endpoint['requests'] for endpoint in endpoints.values())
+        return {
+            'concurrency': concurrency,
+            'sessions': self.options['sessions'],
+            'requests': total,
+            'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+            'duration_s': round(elapsed, 3),
+            'throughput_rps': round(total / elapsed, 2),
+            'endpoints': endpoints,
+        }
+
+    def run_session(self, client, rng, username, record):
+        """One doctor's visit, in the order the frontend's pages make their requests."""
+
+        def call(endpoint, method, path, data=None, token=None):
+            started = time.perf_counter()
+            try:
+                status, timing, content = client.send(method, path, data, token)
+            except Exception:
+                record(endpoint, time.perf_counter() - started, None, None)
+                return None
+            seconds = time.perf_counter() - started
+            match = QUERIES_RE.search(timing)
+            record(endpoint, seconds, status, int(match.group(1)) if match else None)
+            if status >= 400:
+                return None
+            return json.loads(content) if content else {}
+
+        tokens = call('login', 'POST', '/users/login/', {'username': username, 'password': self.options['password']})
+        if not tokens:
+            return
+        token = tokens['access']
+
+        # Patients page
+        me = call('users.me', 'GET', '/users/me/', token=token)
+        if not me:
+            return
+        patients = []
+        path = f'/patients/doc{me["user"]["id"]}/?page_size=100'
+        for _ in range(self.options['list_pages']):
+            page = call('patients.list', 'GET', path, token=token)
+            if not page:
+                break
+            patients.extend(page['results'])
+            if not page['next']:
+                break
+            path = page['next']
+        if not patients:
+            return
+
+        for patient in rng.sample(patients, min(len(patients), self.options['patients_per_session'])):
+            # Patient page: the patient and their prescriptions
+            call('patients.detail', 'GET', f'/patients/{patient["id"]}/', token=token)
+            call('prescriptions.list', 'GET', f'/prescriptions/?patient={patient["id"]}', token=token)
+
+            if rng.random() < self.options['create_ratio']:
+                # Generate-prescription page, then saving the (AI-written) prescription
+                call('users.me', 'GET', '/users/me/', token=token)
+                call('prescriptions.create', 'POST', '/prescriptions/', {
+                    'patient': patient['id'],
+                    'symptoms': 'Fever and sore throat',
+                    'diagnosis': 'Viral pharyngitis',
+                    'notes': 'Review in one week',
+                    'prescription_items': [
+                        {'medicine': medicine, 'dosage': dosage, 'instructions': rng.choice(INSTRUCTIONS)}
+                        for medicine, dosage in rng.sample(MEDICINES, rng.randint(1, 3))
+                    ],
+                }, token=token)
+
+    def print_level(self, level):
+        self.stdout.write(
+            f'concurrency={level["concurrency"]} requests={level["requests"]} errors={level["errors"]} '
+            f'{level["throughput_rps"]} req/s'
+        )
+        self.stdout.write(f'  {"endpoint":<22} {"n":>6} {"err":>4} {"p50 ms":>8} {"p99 ms":>8} {"req/s":>8} {"queries":>8}')
+        for name, stats in level['endpoints'].items():
+            queries = stats['queries_per_request']
+            self.stdout.write(
+                f'  {name:<22} {stats["requests"]:>6} {stats["errors"]:>4} {stats["p50_ms"]:>8.2f} '
+                f'{stats["p99_ms"]:>8.2f} {stats["throughput_rps"]:>8.2f} {"-" if queries is None else queries:>8}'
+            )
@@ -0,0 +1,115 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from MediMind.renderers import ORJSONRenderer
+from patients.models import Patient
+from patients.serializers import PatientListSerializer
+from patients.views import PatientListCreateView
+from prescriptions.models import Prescription, PrescriptionItem
+from prescriptions.serializers import PrescriptionSerializer
+from prescriptions.views import PrescriptionListCreateView
+from users.models import UserProfile
+
+BENCH_USERNAME = 'benchmark-serialization'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the cost of building and rendering list rows with the ModelSerializers '
+        '(and DRF\'s JSONRenderer) against the .values() read path (and the orjson renderer). '
+        'Seeds rows under a scratch doctor account and removes it afterwards unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Patients and prescriptions per run')
+        parser.add_argument('--items', type=int, default=3, help='Items per prescription')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per case (the median is reported)')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'email': 'bench@example.com'})
+        doctor, _ = UserProfile.objects.get_or_create(user=user, defaults={'license_number': BENCH_USERNAME})
+
+        try:
+            self.seed(doctor, rows, options['items'])
+            patients = Patient.objects.filter(doctor=doctor).order_by('name', 'id')[:rows]
+            prescriptions = Prescription.objects.filter(doctor=doctor).order_by('-prescription_date', '-id')[:rows]
+            patient_view = PatientListCreateView()
+            prescription_view = PrescriptionListCreateView()
+
+            cases = [
+                ('patients', 'serializer',
+                 lambda: PatientListSerializer(patients, many=True).data, JSONRenderer()),
+                ('patients', 'values',
+                 lambda: self.values_rows(patient_view, patients), ORJSONRenderer()),
+                ('prescriptions', 'serializer',
+                 lambda: PrescriptionSerializer(prescriptions.prefetch_related('prescription_items'), many=True).data,
+                 JSONRenderer()),
+                ('prescriptions', 'values',
+                 lambda: self.values_rows(prescription_view, prescriptions), ORJSONRenderer()),
+            ]
+
+            self.stdout.write(f'Median ms per 1k rows over {options["repeat"]} runs of {rows} rows')
+            self.stdout.write(f'{"endpoint":<14} {"path":<11} {"build":>8} {"render":>8} {"total":>8} {"bytes":>9}')
+            outputs = {}
+            for endpoint, path, build, renderer in cases:
+                build_ms, render_ms, body = self.measure(build, renderer, options['repeat'])
+                outputs.setdefault(endpoint, set()).add(body)
+                per_1k = 1000 / rows
+                self.stdout.write(
+                    f'{endpoint:<14} {path:<11} {build_ms * per_1k:>8.2f} {render_ms * per_1k:>8.2f} '
+                    f'{(build_ms + render_ms) * per_1k:>8.2f} {len(body):>9}'
+                )
+            for endpoint, bodies in outputs.items():
+                if len(bodies) != 1:
+                    self.stderr.write(f'{endpoint}: the two paths rendered different output')
+        finally:
+            if not options['keep']:
+                user.delete()
+
+    @staticmethod
+    def values_rows(view, queryset):
+        # ValuesListMixin.list() without the request and pagination
+        rows = list(queryset.values(*view.list_fields))
+        view.finish_rows(rows, queryset.model)
+        return rows
+
+    @staticmethod
+    def measure(build, renderer, repeat):
+        build_times, render_times = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = build()
+            built = time.perf_counter()
+            body = renderer.render(data)
+            build_times.append((built - started) * 1000)
+            render_times.append((time.perf_counter() - built) * 1000)
+        return statistics.median(build_times), statistics.median(render_times), body
+
+    def seed(self, doctor, rows, items):
+        missing = rows - Patient.objects.filter(doctor=doctor).count()
+        if missing > 0:
+            Patient.objects.bulk_create(
+                Patient(name=f'Bench Patient {i:06d}', age=i % 90, gender='Other',
+                        allergies='Pollen' if i % 3 else None, doctor=doctor)
+                for i in range(missing)
+            )
+        missing = rows - Prescription.objects.filter(doctor=doctor).count()
+        if missing > 0:
+            patient_ids = list(Patient.objects.filter(doctor=doctor).values_list('id', flat=True))
+            created = Prescription.objects.bulk_create(
+                Prescription(doctor=doctor, patient_id=patient_ids[i % len(patient_ids)], symptoms='Fever and cough',
+                             diagnosis='Viral infection', notes='Rest' if i % 2 else None)
+                for i in range(missing)
+            )
+            PrescriptionItem.objects.bulk_create(
+                PrescriptionItem(prescription=prescription, medicine=f'Medicine {j}', dosage='1 tablet',
+                                 instructions='After food')
+                for prescription in created
+                for j in range(items)
+            )
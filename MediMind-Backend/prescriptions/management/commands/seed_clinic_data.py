@@ -0,0 +1,158 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from patients.models import Patient
+from patients.sample_data import GENDERS, random_name
+from patients.search import normalize_name
+from prescriptions.models import Prescription, PrescriptionItem
+from users.models import SPECIALIZATIONS, UserProfile
+
+DEFAULT_PREFIX = 'bench-doctor-'
+DEFAULT_PASSWORD = 'medimind-bench'
+
+SYMPTOMS = [
+    'Fever and sore throat', 'Dry cough for a week', 'Headache and dizziness', 'Lower back pain',
+    'Itchy skin rash', 'Shortness of breath on exertion', 'Burning urination', 'Joint pain and swelling',
+    'Abdominal pain after meals', 'Fatigue and weight loss',
+]
+DIAGNOSES = [
+    'Viral pharyngitis', 'Acute bronchitis', 'Tension headache', 'Lumbar strain', 'Contact dermatitis',
+    'Mild persistent asthma', 'Urinary tract infection', 'Osteoarthritis', 'Gastritis', 'Iron deficiency anaemia',
+]
+MEDICINES = [
+    ('Paracetamol 500mg', '1 tablet every 6 hours'), ('Amoxicillin 500mg', '1 capsule three times a day'),
+    ('Cetirizine 10mg', '1 tablet at night'), ('Ibuprofen 400mg', '1 tablet twice a day'),
+    ('Omeprazole 20mg', '1 capsule before breakfast'), ('Salbutamol inhaler', '2 puffs as needed'),
+    ('Nitrofurantoin 100mg', '1 capsule twice a day'), ('Ferrous sulfate 200mg', '1 tablet daily'),
+]
+INSTRUCTIONS = ['After food', 'Before food', 'With plenty of water', 'For 5 days', 'Stop if rash appears']
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic clinic (doctors with login accounts, patients, prescriptions and items) with '
+        'bulk inserts, for benchmarks. Doctors log in as <prefix><n> with --password. '
+        'Use an empty database: rows are only added, never updated.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=100)
+        parser.add_argument('--patients', type=int, default=1_000_000, help='Total patients, spread over the doctors')
+        parser.add_argument('--prescriptions', type=int, default=5_000_000, help='Total prescriptions')
+        parser.add_argument('--max-items', type=int, default=4, help='Items per prescription are 1..N')
+        parser.add_argument('--days', type=int, default=730, help='Prescription dates span this many past days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='Doctor username prefix')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of every seeded doctor')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['doctors'] < 1:
+            raise CommandError('--doctors must be at least 1')
+        if User.objects.filter(username__startswith=options['prefix']).exists():
+            raise CommandError(
+                f'Doctors named {options["prefix"]}* already exist; seed an empty database or use another --prefix'
+            )
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        started = time.perf_counter()
+        doctors = self.seed_doctors(options['doctors'], options['prefix'], options['password'])
+        patients = self.seed_patients(doctors, options['patients'])
+        self.seed_prescriptions(patients, options['prescriptions'], options['max_items'], options['days'])
+
+        if connection.vendor in ('postgresql', 'sqlite'):
+            # Fresh statistics, so the planner picks the indexes at this size
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {time.perf_counter() - started:.1f}s'))
+
+    def seed_doctors(self, count, prefix, password):
+        # Hashing is deliberately slow, and every seeded doctor shares the password
+        password_hash = make_password(password)
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password_hash,
+                     first_name='Bench', last_name=f'Doctor {i}')
+                for i in range(count)
+            )
+            profiles = UserProfile.objects.bulk_create(
+                UserProfile(user=user, specialization=SPECIALIZATIONS[i % len(SPECIALIZATIONS)][0],
+                            license_number=f'{prefix.upper()}{i}')
+                for i, user in enumerate(users)
+            )
+        self.stdout.write(f'doctors        {count:>10}')
+        return profiles
+
+    def seed_patients(self, doctors, total):
+        """Returns each doctor's patient ids, for the prescriptions to pick from."""
+        ids = {doctor.id: [] for doctor in doctors}
+
+        def rows():
+            for i in range(total):
+                name = random_name(self.rng)
+                yield Patient(
+                    name=name, normalized_name=normalize_name(name), age=self.rng.randint(0, 95),
+                    gender=self.rng.choice(GENDERS), allergies=self.rng.choice([None, None, 'Penicillin', 'Pollen']),
+                    doctor=doctors[i % len(doctors)],
+                )
+
+        for batch in self.insert(Patient, rows(), total, 'patients'):
+            for patient in batch:
+                ids[patient.doctor_id].append(patient.id)
+        return ids
+
+    def seed_prescriptions(self, patients, total, max_items, days):
+        doctor_ids = [doctor_id for doctor_id, patient_ids in patients.items() if patient_ids]
+        if not doctor_ids:
+            return
+        today = timezone.localdate()
+
+        def rows():
+            for i in range(total):
+                doctor_id = doctor_ids[i % len(doctor_ids)]
+                case = self.rng.randrange(len(SYMPTOMS))
+                yield Prescription(
+                    doctor_id=doctor_id, patient_id=self.rng.choice(patients[doctor_id]),
+                    prescription_date=today - timedelta(days=self.rng.randrange(days)),
+                    symptoms=SYMPTOMS[case], diagnosis=DIAGNOSES[case],
+                    notes=self.rng.choice([None, 'Review in one week', 'Drink plenty of fluids']),
+                )
+
+        item_count = 0
+        for batch in self.insert(Prescription, rows(), total, 'prescriptions'):
+            items = [
+                PrescriptionItem(prescription=prescription, medicine=medicine, dosage=dosage,
+                                 instructions=self.rng.choice(INSTRUCTIONS))
+                for prescription in batch
+                for medicine, dosage in self.rng.sample(MEDICINES, self.rng.randint(1, max_items))
+            ]
+            PrescriptionItem.objects.bulk_create(items, batch_size=self.batch_size)
+            item_count += len(items)
+        self.stdout.write(f'items          {item_count:>10}')
+
+    def insert(self, model, rows, total, label):
+        """bulk_create `rows` one transaction per batch, yielding each saved batch."""
+        started, done, reported = time.perf_counter(), 0, 0
+        while done < total:
+            batch = [row for _, row in zip(range(self.batch_size), rows)]
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+                yield batch
+            done += len(batch)
+            # Progress about every 10%
+            if done == total or done - reported >= total / 10:
+                reported = done
+                self.stdout.write(
+                    f'{label:<14} {done:>10} / {total} ({done / (time.perf_counter() - started):,.0f} rows/s)'
+                )
+
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0005_patient_doctor_name_index'),
+        ('prescriptions', '0001_initial'),
+        ('users', '0002_alter_userprofile_specialization'),
+    ]
+
+    operations = [
+        # Build the composite indexes before dropping the single-column FK indexes they replace
+        migrations.AddIndex(
+            model_name='prescription',
+            index=models.Index(fields=['doctor', '-prescription_date', '-id'], name='prescription_doctor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prescription',
+            index=models.Index(fields=['patient', '-prescription_date', '-id'], name='prescription_patient_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prescriptionitem',
+            index=models.Index(fields=['prescription', 'id'], name='item_prescription_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prescriptionitem',
+            index=models.Index(fields=['medicine'], name='item_medicine_idx'),
+        ),
+        migrations.AlterField(
+            model_name='prescription',
+            name='doctor',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='prescriptions', to='users.userprofile', verbose_name='doctor'),
+        ),
+        migrations.AlterField(
+            model_name='prescription',
+            name='patient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='prescriptions', to='patients.patient', verbose_name='patient'),
+        ),
+        migrations.AlterField(
+            model_name='prescriptionitem',
+            name='prescription',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='prescription_items', to='prescriptions.prescription'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prescriptions', '0002_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prescription',
+            name='is_draft',
+            field=models.BooleanField(default=False),
+        ),
+    ]
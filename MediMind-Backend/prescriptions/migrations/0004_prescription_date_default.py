@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:54
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prescriptions', '0003_prescription_is_draft'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='prescription',
+            name='prescription_date',
+            field=models.DateField(default=datetime.date.today, editable=False, verbose_name='prescription.date'),
+        ),
+    ]
@@ -1,20 +1,33 @@
+from datetime import date
+
 from django.db import models
 
 
 class Prescription(models.Model):
-    prescription_date = models.DateField(auto_now_add=True, verbose_name='prescription.date')
+    # Today unless given, so bulk imports and seeding can keep historical dates (auto_now_add would overwrite them)
+    prescription_date = models.DateField(default=date.today, editable=False, verbose_name='prescription.date')
 
     #doctor information
-    doctor = models.ForeignKey('users.UserProfile', on_delete=models.CASCADE, related_name='prescriptions', verbose_name='doctor')
+    doctor = models.ForeignKey('users.UserProfile', on_delete=models.CASCADE, related_name='prescriptions', verbose_name='doctor', db_index=False)
 
     #patient information
-    patient = models.ForeignKey('patients.Patient', on_delete=models.CASCADE, related_name='prescriptions', verbose_name='patient')
+    patient = models.ForeignKey('patients.Patient', on_delete=models.CASCADE, related_name='prescriptions', verbose_name='patient', db_index=False)
 
     #clinical information
     symptoms = models.TextField(verbose_name='clinical.symptoms')
     diagnosis = models.TextField(verbose_name='clinical.diagnosis')
     notes = models.TextField(blank=True, null=True, verbose_name='clinical.notes')
 
+    # Generated prescriptions can be saved for the doctor to review before they are final
+    is_draft = models.BooleanField(default=False)
+
+    class Meta:
+        # doctor/patient are indexed through these, matching the list endpoints' filter + ordering
+        indexes = [
+            models.Index(fields=['doctor', '-prescription_date', '-id'], name='prescription_doctor_date_idx'),
+            models.Index(fields=['patient', '-prescription_date', '-id'], name='prescription_patient_date_idx'),
+        ]
+
     def __str__(self):
         return f"Prescription for {self.patient.name} by Dr. {self.doctor.user.username} on {self.prescription_date}."
 
@@ -24,10 +37,16 @@ class Prescription(models.Model):
 
 
 class PrescriptionItem(models.Model):
-    prescription = models.ForeignKey(Prescription, on_delete=models.CASCADE, related_name='prescription_items')
+    prescription = models.ForeignKey(Prescription, on_delete=models.CASCADE, related_name='prescription_items', db_index=False)
     medicine = models.CharField(max_length=100)
     dosage = models.CharField(max_length=100)
     instructions = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['prescription', 'id'], name='item_prescription_idx'),
+            models.Index(fields=['medicine'], name='item_medicine_idx'),
+        ]
+
     def __str__(self):
         return f"{self.medicine} - {self.dosage} ({self.prescription.patient_name})"
\ No newline at end of file
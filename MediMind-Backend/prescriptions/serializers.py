@@ -1,4 +1,6 @@
+from django.db import transaction
 from rest_framework import serializers
+from MediMind.profiling import ProfiledSerializerMixin
 from .models import Prescription, PrescriptionItem
 from django.contrib.auth import get_user_model
 from patients.models import Patient
@@ -10,7 +12,7 @@ class PrescriptionItemSerializer(serializers.ModelSerializer):
         model = PrescriptionItem
         fields = ['medicine', 'dosage', 'instructions']
 
-class PrescriptionSerializer(serializers.ModelSerializer):
+class PrescriptionSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     prescription_items = PrescriptionItemSerializer(many=True)
     doctor = serializers.HiddenField(default=serializers.CurrentUserDefault())
     patient = serializers.PrimaryKeyRelatedField(queryset=Patient.objects.all())
@@ -19,13 +21,51 @@ class PrescriptionSerializer(serializers.ModelSerializer):
         model = Prescription
         fields = [
             'id', 'prescription_date', 'doctor', 'patient',
-            'symptoms', 'diagnosis', 'notes', 'prescription_items'
+            'symptoms', 'diagnosis', 'notes', 'is_draft', 'prescription_items'
         ]
         read_only_fields = ['id', 'prescription_date', 'doctor']
 
     def create(self, validated_data):
         items_data = validated_data.pop('prescription_items')
-        prescription = Prescription.objects.create(**validated_data)
-        for item in items_data:
-            PrescriptionItem.objects.create(prescription=prescription, **item)
+        with transaction.atomic():
+            prescription = Prescription.objects.create(**validated_data)
+            PrescriptionItem.objects.bulk_create(
+                PrescriptionItem(prescription=prescription, **item) for item in items_data
+            )
         return prescription
+
+
+class PrescriptionImportSerializer(serializers.ModelSerializer):
+    """
+    One record of a bulk import. `patient` is a plain id checked against the doctor's
+    patients in the `patient_ids` context (one query per request instead of one per
+    record), and `prescription_date` may be given for historical data.
+    """
+    prescription_items = PrescriptionItemSerializer(many=True)
+    patient = serializers.IntegerField()
+    prescription_date = serializers.DateField(required=False)
+
+    class Meta:
+        model = Prescription
+        fields = ['prescription_date', 'patient', 'symptoms', 'diagnosis', 'notes', 'prescription_items']
+
+    def validate_patient(self, value):
+        if value not in self.context['patient_ids']:
+            raise serializers.ValidationError(f'Invalid pk "{value}" - object does not exist.')
+        return value
+
+
+class PrescriptionGenerateSerializer(serializers.Serializer):
+    """Input of POST /prescriptions/generate/; the limits match the AI service's."""
+    patient = serializers.IntegerField()
+    symptoms = serializers.CharField(max_length=4000)
+    draft = serializers.BooleanField(default=False)
+
+
+class GeneratedPrescriptionSerializer(serializers.ModelSerializer):
+    """The AI service's answer, checked against the model's field limits before saving."""
+    prescription_items = PrescriptionItemSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = Prescription
+        fields = ['diagnosis', 'notes', 'prescription_items']
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from MediMind.cache import invalidate_on_commit
+from .models import Prescription, PrescriptionItem
+
+
+@receiver([post_save, post_delete], sender=Prescription)
+def invalidate_prescription_responses(sender, instance, **kwargs):
+    invalidate_on_commit(f'prescriptions:{instance.doctor_id}')
+
+
+@receiver([post_save, post_delete], sender=PrescriptionItem)
+def invalidate_prescription_item_responses(sender, instance, **kwargs):
+    if PrescriptionItem.prescription.is_cached(instance):
+        doctor_id = instance.prescription.doctor_id
+    else:
+        doctor_id = Prescription.objects.filter(pk=instance.prescription_id).values_list('doctor_id', flat=True).first()
+    if doctor_id is not None:
+        invalidate_on_commit(f'prescriptions:{doctor_id}')
@@ -1,3 +1,497 @@
-from django.test import TestCase
+import json
+import os
+import socket
+import tempfile
+from datetime import date
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, models
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from MediMind.testing import QueryCountAssertionsMixin, QueryPlanAssertionsMixin
+from MediMind.testing.stub_ai import StubAIServer
+from patients.models import Patient
+from patients.tests import create_doctor, seed_patients
+from users.serializers import ProfileTokenObtainPairSerializer
+from . import ai
+from .bulk import import_prescriptions
+from .models import Prescription, PrescriptionItem
+from .serializers import PrescriptionSerializer
+
+
+def seed_prescriptions(doctor, per_patient):
+    prescriptions = Prescription.objects.bulk_create(
+        Prescription(doctor=doctor, patient=patient, symptoms='cough', diagnosis='cold')
+        for patient in Patient.objects.filter(doctor=doctor)
+        for _ in range(per_patient)
+    )
+    PrescriptionItem.objects.bulk_create(
+        PrescriptionItem(prescription=prescription, medicine=f'Medicine {i}', dosage='1 tab', instructions='After food')
+        for prescription in prescriptions
+        for i in range(2)
+    )
+
+
+class PrescriptionListQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.doctor = create_doctor('planner')
+        _, other = create_doctor('other')
+        for doctor in (cls.doctor, other):
+            seed_patients(doctor, 100)
+            seed_prescriptions(doctor, 5)
+        cls.patient = Patient.objects.filter(doctor=cls.doctor).first()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_prescription_list_uses_doctor_date_index(self):
+        queries = self.capture_queries('get', '/prescriptions/?page_size=20')
+        self.assertIndexScan(self.query_for_table(queries, 'prescriptions_prescription'), 'prescription_doctor_date_idx')
+
+    def test_patient_filter_uses_a_date_ordered_index(self):
+        queries = self.capture_queries('get', f'/prescriptions/?patient={self.patient.id}')
+        self.assertIndexScan(
+            self.query_for_table(queries, 'prescriptions_prescription'),
+            'prescription_patient_date_idx', 'prescription_doctor_date_idx',
+        )
+
+    def test_items_prefetch_uses_prescription_index(self):
+        queries = self.capture_queries('get', '/prescriptions/?page_size=20')
+        self.assertIndexScan(self.query_for_table(queries, 'prescriptions_prescriptionitem'), 'item_prescription_idx')
+
+    def test_medicine_lookup_uses_medicine_index(self):
+        sql = self.queryset_sql(PrescriptionItem.objects.filter(medicine='Medicine 1'))
+        self.assertIndexScan(sql, 'item_medicine_idx')
+
+
+class PrescriptionAdminQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='admin', is_staff=True, is_superuser=True))
+
+    def test_changelist_query_count_is_constant(self):
+        def add_doctor(username, patients):
+            _, doctor = create_doctor(username)
+            seed_patients(doctor, patients)
+            seed_prescriptions(doctor, 2)
+
+        add_doctor('first', 2)
+
+        def add_rows():
+            for i in range(5):
+                add_doctor(f'more{i}', 4)
+
+        self.assertQueryCountIndependentOfRows(reverse('admin:prescriptions_prescription_changelist'), add_rows)
+
+
+class PrescriptionListOutputTests(TestCase):
+    """The `.values()` list path and orjson renderer give the serializer's exact bytes."""
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.doctor = create_doctor('lister')
+        seed_patients(self.doctor, 6)
+        seed_prescriptions(self.doctor, 3)
+        patient = Patient.objects.filter(doctor=self.doctor).first()
+        Prescription.objects.create(
+            doctor=self.doctor, patient=patient, symptoms='Fièvre, toux', diagnosis='Grippe\u2029', is_draft=True
+        )
+        Prescription.objects.create(doctor=self.doctor, patient=patient, symptoms='none', diagnosis='Healthy', notes='Ok')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_prescription_list(self):
+        url = '/prescriptions/?page_size=7'
+        queryset = (
+            Prescription.objects.filter(doctor=self.doctor)
+            .order_by('-prescription_date', '-id')
+            .prefetch_related('prescription_items')
+        )
+        while url:
+            response = self.client.get(url)
+            size = len(response.data['results'])
+            expected = JSONRenderer().render({
+                'next': response.data['next'],
+                'results': PrescriptionSerializer(queryset[:size], many=True).data,
+            })
+            self.assertEqual(response.content, expected)
+            url, queryset = response.data['next'], queryset[size:]
+
+    def test_items_are_fetched_in_one_query(self):
+        with self.assertNumQueries(2):  # the page and its items
+            response = self.client.get('/prescriptions/?page_size=20')
+        self.assertEqual(len(response.data['results']), 20)
+
+
+class PrescriptionListFilterTests(TestCase):
+    """Cursor pagination and the patient/date filters of the prescription list."""
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.doctor = create_doctor('filterer')
+        seed_patients(self.doctor, 2)
+        self.patient, self.other_patient = Patient.objects.filter(doctor=self.doctor).order_by('id')
+        for day in range(1, 6):
+            for patient in (self.patient, self.other_patient):
+                prescription = Prescription.objects.create(
+                    doctor=self.doctor, patient=patient, symptoms='cough', diagnosis='cold'
+                )
+                Prescription.objects.filter(pk=prescription.pk).update(prescription_date=date(2024, 1, day))
+        _, stranger = create_doctor('stranger')
+        seed_patients(stranger, 1)
+        seed_prescriptions(stranger, 3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['id'] for row in response.data['results']]
+
+    def test_cursor_pages_cover_the_list_once_in_order(self):
+        expected = list(
+            Prescription.objects.filter(doctor=self.doctor)
+            .order_by('-prescription_date', '-id').values_list('id', flat=True)
+        )
+        seen, url = [], '/prescriptions/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data['results']), 3)
+            self.assertNotIn('count', response.data)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+
+    def test_page_size_is_capped_and_defaulted(self):
+        seed_prescriptions(self.doctor, 60)
+        self.assertEqual(len(self.ids('/prescriptions/?page_size=1000')), 100)
+        self.assertEqual(len(self.ids('/prescriptions/?page_size=0')), 20)
+        self.assertEqual(len(self.ids('/prescriptions/?page_size=abc')), 20)
+
+    def test_count_only_when_asked(self):
+        response = self.client.get('/prescriptions/?page_size=2&count=true')
+        self.assertEqual(response.data['count'], 10)
+        self.assertEqual(len(response.data['results']), 2)
+        # The count is for the filtered list, not the page
+        response = self.client.get(f'/prescriptions/?patient={self.patient.id}&count=1')
+        self.assertEqual(response.data['count'], 5)
+
+    def test_patient_filter(self):
+        ids = self.ids(f'/prescriptions/?patient={self.patient.id}')
+        self.assertEqual(set(ids), set(self.patient.prescriptions.values_list('id', flat=True)))
+        self.assertEqual(self.client.get('/prescriptions/?patient=abc').status_code, 400)
+
+    def test_date_filters_are_inclusive(self):
+        ids = self.ids('/prescriptions/?date_from=2024-01-02&date_to=2024-01-03')
+        expected = Prescription.objects.filter(
+            doctor=self.doctor, prescription_date__range=(date(2024, 1, 2), date(2024, 1, 3))
+        )
+        self.assertEqual(set(ids), set(expected.values_list('id', flat=True)))
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(len(self.ids(f'/prescriptions/?patient={self.patient.id}&date_from=2024-01-05')), 1)
+
+    def test_invalid_date_is_rejected(self):
+        response = self.client.get('/prescriptions/?date_from=2024-13-01')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date_from', response.data)
+        self.assertEqual(self.client.get('/prescriptions/?date_to=yesterday').status_code, 400)
+
+    def test_filters_carry_over_to_next_page(self):
+        url = f'/prescriptions/?patient={self.patient.id}&page_size=2'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            seen += [row['patient'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, [self.patient.id] * 5)
+
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ('not-base64!', 'bm90IGpzb24=', 'WzFd'):  # garbage, "not json", [1]
+            response = self.client.get(f'/prescriptions/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+class PrescriptionGenerateTests(TestCase):
+    url = '/prescriptions/generate/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.doctor = create_doctor('generator')
+        _, other = create_doctor('other')
+        cls.patient = Patient.objects.create(
+            name='Ravi Kumar', age=42, gender='Male', allergies='Penicillin', doctor=cls.doctor
+        )
+        cls.other_patient = Patient.objects.create(name='Someone Else', age=30, gender='Female', doctor=other)
+        cls.token = str(ProfileTokenObtainPairSerializer.get_token(cls.user).access_token)
+
+    def setUp(self):
+        self.stub = StubAIServer().start()
+        self.addCleanup(self.stub.stop)
+        override = self.settings(AI_SERVICE_URL=self.stub.url)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    async def generate(self, token=None, **data):
+        response = await self.async_client.post(
+            self.url, {'patient': self.patient.id, 'symptoms': 'fever, cough', **data},
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {token or self.token}'},
+        )
+        await ai.close_client()
+        return response
+
+    async def test_generates_and_saves_prescription(self):
+        response = await self.generate()
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['patient'], self.patient.id)
+        self.assertEqual(data['symptoms'], 'fever, cough')
+        self.assertFalse(data['is_draft'])
+        self.assertEqual(len(data['prescription_items']), 2)
+        self.assertIn('ai;dur=', response['Server-Timing'])
+
+        prescription = await Prescription.objects.aget(pk=data['id'])
+        self.assertEqual(prescription.doctor_id, self.doctor.id)
+        self.assertEqual(await prescription.prescription_items.acount(), 2)
+        self.assertEqual(self.stub.requests[0]['payload'], {
+            'name': 'Ravi Kumar', 'age': 42, 'gender': 'Male', 'allergies': 'Penicillin',
+            'medical_history': '', 'symptoms': 'fever, cough',
+        })
+
+    async def test_saves_draft(self):
+        response = await self.generate(draft=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue((await Prescription.objects.aget(pk=response.json()['id'])).is_draft)
+
+    async def test_reuses_ai_connection(self):
+        for _ in range(3):
+            response = await self.async_client.post(
+                self.url, {'patient': self.patient.id, 'symptoms': 'fever'},
+                content_type='application/json', headers={'Authorization': f'Bearer {self.token}'},
+            )
+            self.assertEqual(response.status_code, 201)
+        await ai.close_client()
+        self.assertEqual(len({request['client'] for request in self.stub.requests}), 1)
+
+    def test_wsgi_requests_close_their_ai_client(self):
+        # The sync test client goes through the WSGI handler, which runs the view in a
+        # throwaway event loop per request
+        clients = []
+
+        def new_client():
+            clients.append(original())
+            return clients[-1]
+
+        original = ai.new_client
+        with mock.patch.object(ai, 'new_client', new_client):
+            for _ in range(2):
+                response = self.client.post(
+                    self.url, {'patient': self.patient.id, 'symptoms': 'fever'},
+                    content_type='application/json', headers={'Authorization': f'Bearer {self.token}'},
+                )
+                self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(clients), 2)
+        self.assertTrue(all(client.is_closed for client in clients))
+        self.assertEqual(len(ai._clients), 0)
+
+    async def test_ai_errors_are_passed_on_and_nothing_is_saved(self):
+        self.stub.status, self.stub.body = 503, {'error': 'LLM is busy'}
+        self.stub.headers = {'Retry-After': '5'}
+        response = await self.generate()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'error': 'LLM is busy'})
+        self.assertEqual(response['Retry-After'], '5')
+
+        self.stub.status, self.stub.headers = 500, {}
+        self.assertEqual((await self.generate()).status_code, 502)
+        self.assertEqual(await Prescription.objects.acount(), 0)
+
+    async def test_invalid_ai_answer_is_not_saved(self):
+        self.stub.body = {'diagnosis': 'Cold', 'notes': '', 'prescription_items': [{'medicine': 'x' * 200}]}
+        response = await self.generate()
+        self.assertEqual(response.status_code, 502)
+        self.assertIn('prescription_items', response.json()['details'])
+        self.assertEqual(await Prescription.objects.acount(), 0)
+
+    async def test_unreachable_ai_service(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        with self.settings(AI_SERVICE_URL=f'http://127.0.0.1:{port}'):
+            response = await self.generate()
+        self.assertEqual(response.status_code, 502)
+
+    async def test_rejects_other_doctors_patient_without_calling_ai(self):
+        response = await self.generate(patient=self.other_patient.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('patient', response.json())
+        self.assertEqual(self.stub.requests, [])
+
+    async def test_requires_authentication_and_valid_input(self):
+        response = await self.async_client.post(self.url, {}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+        response = await self.generate(symptoms='')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('symptoms', response.json())
+
+
+class PrescriptionQueryBudgetTests(QueryCountAssertionsMixin, TestCase):
+    """Query budgets per endpoint, for a client authenticated with a login token."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.doctor = create_doctor('budget')
+        seed_patients(cls.doctor, 10)
+        seed_prescriptions(cls.doctor, 3)
+        cls.patient = Patient.objects.filter(doctor=cls.doctor).first()
+
+    def setUp(self):
+        self.client = APIClient()
+        token = ProfileTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def record(self):
+        return {
+            'patient': self.patient.id, 'symptoms': 'cough', 'diagnosis': 'cold',
+            'prescription_items': [{'medicine': f'Medicine {i}', 'dosage': '1 tab', 'instructions': 'After food'}
+                                   for i in range(3)],
+        }
+
+    def test_read_budgets(self):
+        # the page and its items, whatever the page size
+        for url in ('/prescriptions/', f'/prescriptions/?patient={self.patient.id}', '/prescriptions/?page_size=100'):
+            with self.subTest(url=url):
+                self.assertQueryBudget('get', url, 2)
+
+    def test_write_budgets(self):
+        # patient lookup, savepoint, prescription, items, release, then the items again for the response
+        self.assertQueryBudget('post', '/prescriptions/', 6, data=self.record(), format='json')
+        # doctor's patient ids, then per chunk: savepoint, prescriptions, items, release
+        self.assertQueryBudget('post', '/prescriptions/bulk/', 5, data=[self.record()] * 50, format='json')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class PrescriptionBulkCreateTests(TestCase):
+    url = '/prescriptions/bulk/'
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.doctor = create_doctor('importer')
+        seed_patients(self.doctor, 2)
+        self.patient = Patient.objects.filter(doctor=self.doctor).first()
+        _, stranger = create_doctor('stranger')
+        seed_patients(stranger, 1)
+        self.strangers_patient = Patient.objects.get(doctor=stranger)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def record(self, **overrides):
+        return {
+            'patient': self.patient.id, 'symptoms': 'cough', 'diagnosis': 'cold',
+            'prescription_items': [{'medicine': 'Paracetamol', 'dosage': '1 tab', 'instructions': 'After food'}],
+            **overrides,
+        }
+
+    def post(self, records):
+        return self.client.post(self.url, records, format='json')
+
+    def test_creates_all_with_items_and_dates(self):
+        response = self.post([self.record(prescription_date='2020-02-29'), self.record(notes='Rest')])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['errors'], [])
+        historical, current = Prescription.objects.filter(pk__in=response.data['ids']).order_by('id')
+        self.assertEqual(historical.prescription_date, date(2020, 2, 29))
+        self.assertEqual(current.prescription_date, date.today())
+        self.assertEqual(current.notes, 'Rest')
+        self.assertEqual(PrescriptionItem.objects.filter(prescription__in=[historical, current]).count(), 2)
+
+    def test_partial_failure_saves_valid_records(self):
+        response = self.post([
+            self.record(),
+            self.record(patient=self.strangers_patient.id),
+            self.record(prescription_items=[{'medicine': 'Ibuprofen'}]),
+            self.record(prescription_date='2021-06-01'),
+        ])
+        self.assertEqual(response.status_code, 207, response.data)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertIn('patient', response.data['errors'][0]['errors'])
+        self.assertIn('prescription_items', response.data['errors'][1]['errors'])
+        self.assertEqual(Prescription.objects.filter(doctor=self.doctor).count(), 2)
+
+    def test_invalid_dates_are_rejected(self):
+        response = self.post([self.record(prescription_date='2021-02-30'), self.record(prescription_date='soon')])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        for error in response.data['errors']:
+            self.assertIn('prescription_date', error['errors'])
+        self.assertFalse(Prescription.objects.exists())
+
+    def test_rejects_non_array_and_oversized_bodies(self):
+        self.assertEqual(self.post(self.record()).status_code, 400)
+        with mock.patch('prescriptions.views.BULK_MAX_RECORDS', 2):
+            response = self.post([self.record()] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Prescription.objects.exists())
+
+    def test_chunks_and_invalidates_the_list(self):
+        self.assertEqual(self.client.get('/prescriptions/').data['results'], [])
+        created_ids, errors = import_prescriptions(self.doctor, [self.record()] * 5, chunk_size=2)
+        self.assertEqual((len(created_ids), errors), (5, []))
+        self.assertEqual(len(self.client.get('/prescriptions/').data['results']), 5)
+
+
+class ClinicBenchmarkCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_and_replay(self):
+        call_command('seed_clinic_data', doctors=2, patients=20, prescriptions=40, max_items=2, stdout=StringIO())
+
+        doctors = User.objects.filter(username__startswith='bench-doctor-')
+        self.assertEqual(doctors.count(), 2)
+        self.assertEqual(Patient.objects.count(), 20)
+        self.assertEqual(Prescription.objects.count(), 40)
+        self.assertEqual(Prescription.objects.exclude(doctor_id=models.F('patient__doctor_id')).count(), 0)
+        self.assertTrue(40 <= PrescriptionItem.objects.count() <= 80)
+        # Dates are spread over the past instead of all being today
+        self.assertTrue(Prescription.objects.filter(prescription_date__lt=timezone.localdate()).exists())
+        with self.assertRaises(CommandError):
+            call_command('seed_clinic_data', doctors=1, patients=1, prescriptions=1, stdout=StringIO())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            call_command('benchmark_api', concurrency='1', sessions=2, create_ratio=1, json_path=path, stdout=StringIO())
+            with open(path) as f:
+                report = json.load(f)
+
+        self.assertEqual(report['dataset']['prescriptions'], 40)
+        [level] = report['levels']
+        self.assertEqual(level['errors'], 0)
+        endpoints = level['endpoints']
+        self.assertEqual(set(endpoints), {
+            'login', 'users.me', 'patients.list', 'patients.detail', 'prescriptions.list', 'prescriptions.create',
+        })
+        self.assertEqual(endpoints['login']['requests'], 2)
+        self.assertEqual(endpoints['prescriptions.create']['requests'], 6)
+        # Only a doctor's first /users/me/ reads the profile; the rest come from the response cache
+        self.assertLess(endpoints['users.me']['queries_per_request'], 1)
+        self.assertEqual(Prescription.objects.count(), 46)
+        # Prescriptions created afterwards are dated today
+        created = Prescription.objects.order_by('-id')[:6]
+        self.assertEqual({prescription.prescription_date for prescription in created}, {date.today()})
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import PrescriptionListCreateView
+from .views import PrescriptionListCreateView, PrescriptionBulkCreateView, PrescriptionGenerateView
 
 app_name = 'prescriptions'
 
 urlpatterns = [
     path('', PrescriptionListCreateView.as_view(), name='prescription-create'),
-]
\ No newline at end of file
+    path('bulk/', PrescriptionBulkCreateView.as_view(), name='prescription-bulk-create'),
+    path('generate/', PrescriptionGenerateView.as_view(), name='prescription-generate'),
+]
@@ -1,12 +1,203 @@
-from rest_framework import generics, permissions
-from .models import Prescription
-from .serializers import PrescriptionSerializer
+import json
+import time
 
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import APIException, NotAuthenticated, ParseError, ValidationError
+from rest_framework.response import Response
+from MediMind.cache import CachedResponseMixin
+from MediMind.listing import ValuesListMixin
+from MediMind.middleware import add_server_timing
+from MediMind.pagination import KeysetPagination
+from patients.models import Patient
+from users.authentication import ClaimsJWTAuthentication
+from . import ai
+from .bulk import import_prescriptions
+from .models import Prescription, PrescriptionItem
+from .serializers import GeneratedPrescriptionSerializer, PrescriptionGenerateSerializer, PrescriptionSerializer
 
-class PrescriptionListCreateView(generics.ListCreateAPIView):
-    queryset = Prescription.objects.all()
+BULK_MAX_RECORDS = 5000
+
+
+class PrescriptionPagination(KeysetPagination):
+    ordering = ('-prescription_date', '-id')
+
+
+class PrescriptionListCreateView(CachedResponseMixin, ValuesListMixin, generics.ListCreateAPIView):
+    """
+    GET: List the logged-in doctor's prescriptions, newest first
+         (filters: patient, date_from, date_to; cursor paginated)
+    POST: Create a prescription with its items
+    """
     serializer_class = PrescriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PrescriptionPagination
+    # PrescriptionSerializer's output without `prescription_items`, which add_related() fills in
+    list_fields = ('id', 'prescription_date', 'patient', 'symptoms', 'diagnosis', 'notes', 'is_draft')
+    item_fields = ('medicine', 'dosage', 'instructions')
+
+    def get_cache_scopes(self, request):
+        return [f'prescriptions:{request.user.profile.id}']
+
+    def get_queryset(self):
+        queryset = Prescription.objects.filter(doctor=self.request.user.profile)
+        params = self.request.query_params
+
+        patient = params.get('patient')
+        if patient:
+            if not patient.isdigit():
+                raise ValidationError({'patient': 'Must be a patient id.'})
+            queryset = queryset.filter(patient_id=int(patient))
+
+        for param, lookup in (('date_from', 'gte'), ('date_to', 'lte')):
+            value = params.get(param)
+            if value:
+                try:
+                    day = parse_date(value)
+                except ValueError:
+                    day = None
+                if day is None:
+                    raise ValidationError({param: 'Must be a date in YYYY-MM-DD format.'})
+                queryset = queryset.filter(**{f'prescription_date__{lookup}': day})
+
+        return queryset
+
+    def add_related(self, rows):
+        items = {row['id']: [] for row in rows}
+        for prescription_id, *values in (
+            PrescriptionItem.objects
+            .filter(prescription_id__in=items)
+            .order_by('prescription_id', 'id')
+            .values_list('prescription_id', *self.item_fields)
+        ):
+            items[prescription_id].append(dict(zip(self.item_fields, values)))
+        for row in rows:
+            row['prescription_items'] = items[row['id']]
 
     def perform_create(self, serializer):
-        serializer.save(doctor=self.request.user.profile)
\ No newline at end of file
+        serializer.save(doctor=self.request.user.profile)
+
+
+class PrescriptionBulkCreateView(generics.GenericAPIView):
+    """
+    POST: Create many prescriptions (with items) for the logged-in doctor in one request.
+
+    Accepts a JSON array of prescriptions. Valid records are saved even if others fail;
+    failures are reported per record by their index in the array.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        records = request.data
+        if not isinstance(records, list):
+            return Response(
+                {'error': 'Expected a JSON array of prescriptions'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(records) > BULK_MAX_RECORDS:
+            return Response(
+                {'error': f'At most {BULK_MAX_RECORDS} prescriptions per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        created_ids, errors = import_prescriptions(request.user.profile, records)
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created_ids:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {'created': len(created_ids), 'ids': created_ids, 'errors': errors},
+            status=response_status
+        )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PrescriptionGenerateView(View):
+    """
+    POST: Generate a prescription for one of the doctor's patients with the AI service
+          and save it with its items (as a draft with `"draft": true`).
+
+    Body: `{"patient": <id>, "symptoms": "...", "draft": false}`. This is a native async
+    view: under ASGI (`MediMind/asgi.py`) the worker keeps serving other requests while
+    the AI service works, and the AI connection is reused across requests. It is a plain
+    Django view because DRF views are sync only, so it authenticates the JWT itself.
+    """
+    authentication = ClaimsJWTAuthentication()
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            profile = await sync_to_async(self.get_profile)(request)
+            params = self.get_params(request)
+        except APIException as exc:
+            return self.error_response(exc)
+
+        patient = await Patient.objects.filter(pk=params['patient'], doctor_id=profile.id).afirst()
+        if patient is None:
+            return JsonResponse(
+                {'patient': [f'Invalid pk "{params["patient"]}" - object does not exist.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        started = time.perf_counter()
+        try:
+            async with ai.client_for(request) as client:
+                body = await ai.generate_prescription(patient, params['symptoms'], client)
+        except ai.AIServiceError as exc:
+            response = JsonResponse({'error': exc.detail}, status=exc.status)
+            if exc.retry_after:
+                response['Retry-After'] = exc.retry_after
+            return response
+        ai_ms = (time.perf_counter() - started) * 1000
+
+        generated = GeneratedPrescriptionSerializer(data=body)
+        if not generated.is_valid():
+            return JsonResponse(
+                {'error': 'AI service returned an invalid prescription', 'details': generated.errors},
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+
+        data = await sync_to_async(self.save)(
+            profile, patient, params['symptoms'], params['draft'], generated.validated_data
+        )
+        response = JsonResponse(data, status=status.HTTP_201_CREATED)
+        add_server_timing(response, f'ai;dur={ai_ms:.2f}')
+        return response
+
+    def get_profile(self, request):
+        # Token users carry their profile in the claims; older tokens load it here
+        result = self.authentication.authenticate(request)
+        if result is None:
+            raise NotAuthenticated()
+        return result[0].profile
+
+    def get_params(self, request):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            raise ParseError('JSON parse error')
+        serializer = PrescriptionGenerateSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def save(self, doctor, patient, symptoms, draft, generated):
+        # Same transactional create as POST /prescriptions/
+        prescription = PrescriptionSerializer().create({
+            **generated, 'doctor': doctor, 'patient': patient, 'symptoms': symptoms, 'is_draft': draft,
+        })
+        return PrescriptionSerializer(prescription).data
+
+    def error_response(self, exc):
+        # Same bodies and headers as DRF's exception handler
+        data = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+        response = JsonResponse(data, status=exc.status_code, safe=False)
+        if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+            response['WWW-Authenticate'] = self.authentication.authenticate_header(None)
+        return response
@@ -19,6 +19,7 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'date_joined', 'profile__specialization')
     search_fields = ('username', 'first_name', 'last_name', 'email', 'profile__license_number')
     ordering = ('-date_joined',)
+    list_select_related = ('profile',)
 
     def get_specialization(self, obj):
         try:
@@ -46,6 +47,7 @@ class UserProfileAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'license_number', 'specialization')
     ordering = ('-user__date_joined',)
     readonly_fields = ('user',)
+    list_select_related = ('user',)
 
     fieldsets = (
         ('Doctor Information', {
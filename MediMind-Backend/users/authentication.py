@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+
+from .models import UserProfile
+
+PROFILE_CLAIMS = ('profile_id', 'specialization', 'license_number')
+
+
+class ProfileTokenUser(TokenUser):
+    """
+    Request user rebuilt from the access token's signed claims, with no database query.
+
+    `profile` is an unsaved-looking `UserProfile` carrying the real primary key, so
+    `Patient.objects.filter(doctor=request.user.profile)` and `serializer.save(doctor=...)`
+    work as they do with a loaded profile. Its `user` is built the same way from the
+    token's name and email claims.
+    """
+
+    @cached_property
+    def first_name(self):
+        return self.token.get('first_name', '')
+
+    @cached_property
+    def last_name(self):
+        return self.token.get('last_name', '')
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def profile(self):
+        user = User(
+            id=self.id,
+            username=self.username,
+            first_name=self.first_name,
+            last_name=self.last_name,
+            email=self.email,
+        )
+        return UserProfile(
+            id=self.token['profile_id'],
+            user=user,
+            specialization=self.token['specialization'],
+            license_number=self.token['license_number'],
+        )
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the profile claims added at login instead of
+    loading the `User` (and then its profile) on every request.
+
+    Tokens issued before the claims existed still authenticate through the database.
+    A deactivated or deleted user keeps access until their access token expires.
+    """
+
+    def get_user(self, validated_token):
+        if all(claim in validated_token for claim in PROFILE_CLAIMS):
+            return ProfileTokenUser(validated_token)
+        return super().get_user(validated_token)
@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from MediMind.profiling import ProfiledSerializerMixin
 from .models import UserProfile
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -31,9 +35,59 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     user = RegisterSerializer()
 
     class Meta:
         model = UserProfile
-        fields = ['user', 'specialization', 'license_number']
\ No newline at end of file
+        fields = ['user', 'specialization', 'license_number']
+
+
+def add_profile_claims(token, user):
+    """Writes the user's current name, email and profile into `token`'s claims."""
+    token['username'] = user.username
+    token['first_name'] = user.first_name
+    token['last_name'] = user.last_name
+    token['email'] = user.email
+    profile = UserProfile.objects.filter(user=user).first()
+    if profile is not None:
+        token['profile_id'] = profile.id
+        token['specialization'] = profile.specialization
+        token['license_number'] = profile.license_number
+
+
+class ProfileTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Adds the doctor's profile as signed claims, so authenticated requests can be
+    served without loading the user or profile. Refreshing re-reads the claims
+    (see ProfileTokenRefreshSerializer), so profile edits reach tokens at the next
+    refresh.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        add_profile_claims(token, user)
+        return token
+
+
+class ProfileRefreshToken(RefreshToken):
+    """Refresh token whose profile claims are reloaded from the database when it is read."""
+
+    def __init__(self, token=None, verify=True):
+        super().__init__(token, verify=verify)
+        if token is None:
+            return
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: self.payload.get(api_settings.USER_ID_CLAIM)}).first()
+        if user is not None:
+            add_profile_claims(self, user)
+
+
+class ProfileTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Issues the refreshed access token (and, with ROTATE_REFRESH_TOKENS, the rotated
+    refresh token) with the profile as it is now, rather than copying the claims of
+    the refresh token that was sent.
+    """
+
+    token_class = ProfileRefreshToken
@@ -0,0 +1,16 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from MediMind.cache import invalidate_on_commit
+from .models import UserProfile
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_responses(sender, instance, **kwargs):
+    invalidate_on_commit(f'user:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_profile_responses(sender, instance, **kwargs):
+    invalidate_on_commit(f'user:{instance.user_id}')
@@ -1,3 +1,114 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
-# Create your tests here.
+from MediMind.testing import QueryCountAssertionsMixin
+from .models import UserProfile
+from .serializers import ProfileTokenObtainPairSerializer
+
+
+def add_doctors(start, count):
+    for i in range(start, start + count):
+        user = User.objects.create(username=f'doctor{i}', email=f'doctor{i}@example.com')
+        UserProfile.objects.create(user=user, license_number=f'LIC-{i}')
+
+
+class UserAdminQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='admin', is_staff=True, is_superuser=True))
+        add_doctors(0, 2)
+
+    def test_user_changelist_query_count_is_constant(self):
+        self.assertQueryCountIndependentOfRows(
+            reverse('admin:auth_user_changelist'), lambda: add_doctors(2, 30)
+        )
+
+    def test_profile_changelist_query_count_is_constant(self):
+        self.assertQueryCountIndependentOfRows(
+            reverse('admin:users_userprofile_changelist'), lambda: add_doctors(2, 30)
+        )
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='doc', email='doc@example.com', password='pass12345', first_name='Asha', last_name='Rao'
+        )
+        self.profile = UserProfile.objects.create(user=self.user, specialization='Cardiology', license_number='LIC-1')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/users/login/', {'username': 'doc', 'password': 'pass12345'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_login_token_carries_profile_claims(self):
+        access = AccessToken(self.login()['access'])
+        self.assertEqual(access['profile_id'], self.profile.id)
+        self.assertEqual(access['specialization'], 'Cardiology')
+        self.assertEqual(access['license_number'], 'LIC-1')
+
+    def test_me_is_loaded_from_the_database_then_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login()["access"]}')
+        with self.assertNumQueries(1):
+            response = self.client.get('/users/me/')
+        self.assertEqual(response.json(), {
+            'user': {'id': self.user.id, 'first_name': 'Asha', 'last_name': 'Rao',
+                     'username': 'doc', 'email': 'doc@example.com'},
+            'specialization': 'Cardiology',
+            'license_number': 'LIC-1',
+        })
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/users/me/').json(), response.json())
+
+    def test_refreshed_access_token_keeps_claims(self):
+        refresh = self.login()['refresh']
+        response = self.client.post('/users/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(AccessToken(response.json()['access'])['profile_id'], self.profile.id)
+
+    def test_profile_edits_reach_me_at_once_and_tokens_at_refresh(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        self.assertEqual(self.client.get('/users/me/').json()['specialization'], 'Cardiology')
+
+        # An admin edits the profile and the name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.specialization = 'Neurology'
+            self.profile.save()
+            self.user.last_name = 'Iyer'
+            self.user.save()
+        me = self.client.get('/users/me/').json()
+        self.assertEqual(me['specialization'], 'Neurology')
+        self.assertEqual(me['user']['last_name'], 'Iyer')
+
+        refreshed = self.client.post('/users/refresh/', {'refresh': tokens['refresh']}, format='json').json()
+        access = AccessToken(refreshed['access'])
+        self.assertEqual(access['specialization'], 'Neurology')
+        self.assertEqual(access['last_name'], 'Iyer')
+        # The rotated refresh token carries the new claims forward too
+        self.assertEqual(RefreshToken(refreshed['refresh'])['specialization'], 'Neurology')
+
+    def test_token_without_claims_falls_back_to_database_and_cache(self):
+        legacy = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {legacy}')
+        first = self.client.get('/users/me/').json()
+        with self.assertNumQueries(1):  # the user lookup; the profile comes from the cache
+            self.assertEqual(self.client.get('/users/me/').json(), first)
+
+        self.profile.specialization = 'Neurology'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+        self.assertEqual(self.client.get('/users/me/').json()['specialization'], 'Neurology')
+
+
+class UserQueryBudgetTests(QueryCountAssertionsMixin, TestCase):
+    def test_me_budget_with_login_token(self):
+        user = User.objects.create(username='budget', email='budget@example.com')
+        UserProfile.objects.create(user=user, license_number='LIC-budget')
+        token = ProfileTokenObtainPairSerializer.get_token(user).access_token
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        self.assertQueryBudget('get', '/users/me/', 1)
@@ -3,6 +3,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth.models import User
 from rest_framework.response import Response
 
+from MediMind.cache import CachedResponseMixin
 from .models import UserProfile
 from .serializers import RegisterSerializer, UserProfileSerializer
 
@@ -11,9 +12,19 @@ class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
 
-class LoggedInView(generics.RetrieveAPIView):
+class LoggedInView(CachedResponseMixin, generics.RetrieveAPIView):
+    """
+    GET: The logged-in doctor's profile.
+
+    Always loaded from the database rather than the token's claims, which can be a
+    token lifetime behind an edit. The response is cached until the user or profile
+    changes (see users.signals).
+    """
     permission_classes = [IsAuthenticated]
     serializer_class = UserProfileSerializer
 
+    def get_cache_scopes(self, request):
+        return [f'user:{request.user.pk}']
+
     def get_object(self):
-        return UserProfile.objects.get(user=self.request.user)
\ No newline at end of file
+        return UserProfile.objects.select_related('user').get(user_id=self.request.user.pk)
@@ -4,6 +4,7 @@ import { useState, useEffect, useCallback, Suspense } from 'react';
 import { useRouter, useSearchParams } from 'next/navigation';
 import Link from 'next/link';
 import toast, { Toaster } from 'react-hot-toast';
+import { usePatientSearch } from '../lib/usePatientSearch';
 
 interface Patient {
   id: number;
@@ -17,18 +18,6 @@ interface Patient {
   doctor: number;
 }
 
-interface UserProfile {
-  user: {
-    id: number;
-    first_name: string;
-    last_name: string;
-    username: string;
-    email: string;
-  };
-  specialization: string;
-  license_number: string;
-}
-
 interface PrescriptionItem {
   medicine: string;
   dosage: string;
@@ -53,44 +42,29 @@ function PrescriptionContent() {
   const router = useRouter();
   const searchParams = useSearchParams();
   const patientIdParam = searchParams.get('patientId');
-  const [patients, setPatients] = useState<Patient[]>([]);
   const [selectedPatient, setSelectedPatient] = useState<Patient | null>(null);
   const [symptoms, setSymptoms] = useState('');
   const [searchQuery, setSearchQuery] = useState('');
   const [prescription, setPrescription] = useState<PrescriptionResponse | null>(null);
-  const [isLoading, setIsLoading] = useState(false);
   const [isGenerating, setIsGenerating] = useState(false);
   const [isEditing, setIsEditing] = useState(false);
   const [isSaving, setIsSaving] = useState(false);
   const [editedPrescription, setEditedPrescription] = useState<PrescriptionResponse | null>(null);
 
-  // Fetch patients on component mount
-  const fetchPatients = useCallback(async () => {
-    setIsLoading(true);
-    try {
-      const token = localStorage.getItem('access_token');
-      if (!token) {
-        // router.push('/login');
-        return;
-      }
-
-      // First, fetch the current doctor's information
-      const doctorResponse = await fetch(`${process.env.NEXT_PUBLIC_BASE_URL}/users/me/`, {
-        method: 'GET',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${token}`
-        }
-      });
-
-      if (!doctorResponse.ok) {
-        throw new Error('Failed to fetch doctor information');
-      }
+  // The picker shows one page of list rows at a time, searched on the server
+  const {
+    patients, hasMore, isLoading, isLoadingMore, loadMore,
+  } = usePatientSearch<Patient>(searchQuery, () => router.push('/login'));
 
-      const doctorData: UserProfile = await doctorResponse.json();
+  // List rows carry only name, age and gender; the prompt needs the full record
+  const selectPatient = useCallback(async (patientId: number) => {
+    const token = localStorage.getItem('access_token');
+    if (!token) {
+      return;
+    }
 
-      // Then, fetch patients for this doctor
-      const patientsResponse = await fetch(`${process.env.NEXT_PUBLIC_BASE_URL}/patients/doc${doctorData.user.id}/`, {
+    try {
+      const response = await fetch(`${process.env.NEXT_PUBLIC_BASE_URL}/patients/${patientId}/`, {
         method: 'GET',
         headers: {
           'Content-Type': 'application/json',
@@ -98,40 +72,25 @@ function PrescriptionContent() {
         }
       });
 
-      if (!patientsResponse.ok) {
-        throw new Error('Failed to fetch patients');
+      if (response.status === 401) {
+        router.push('/login');
+        return;
       }
-
-      const patientsData = await patientsResponse.json();
-      setPatients(patientsData);
-
-      if (patientIdParam) {
-        const patientToSelect = patientsData.find((p: Patient) => p.id === parseInt(patientIdParam));
-        if (patientToSelect) {
-          setSelectedPatient(patientToSelect);
-        }
+      if (!response.ok) {
+        throw new Error(`Failed to fetch patient ${patientId}`);
       }
+      setSelectedPatient(await response.json());
     } catch (error) {
-      console.error('Error fetching doctor or patients:', error);
-      // If there's an authentication error, redirect to login
-      if (error instanceof Error && error.message.includes('Failed to fetch doctor')) {
-        router.push('/login');
-      }
-    } finally {
-      setIsLoading(false);
+      console.error('Error fetching patient:', error);
+      toast.error('Failed to load patient details');
     }
-  }, [router, patientIdParam]);
+  }, [router]);
 
   useEffect(() => {
-    fetchPatients();
-  }, [fetchPatients]);
-
-  // Filter patients based on search query
-  const filteredPatients = patients.filter(patient =>
-    patient.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-    patient.phone?.includes(searchQuery) ||
-    patient.email?.toLowerCase().includes(searchQuery.toLowerCase())
-  );
+    if (patientIdParam) {
+      selectPatient(parseInt(patientIdParam));
+    }
+  }, [patientIdParam, selectPatient]);
 
   const handleGeneratePrescription = async () => {
     if (!selectedPatient) {
@@ -448,10 +407,10 @@ function PrescriptionContent() {
                 </div>
               ) : (
                 <div className="space-y-2 max-h-64 overflow-y-auto">
-                  {filteredPatients.map((patient) => (
+                  {patients.map((patient) => (
                     <div
                       key={patient.id}
-                      onClick={() => setSelectedPatient(patient)}
+                      onClick={() => selectPatient(patient.id)}
                       className={`p-4 border rounded-lg cursor-pointer transition-all duration-200 ${
                         selectedPatient?.id === patient.id
                           ? 'border-indigo-500 bg-gradient-to-r from-indigo-50 to-purple-50 shadow-md'
@@ -483,7 +442,7 @@ function PrescriptionContent() {
                       </div>
                     </div>
                   ))}
-                  {filteredPatients.length === 0 && searchQuery && (
+                  {patients.length === 0 && searchQuery && (
                     <div className="text-center py-8">
                       <svg className="w-12 h-12 text-gray-400 mx-auto mb-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                         <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={1} d="M21 21l-6-6m2-5a7 7 0 11-14 0 7 7 0 0114 0z" />
@@ -491,7 +450,7 @@ function PrescriptionContent() {
                       <p className="text-gray-600">No patients found matching &quot;{searchQuery}&quot;</p>
                     </div>
                   )}
-                  {filteredPatients.length === 0 && !searchQuery && (
+                  {patients.length === 0 && !searchQuery && (
                     <div className="text-center py-8">
                       <svg className="w-12 h-12 text-gray-400 mx-auto mb-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                         <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={1} d="M17 20h5v-2a3 3 0 00-5.356-1.857M17 20H7m10 0v-2c0-.656-.126-1.283-.356-1.857M7 20H2v-2a3 3 0 015.356-1.857M7 20v-2c0-.656.126-1.283.356-1.857m0 0a5.002 5.002 0 019.288 0M15 7a3 3 0 11-6 0 3 3 0 016 0zm6 3a2 2 0 11-4 0 2 2 0 014 0zM7 10a2 2 0 11-4 0 2 2 0 014 0z" />
@@ -499,6 +458,16 @@ function PrescriptionContent() {
                       <p className="text-gray-600">Create a patient before generating prescription</p>
                     </div>
                   )}
+                  {hasMore && (
+                    <button
+                      type="button"
+                      onClick={loadMore}
+                      disabled={isLoadingMore}
+                      className="w-full py-2 text-sm font-medium text-indigo-600 hover:text-indigo-800 disabled:opacity-50 disabled:cursor-not-allowed"
+                    >
+                      {isLoadingMore ? 'Loading...' : 'Load more patients'}
+                    </button>
+                  )}
                 </div>
               )}
 
@@ -0,0 +1,28 @@
+export interface Page<T> {
+    next: string | null;
+    count?: number;
+    results: T[];
+}
+
+export class PageFetchError extends Error {
+    constructor(public status: number) {
+        super(`Request failed with status ${status}`);
+    }
+}
+
+// Fetches one page of a cursor-paginated list; follow `page.next` for the one after it.
+export const fetchPage = async <T>(url: string, token: string): Promise<Page<T>> => {
+    const response: Response = await fetch(url, {
+        method: 'GET',
+        headers: {
+            'Content-Type': 'application/json',
+            'Authorization': `Bearer ${token}`
+        }
+    });
+
+    if (!response.ok) {
+        throw new PageFetchError(response.status);
+    }
+
+    return response.json();
+};
@@ -0,0 +1,74 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
+import { fetchPage, PageFetchError } from './paginate';
+
+// Wait this long after the last keystroke before asking the backend
+const SEARCH_DELAY_MS = 300;
+
+// Loads the logged-in doctor's patients one page at a time, searched on the server.
+// Call `loadMore` for the next page; a new search term starts again from the first page.
+export const usePatientSearch = <T>(searchTerm: string, onUnauthorized: () => void) => {
+    const [patients, setPatients] = useState<T[]>([]);
+    const [count, setCount] = useState<number | null>(null);
+    const [nextUrl, setNextUrl] = useState<string | null>(null);
+    const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+    // Responses for an older search term arrive late and are dropped
+    const latestRequest = useRef(0);
+    const onUnauthorizedRef = useRef(onUnauthorized);
+    onUnauthorizedRef.current = onUnauthorized;
+
+    const load = useCallback(async (url: string, append: boolean) => {
+        const request = append ? latestRequest.current : ++latestRequest.current;
+        const token = localStorage.getItem('access_token');
+        if (!token) {
+            setIsLoading(false);
+            return;
+        }
+
+        if (append) {
+            setIsLoadingMore(true);
+        } else {
+            setIsLoading(true);
+        }
+        try {
+            const page = await fetchPage<T>(url, token);
+            if (request !== latestRequest.current) return;
+            setPatients(current => append ? [...current, ...page.results] : page.results);
+            setNextUrl(page.next);
+            if (page.count !== undefined) {
+                setCount(page.count);
+            }
+        } catch (error) {
+            if (request !== latestRequest.current) return;
+            if (error instanceof PageFetchError && error.status === 401) {
+                onUnauthorizedRef.current();
+                return;
+            }
+            console.error('Error fetching patients:', error);
+        } finally {
+            if (request === latestRequest.current) {
+                setIsLoading(false);
+                setIsLoadingMore(false);
+            }
+        }
+    }, []);
+
+    useEffect(() => {
+        const term = searchTerm.trim();
+        const params = new URLSearchParams({ count: 'true' });
+        if (term) {
+            params.set('search', term);
+        }
+        const url = `${process.env.NEXT_PUBLIC_BASE_URL}/patients/?${params}`;
+        const timer = setTimeout(() => load(url, false), term ? SEARCH_DELAY_MS : 0);
+        return () => clearTimeout(timer);
+    }, [searchTerm, load]);
+
+    const loadMore = useCallback(() => {
+        if (nextUrl && !isLoading && !isLoadingMore) {
+            load(nextUrl, true);
+        }
+    }, [nextUrl, isLoading, isLoadingMore, load]);
+
+    return { patients, count, hasMore: nextUrl !== null, isLoading, isLoadingMore, loadMore };
+};
@@ -4,6 +4,7 @@ import { useState, useEffect } from 'react';
 import { useRouter, useParams } from 'next/navigation';
 import Link from 'next/link';
 import toast, { Toaster } from 'react-hot-toast';
+import { fetchPage, PageFetchError } from '../../lib/paginate';
 
 interface Patient {
   id: number;
@@ -50,6 +51,8 @@ export default function PatientDetailsPage() {
   const [prescriptions, setPrescriptions] = useState<Prescription[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [isLoadingPrescriptions, setIsLoadingPrescriptions] = useState(false);
+  const [nextPrescriptionsUrl, setNextPrescriptionsUrl] = useState<string | null>(null);
+  const [prescriptionCount, setPrescriptionCount] = useState<number | null>(null);
   const [isEditing, setIsEditing] = useState(false);
   const [isSaving, setIsSaving] = useState(false);
   const [isDeleting, setIsDeleting] = useState(false);
@@ -96,8 +99,11 @@ export default function PatientDetailsPage() {
             medical_history: data.medical_history || ''
           });
 
-          // Fetch prescriptions after patient data is loaded
-          fetchPrescriptions();
+          // Fetch the first page of prescriptions after patient data is loaded
+          fetchPrescriptions(
+              `${process.env.NEXT_PUBLIC_BASE_URL}/prescriptions/?patient=${patientId}&count=true`,
+              false
+          );
         } else if (response.status === 401) {
           toast.error('Session expired. Please login again');
           localStorage.removeItem("access_token");
@@ -117,43 +123,37 @@ export default function PatientDetailsPage() {
       }
     };
 
-    const fetchPrescriptions = async () => {
-      setIsLoadingPrescriptions(true);
-      try {
-        const token = localStorage.getItem("access_token");
-        if (!token) return;
+    fetchPatient();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [patientId, router]);
 
-        const response = await fetch(`${process.env.NEXT_PUBLIC_BASE_URL}/prescriptions/`, {
-          method: 'GET',
-          headers: {
-            'Content-Type': 'application/json',
-            'Authorization': `Bearer ${token}`
-          }
-        });
+  // Loads one page of the patient's prescriptions; later pages are fetched on demand
+  const fetchPrescriptions = async (url: string, append: boolean) => {
+    setIsLoadingPrescriptions(true);
+    try {
+      const token = localStorage.getItem("access_token");
+      if (!token) return;
 
-        if (response.ok) {
-          const data = await response.json();
-          // Filter prescriptions for current patient
-          const patientPrescriptions = data.filter((prescription: Prescription) =>
-              prescription.patient === parseInt(patientId)
-          );
-          setPrescriptions(patientPrescriptions);
-        } else if (response.status === 401) {
-          toast.error('Session expired while loading prescriptions');
-          localStorage.removeItem("access_token");
-          localStorage.removeItem("refresh_token");
-          router.push('/login');
-        }
-      } catch (error) {
-        console.error('Error fetching prescriptions:', error);
-        toast.error('Failed to load prescriptions');
-      } finally {
-        setIsLoadingPrescriptions(false);
+      const page = await fetchPage<Prescription>(url, token);
+      setPrescriptions(current => append ? [...current, ...page.results] : page.results);
+      setNextPrescriptionsUrl(page.next);
+      if (page.count !== undefined) {
+        setPrescriptionCount(page.count);
       }
-    };
-
-    fetchPatient();
-  }, [patientId, router]);
+    } catch (error) {
+      if (error instanceof PageFetchError && error.status === 401) {
+        toast.error('Session expired while loading prescriptions');
+        localStorage.removeItem("access_token");
+        localStorage.removeItem("refresh_token");
+        router.push('/login');
+        return;
+      }
+      console.error('Error fetching prescriptions:', error);
+      toast.error('Failed to load prescriptions');
+    } finally {
+      setIsLoadingPrescriptions(false);
+    }
+  };
 
   const validateForm = (): boolean => {
     const newErrors: FormErrors = {};
@@ -636,10 +636,10 @@ export default function PatientDetailsPage() {
                     <svg className="w-5 h-5 mr-2 text-blue-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                       <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
                     </svg>
-                    Prescriptions ({prescriptions.length})
+                    Prescriptions ({prescriptionCount ?? prescriptions.length})
                   </h3>
 
-                  {isLoadingPrescriptions ? (
+                  {isLoadingPrescriptions && prescriptions.length === 0 ? (
                       <div className="flex items-center justify-center py-8">
                         <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-blue-600"></div>
                         <span className="ml-2 text-gray-600">Loading prescriptions...</span>
@@ -727,6 +727,19 @@ export default function PatientDetailsPage() {
                               </div>
                             </div>
                         ))}
+
+                        {nextPrescriptionsUrl && (
+                            <div className="flex justify-center">
+                              <button
+                                  type="button"
+                                  onClick={() => fetchPrescriptions(nextPrescriptionsUrl, true)}
+                                  disabled={isLoadingPrescriptions}
+                                  className="px-4 py-2 border border-gray-300 rounded-md text-sm font-medium text-gray-700 bg-white hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed"
+                              >
+                                {isLoadingPrescriptions ? 'Loading...' : 'Load more prescriptions'}
+                              </button>
+                            </div>
+                        )}
                       </div>
                   )}
                 </div>
@@ -1,9 +1,10 @@
 'use client';
 
-import { useState, useEffect, useMemo } from 'react';
+import { useState, useEffect } from 'react';
 import { useRouter } from 'next/navigation';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
+import { usePatientSearch } from '../lib/usePatientSearch';
 
 interface Patient {
     id: number;
@@ -13,84 +14,21 @@ interface Patient {
     doctor: number;
 }
 
-interface UserProfile {
-    user: {
-        id: number,
-        first_name: string,
-        last_name: string,
-        username: string,
-        email: string,
-    },
-    specialization: string,
-    license_number: string
-}
-
 export default function PatientsPage() {
     const router = useRouter();
-    const [patients, setPatients] = useState<Patient[]>([]);
     const [searchTerm, setSearchTerm] = useState('');
-    const [isLoading, setIsLoading] = useState(true);
-
-    useEffect(() => {
-        const fetchDoctorAndPatients = async () => {
-            setIsLoading(true);
-            try {
-                const token = localStorage.getItem("access_token");
-                if(!token) {
-                    // router.push("/login");
-                    return;
-                }
-
-                // First, fetch the current doctor's information
-                const doctorResponse = await fetch(`${process.env.NEXT_PUBLIC_BASE_URL}/users/me/`, {
-                    method: 'GET',
-                    headers: {
-                        'Content-Type': 'application/json',
-                        'Authorization': `Bearer ${token}`
-                    }
-                });
-
-                if (!doctorResponse.ok) {
-                    throw new Error('Failed to fetch doctor information');
-                }
-
-                const doctorData: UserProfile = await doctorResponse.json();
-
-                // Then, fetch patients for this doctor
-                const patientsResponse = await fetch(`${process.env.NEXT_PUBLIC_BASE_URL}/patients/doc${doctorData.user.id}/`, {
-                    method: 'GET',
-                    headers: {
-                        'Content-Type': 'application/json',
-                        'Authorization': `Bearer ${token}`
-                    }
-                });
+    const [totalPatients, setTotalPatients] = useState<number | null>(null);
 
-                if (!patientsResponse.ok) {
-                    throw new Error('Failed to fetch patients');
-                }
+    // Only the first page is loaded up front; searching and "Load more" go to the server
+    const {
+        patients, count, hasMore, isLoading, isLoadingMore, loadMore,
+    } = usePatientSearch<Patient>(searchTerm, () => router.push("/login"));
 
-                const patientsData = await patientsResponse.json();
-                setPatients(patientsData);
-            } catch (error) {
-                console.error('Error fetching doctor or patients:', error);
-                // If there's an authentication error, redirect to login
-                if (error instanceof Error && error.message.includes('Failed to fetch doctor')) {
-                    router.push("/login");
-                }
-            } finally {
-                setIsLoading(false);
-            }
-        };
-
-        fetchDoctorAndPatients();
-    }, [router]);
-
-    // Filter patients based on search term
-    const filteredPatients = useMemo(() => {
-        return patients.filter(patient =>
-            patient.name.toLowerCase().includes(searchTerm.toLowerCase())
-        );
-    }, [patients, searchTerm]);
+    useEffect(() => {
+        if (!searchTerm.trim() && count !== null) {
+            setTotalPatients(count);
+        }
+    }, [searchTerm, count]);
 
     const handleAddPatient = async () => {
         router.push("/create-patient");
@@ -100,7 +38,7 @@ export default function PatientsPage() {
         router.push(`/patients/${patientId}`);
     };
 
-    if (isLoading) {
+    if (isLoading && totalPatients === null) {
         return (
             <>
                 <Navbar />
@@ -172,13 +110,13 @@ export default function PatientsPage() {
                                 <div className="bg-white/80 backdrop-blur-sm rounded-xl shadow-lg border border-white/20 px-6 py-4 min-w-[120px]">
                                     <p className="text-sm font-semibold text-gray-600 mb-1">Total Patients</p>
                                     <p className="text-3xl font-bold bg-gradient-to-r from-indigo-600 to-purple-600 bg-clip-text text-transparent">
-                                        {patients.length}
+                                        {totalPatients ?? patients.length}
                                     </p>
                                 </div>
                                 <div className="bg-white/80 backdrop-blur-sm rounded-xl shadow-lg border border-white/20 px-6 py-4 min-w-[120px]">
-                                    <p className="text-sm font-semibold text-gray-600 mb-1">Showing</p>
+                                    <p className="text-sm font-semibold text-gray-600 mb-1">Matching</p>
                                     <p className="text-3xl font-bold bg-gradient-to-r from-green-600 to-emerald-600 bg-clip-text text-transparent">
-                                        {filteredPatients.length}
+                                        {count ?? patients.length}
                                     </p>
                                 </div>
                             </div>
@@ -186,7 +124,7 @@ export default function PatientsPage() {
                     </div>
 
                     {/* Patients Grid */}
-                    {filteredPatients.length === 0 ? (
+                    {patients.length === 0 ? (
                         <div className="text-center py-16">
                             <div className="bg-white/80 backdrop-blur-sm rounded-2xl shadow-lg border border-white/20 p-12 max-w-md mx-auto">
                                 <svg className="mx-auto h-16 w-16 text-gray-400 mb-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
@@ -208,7 +146,7 @@ export default function PatientsPage() {
                         </div>
                     ) : (
                         <div className="grid grid-cols-1 gap-6 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4">
-                            {filteredPatients.map((patient) => (
+                            {patients.map((patient) => (
                                 <div
                                     key={patient.id}
                                     className="bg-white/80 backdrop-blur-sm rounded-xl shadow-lg border border-white/20 hover:shadow-xl transition-all duration-300 transform hover:-translate-y-1 group"
@@ -247,6 +185,19 @@ export default function PatientsPage() {
                             ))}
                         </div>
                     )}
+
+                    {hasMore && (
+                        <div className="flex justify-center mt-8">
+                            <button
+                                type="button"
+                                onClick={loadMore}
+                                disabled={isLoading || isLoadingMore}
+                                className="px-6 py-3 border border-gray-200 bg-white/80 backdrop-blur-sm rounded-xl text-sm font-semibold text-gray-700 hover:bg-white shadow-sm disabled:opacity-50 disabled:cursor-not-allowed"
+                            >
+                                {isLoadingMore ? 'Loading...' : 'Load more patients'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
             <Footer />